@@ -0,0 +1,392 @@
+# app/candidate_index.py
+"""
+Vector index over candidate profiles, for suggesting existing applicants to new jobs.
+
+Every scored application adds (or replaces) its candidate's profile embedding,
+keyed by user_id, so the index grows with ingestion instead of being rebuilt.
+Queries embed the job's requirements and return the nearest candidates by
+cosine similarity:
+
+    - hnswlib (optional, CPU only) serves approximate queries once the index
+      holds at least CANDIDATE_INDEX_EXACT_THRESHOLD candidates;
+    - below that, or without hnswlib installed, an exact scan (one matrix
+      product) is both fast enough and exact.
+
+The vectors, the user_id mapping and the HNSW graph are persisted under
+CANDIDATE_INDEX_DIR by a periodic flush and at shutdown, and reloaded at
+startup; an index that is empty or holds fewer candidates than job_user is
+rebuilt from job_user in the background. Every API process flushes to the same
+directory, so the ids and vectors go into a single snapshot file that is
+written under a unique temporary name and renamed into place, and the snapshot
+names the graph file saved with it. A reader therefore never mixes files of two
+writers. Writers hold an exclusive lock on CANDIDATE_INDEX_DIR/index.lock and
+first merge the snapshot on disk into their own index, so candidates indexed by
+other processes are kept (and picked up) rather than overwritten.
+"""
+import os
+import uuid
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+from db import job_user_collection
+from app.scorer import embedding_cache
+from app.resume_parser import profile_labels, flatten_requirements
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; a single process needs no lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_INDEX_DIR = os.getenv("CANDIDATE_INDEX_DIR", ".cache/candidate_index")
+CANDIDATE_INDEX_EXACT_THRESHOLD = int(os.getenv("CANDIDATE_INDEX_EXACT_THRESHOLD", 20000))
+CANDIDATE_INDEX_FLUSH_SECONDS = float(os.getenv("CANDIDATE_INDEX_FLUSH_SECONDS", 60))
+HNSW_M = int(os.getenv("HNSW_M", 16))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", 200))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 100))
+
+_flusher: Optional[asyncio.Task] = None
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    with open(path, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def profile_text(profile: Dict[str, Any]) -> str:
+    """The text embedded for a candidate: the same labels the scorer compares."""
+    return " ".join(profile_labels(profile))
+
+
+class CandidateIndex:
+    def __init__(self, directory: Optional[str] = CANDIDATE_INDEX_DIR):
+        self.directory = directory
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._hnsw = None
+        # Candidates added or replaced here since the last save; they win over the snapshot on disk
+        self._changed: Set[str] = set()
+        self._snapshot_mtime: Optional[int] = None
+        self._saved_graph: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def mode(self) -> str:
+        return "hnsw" if self._use_hnsw() else "exact"
+
+    def _use_hnsw(self) -> bool:
+        return hnswlib is not None and len(self._ids) >= CANDIDATE_INDEX_EXACT_THRESHOLD
+
+    def _ensure_capacity(self, dim: int, needed: int) -> None:
+        if self._vectors is None:
+            self._vectors = np.zeros((max(needed, 1024), dim), dtype=np.float32)
+        elif needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors)), dim), dtype=np.float32)
+            grown[:len(self._vectors)] = self._vectors
+            self._vectors = grown
+
+    def _build_hnsw(self) -> None:
+        count = len(self._ids)
+        index = hnswlib.Index(space="ip", dim=self._vectors.shape[1])
+        index.init_index(max_elements=max(2 * count, 1024), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        index.add_items(self._vectors[:count], np.arange(count))
+        self._hnsw = index
+
+    def _add_locked(self, user_ids: List[str], vectors: np.ndarray) -> None:
+        rows = []
+        for user_id in user_ids:
+            row = self._rows.get(user_id)
+            if row is None:
+                row = len(self._ids)
+                self._rows[user_id] = row
+                self._ids.append(user_id)
+            rows.append(row)
+        self._ensure_capacity(vectors.shape[1], len(self._ids))
+        self._vectors[rows] = vectors
+
+        if self._hnsw is not None:
+            if len(self._ids) > self._hnsw.get_max_elements():
+                self._hnsw.resize_index(2 * len(self._ids))
+            # Re-adding an existing label replaces its vector
+            self._hnsw.add_items(vectors, np.array(rows))
+        elif self._use_hnsw():
+            self._build_hnsw()
+
+    def add_many(self, user_ids: List[str], vectors: np.ndarray) -> None:
+        """Insert or replace the vectors of the given candidates."""
+        if not user_ids:
+            return
+        with self._lock:
+            self._add_locked(user_ids, vectors)
+            self._changed.update(user_ids)
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """
+        Nearest candidates to a query vector.
+
+        Returns:
+            List[Tuple[str, float]]: (user_id, cosine similarity), best first
+        """
+        with self._lock:
+            count = len(self._ids)
+            k = min(k, count)
+            if k <= 0:
+                return []
+            if self._hnsw is not None and self._use_hnsw():
+                self._hnsw.set_ef(max(HNSW_EF_SEARCH, k))
+                labels, distances = self._hnsw.knn_query(vector, k=k)
+                # hnswlib's inner-product distance is 1 - dot
+                return [(self._ids[row], float(1 - dist)) for row, dist in zip(labels[0], distances[0])]
+
+            scores = self._vectors[:count] @ vector
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[row], float(scores[row])) for row in top]
+
+    def _read_snapshot(self) -> Optional[Tuple[List[str], np.ndarray, str]]:
+        snapshot_path = os.path.join(self.directory, "index.npz")
+        try:
+            mtime = os.stat(snapshot_path).st_mtime_ns
+            with np.load(snapshot_path) as snapshot:
+                ids = snapshot["ids"].tolist()
+                vectors = snapshot["vectors"]
+                graph = str(snapshot["graph"])
+        except FileNotFoundError:
+            return None
+        if len(ids) != len(vectors):
+            logger.warning("Candidate index snapshot is inconsistent; ignoring it")
+            return None
+        self._snapshot_mtime = mtime
+        return ids, vectors, graph
+
+    def _merge_locked(self, ids: List[str], vectors: np.ndarray) -> int:
+        # Take every candidate from disk that was not changed here since the last save
+        fresh = [i for i, user_id in enumerate(ids) if user_id not in self._changed]
+        known = [i for i in fresh if ids[i] in self._rows]
+        differs = set()
+        if known:
+            rows = [self._rows[ids[i]] for i in known]
+            mask = np.any(self._vectors[rows] != vectors[known], axis=1)
+            differs = {i for i, different in zip(known, mask) if different}
+        take = [i for i in fresh if ids[i] not in self._rows or i in differs]
+        if take:
+            self._add_locked([ids[i] for i in take], vectors[take])
+        return len(take)
+
+    def save(self) -> None:
+        """
+        Merge with the snapshot on disk and persist the result if this process changed anything.
+
+        Holds the directory's file lock, so concurrent savers in other processes
+        neither lose each other's candidates nor interleave their writes.
+        """
+        if not self.directory:
+            return
+        snapshot_path = os.path.join(self.directory, "index.npz")
+        try:
+            mtime = os.stat(snapshot_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with self._lock:
+            if not self._changed and mtime == self._snapshot_mtime:
+                return
+        os.makedirs(self.directory, exist_ok=True)
+        token = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        with _file_lock(os.path.join(self.directory, "index.lock")):
+            snapshot = self._read_snapshot()
+            with self._lock:
+                merged = self._merge_locked(snapshot[0], snapshot[1]) if snapshot else 0
+                if merged:
+                    logger.info(f"Picked up {merged} candidates indexed by other processes")
+                if not self._changed:
+                    return
+                count = len(self._ids)
+                ids = list(self._ids)
+                vectors = np.array(self._vectors[:count])
+                self._changed = set()
+                graph = ""
+                if self._hnsw is not None:
+                    # Saved under the lock: hnswlib must not be written to while serialising
+                    graph = f"hnsw-{token}.bin"
+                    self._hnsw.save_index(os.path.join(self.directory, graph))
+
+            tmp_snapshot = os.path.join(self.directory, f".index-{token}.tmp.npz")
+            np.savez(tmp_snapshot, ids=np.array(ids, dtype=str), vectors=vectors, graph=np.array(graph))
+            os.replace(tmp_snapshot, snapshot_path)
+            self._snapshot_mtime = os.stat(snapshot_path).st_mtime_ns
+        # Only this process's previous snapshot referred to its previous graph
+        if self._saved_graph:
+            try:
+                os.remove(os.path.join(self.directory, self._saved_graph))
+            except FileNotFoundError:
+                pass
+        self._saved_graph = graph or None
+        logger.info(f"Saved candidate index with {count} candidates")
+
+    def load(self) -> int:
+        """
+        Load the persisted index, keeping anything added since startup.
+
+        Returns:
+            int: Number of candidates read from disk
+        """
+        if not self.directory:
+            return 0
+        snapshot = self._read_snapshot()
+        if snapshot is None:
+            return 0
+        ids, vectors, graph = snapshot
+
+        with self._lock:
+            added_ids = list(self._ids)
+            added_vectors = np.array(self._vectors[:len(added_ids)]) if added_ids else None
+            self._hnsw = None
+            self._ids = list(ids)
+            self._rows = {user_id: row for row, user_id in enumerate(ids)}
+            self._vectors = None
+            if ids:
+                self._ensure_capacity(vectors.shape[1], len(ids))
+                self._vectors[:len(ids)] = vectors
+            if self._use_hnsw():
+                if graph:
+                    try:
+                        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+                        index.load_index(os.path.join(self.directory, graph), max_elements=max(2 * len(ids), 1024))
+                        self._hnsw = index
+                    except (OSError, RuntimeError) as e:
+                        # A newer save of its writer may have removed it; rebuilt below
+                        logger.warning(f"Could not load candidate index graph {graph}: {e}")
+                if self._hnsw is None or self._hnsw.get_current_count() != len(ids):
+                    self._build_hnsw()
+            if added_ids:
+                self._add_locked(added_ids, added_vectors)
+        logger.info(f"Loaded candidate index with {len(ids)} candidates ({self.mode})")
+        return len(ids)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"candidates": len(self), "mode": self.mode, "hnswlib": hnswlib is not None}
+
+
+candidate_index = CandidateIndex()
+
+
+async def index_profiles(entries: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Embed and index (user_id, profile) pairs; profiles without labels are skipped."""
+    entries = [(str(user_id), profile_text(profile)) for user_id, profile in entries]
+    entries = [(user_id, text) for user_id, text in entries if text]
+    if not entries:
+        return
+
+    def work():
+        vectors = embedding_cache.encode_many([text for _, text in entries])
+        candidate_index.add_many([user_id for user_id, _ in entries], vectors)
+
+    await asyncio.to_thread(work)
+
+
+async def suggest_candidates(requirements: List[str], k: int, exclude: Optional[set] = None) -> List[Tuple[str, float]]:
+    """
+    Top-k indexed candidates for a job's requirements.
+
+    Args:
+        requirements: The job's job_des
+        k: Number of candidates to return
+        exclude: User IDs to leave out (e.g. people who already applied)
+
+    Returns:
+        List[Tuple[str, float]]: (user_id, cosine similarity), best first
+    """
+    text = " ".join(flatten_requirements(requirements))
+    if not text:
+        return []
+    exclude = exclude or set()
+
+    def work():
+        vector = embedding_cache.encode(text)
+        matches = candidate_index.search(vector, k + len(exclude))
+        return [(user_id, score) for user_id, score in matches if user_id not in exclude][:k]
+
+    return await asyncio.to_thread(work)
+
+
+async def rebuild_candidate_index(batch_size: int = 500) -> int:
+    """Index every scored application; returns the number of applications read."""
+    seen = 0
+    batch = []
+    cursor = job_user_collection.find(
+        {"resume_detail.skills": {"$exists": True}}, {"user_id": 1, "resume_detail": 1}
+    ).sort("_id", 1)
+    async for doc in cursor:
+        batch.append((doc["user_id"], doc["resume_detail"]))
+        seen += 1
+        if len(batch) >= batch_size:
+            await index_profiles(batch)
+            batch = []
+    await index_profiles(batch)
+    return seen
+
+
+async def _indexable_candidates() -> int:
+    # Candidates with at least one skill always have an embedding text
+    result = await job_user_collection.aggregate([
+        {"$match": {"resume_detail.skills.0": {"$exists": True}}},
+        {"$group": {"_id": "$user_id"}},
+        {"$count": "candidates"},
+    ]).to_list(length=1)
+    return result[0]["candidates"] if result else 0
+
+
+async def _flush_loop() -> None:
+    try:
+        loaded = await asyncio.to_thread(candidate_index.load)
+        expected = await _indexable_candidates()
+        if loaded < expected:
+            # Empty, or missing candidates another process never got to save
+            logger.info(f"Candidate index holds {loaded} of {expected} candidates; rebuilding")
+            logger.info(f"Rebuilt candidate index from {await rebuild_candidate_index()} applications")
+    except Exception as e:
+        logger.error(f"Failed to load candidate index: {e}")
+
+    while True:
+        await asyncio.sleep(CANDIDATE_INDEX_FLUSH_SECONDS)
+        try:
+            await asyncio.to_thread(candidate_index.save)
+        except Exception as e:
+            logger.error(f"Failed to save candidate index: {e}")
+
+
+def start_candidate_index() -> None:
+    global _flusher
+    if _flusher is None:
+        _flusher = asyncio.create_task(_flush_loop())
+
+
+async def stop_candidate_index() -> None:
+    global _flusher
+    if _flusher is None:
+        return
+    _flusher.cancel()
+    await asyncio.gather(_flusher, return_exceptions=True)
+    _flusher = None
+    await asyncio.to_thread(candidate_index.save)
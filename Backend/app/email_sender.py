@@ -1,8 +1,8 @@
 # app/email_sender.py
 import os
 from email.message import EmailMessage
-from aiosmtplib import send
 from dotenv import load_dotenv
+from app.smtp_pool import SMTPPool
 
 load_dotenv()
 
@@ -10,11 +10,24 @@ SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASS = os.getenv("SMTP_PASS")
-
-async def send_status_update_email(to_email: str):
-
-    print("\n\nSending status update email to:\n\n")
-
+SMTP_START_TLS = os.getenv("SMTP_START_TLS", "true").lower() == "true"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 5))
+SMTP_RATE_PER_SECOND = float(os.getenv("SMTP_RATE_PER_SECOND", 10))
+SMTP_MAX_RETRIES = int(os.getenv("SMTP_MAX_RETRIES", 3))
+
+# Shared by every sender in the process so sessions are reused across batches
+smtp_pool = SMTPPool(
+    hostname=SMTP_HOST,
+    port=SMTP_PORT,
+    username=SMTP_USER,
+    password=SMTP_PASS,
+    start_tls=SMTP_START_TLS,
+    size=SMTP_POOL_SIZE,
+    rate_per_second=SMTP_RATE_PER_SECOND,
+    max_retries=SMTP_MAX_RETRIES
+)
+
+def build_status_update_email(to_email: str) -> EmailMessage:
     message = EmailMessage()
     message["From"] = SMTP_USER
     message["To"] = to_email
@@ -36,12 +49,4 @@ async def send_status_update_email(to_email: str):
     """
 
     message.set_content(content)
-
-    await send(
-        message,
-        hostname=SMTP_HOST,
-        port=SMTP_PORT,
-        username=SMTP_USER,
-        password=SMTP_PASS,
-        start_tls=True
-    )
\ No newline at end of file
+    return message
@@ -0,0 +1,243 @@
+# app/embedding_cache.py
+"""
+Embedding cache in front of the sentence-transformers model.
+
+Vectors are keyed by the normalized text, L2-normalized (so a dot product is the
+cosine similarity) and kept in two layers:
+
+    memory  an LRU of recently used vectors
+    disk    append-only shards under EMBEDDING_CACHE_DIR/<model>/, each a pair
+            <n>.npy (float32 matrix, memory-mapped on load) and <n>.keys.json,
+            capped at EMBEDDING_DISK_MAX_ENTRIES vectors: past the cap the
+            shards are compacted into one holding the most recently used
+            EMBEDDING_DISK_KEEP_RATIO of it
+
+encode_many() looks every text up in both layers and encodes all of the unseen
+ones in a single model.encode() call, so scoring one JD against N candidates is
+one batched encode plus one matrix product.
+"""
+import os
+import json
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.result_cache import make_key, normalize_text
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 50000))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+# Shards are merged into one once there are more than this many
+EMBEDDING_MAX_SHARDS = int(os.getenv("EMBEDDING_MAX_SHARDS", 32))
+EMBEDDING_DISK_MAX_ENTRIES = int(os.getenv("EMBEDDING_DISK_MAX_ENTRIES", 200000))
+# Evicting down to a fraction of the cap keeps compactions from running on every write
+EMBEDDING_DISK_KEEP_RATIO = float(os.getenv("EMBEDDING_DISK_KEEP_RATIO", 0.8))
+
+
+class DiskStore:
+    """Append-only on-disk vector store made of memory-mapped .npy shards."""
+
+    def __init__(self, directory: str, max_entries: int = EMBEDDING_DISK_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._shards: Dict[str, np.ndarray] = {}
+        # Least recently used first; shards load oldest first, so restarts keep the order roughly
+        self._index: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._next_shard = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".keys.json"):
+                continue
+            shard = name[:-len(".keys.json")]
+            vectors_path = os.path.join(self.directory, f"{shard}.npy")
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    keys = json.load(f)
+                vectors = np.load(vectors_path, mmap_mode="r")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable embedding shard {shard}: {e}")
+                continue
+            self._add_shard(shard, keys, vectors)
+        logger.info(f"Loaded {len(self._index)} cached embeddings from {self.directory}")
+
+    def _add_shard(self, shard: str, keys: List[str], vectors: np.ndarray) -> None:
+        self._shards[shard] = vectors
+        try:
+            self._next_shard = max(self._next_shard, int(shard.split("-")[0]) + 1)
+        except ValueError:
+            pass
+        for row, key in enumerate(keys):
+            self._index[key] = (shard, row)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _read(self, key: str) -> np.ndarray:
+        shard, row = self._index[key]
+        return np.asarray(self._shards[shard][row])
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        location = self._index.get(key)
+        if location is None:
+            return None
+        self._index.move_to_end(key)
+        return self._read(key)
+
+    def _write_shard(self, keys: List[str], vectors: np.ndarray) -> str:
+        shard = f"{self._next_shard:06d}-{uuid.uuid4().hex[:8]}"
+        self._next_shard += 1
+        vectors_path = os.path.join(self.directory, f"{shard}.npy")
+        tmp_path = os.path.join(self.directory, f".{shard}.tmp.npy")
+        np.save(tmp_path, np.ascontiguousarray(vectors, dtype=np.float32))
+        os.replace(tmp_path, vectors_path)
+        # The keys file is written last: a shard only exists once both halves do
+        tmp_keys = os.path.join(self.directory, f".{shard}.keys.tmp")
+        with open(tmp_keys, "w") as f:
+            json.dump(keys, f)
+        os.replace(tmp_keys, os.path.join(self.directory, f"{shard}.keys.json"))
+        return shard
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        if not keys:
+            return
+        shard = self._write_shard(keys, vectors)
+        self._add_shard(shard, keys, np.load(os.path.join(self.directory, f"{shard}.npy"), mmap_mode="r"))
+        if len(self._index) > self.max_entries:
+            self.compact(keep=int(self.max_entries * EMBEDDING_DISK_KEEP_RATIO))
+        elif len(self._shards) > EMBEDDING_MAX_SHARDS:
+            self.compact()
+
+    def compact(self, keep: Optional[int] = None) -> None:
+        """
+        Merge every shard into a single one.
+
+        Args:
+            keep: When set, only the `keep` most recently used vectors survive
+        """
+        keys = list(self._index)
+        if keep is not None and len(keys) > keep:
+            logger.info(f"Evicting {len(keys) - keep} cached embeddings from {self.directory}")
+            keys = keys[len(keys) - keep:]
+        if not keys:
+            return
+        vectors = np.stack([self._read(key) for key in keys])
+        old_shards = list(self._shards)
+        shard = self._write_shard(keys, vectors)
+        for old in old_shards:
+            for suffix in (".keys.json", ".npy"):
+                try:
+                    os.remove(os.path.join(self.directory, f"{old}{suffix}"))
+                except OSError:
+                    pass
+        self._shards, self._index = {}, OrderedDict()
+        self._add_shard(shard, keys, np.load(os.path.join(self.directory, f"{shard}.npy"), mmap_mode="r"))
+
+
+class EmbeddingCache:
+    """Memory LRU plus disk store around a SentenceTransformer-compatible encoder."""
+
+    def __init__(
+            self,
+            load_model: Callable[[], Any],
+            model_name: str,
+            directory: Optional[str] = EMBEDDING_CACHE_DIR,
+            max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+            batch_size: int = EMBEDDING_BATCH_SIZE
+    ):
+        self.load_model = load_model
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.directory = os.path.join(directory, model_name.replace("/", "_")) if directory else None
+        self._disk: Optional[DiskStore] = None
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def disk(self) -> Optional[DiskStore]:
+        # Opened on first use so importing the scorer touches no files
+        if self._disk is None and self.directory:
+            self._disk = DiskStore(self.directory)
+        return self._disk
+
+    def key(self, text: str) -> str:
+        return make_key(self.model_name, normalize_text(text))
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            return vector
+        if self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self._remember(key, vector)
+        return vector
+
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, encoding only the ones not cached yet.
+
+        Args:
+            texts: Texts to embed (duplicates are encoded once)
+
+        Returns:
+            np.ndarray: float32 matrix of shape (len(texts), dim), one L2-normalized row per text
+        """
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            found = {key: self._lookup(key) for key in set(keys)}
+            missing = [key for key, vector in found.items() if vector is None]
+            self.hits += len(keys) - sum(1 for key in keys if found[key] is None)
+            self.misses += len(missing)
+
+            if missing:
+                texts_by_key = {key: normalize_text(text) for key, text in zip(keys, texts)}
+                encoded = self.load_model().encode(
+                    [texts_by_key[key] for key in missing],
+                    batch_size=self.batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                ).astype(np.float32)
+                for key, vector in zip(missing, encoded):
+                    found[key] = vector
+                    self._remember(key, vector)
+                if self.disk is not None:
+                    try:
+                        self.disk.put_many(missing, encoded)
+                    except OSError as e:
+                        logger.error(f"Failed to persist {len(missing)} embeddings: {e}")
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.encode_many([text])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk) if self._disk is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
@@ -0,0 +1,125 @@
+# app/fake_gemini.py
+"""
+A local stand-in for the Gemini REST API, for tests and offline development.
+
+It answers POST /v1beta/models/<model>:generateContent with the same envelope
+the real API returns. The reply text comes from a responder function, so a test
+decides what the "model" says; the default responder understands the resume
+extraction prompts of app.resume_parser (single and batched) and builds a
+profile from each resume's "Name:" and "Skills:" lines.
+
+Point the app at it with:
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8765 uvicorn main:app
+or run it standalone:
+    python -m app.fake_gemini --port 8765
+"""
+import re
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+RESUME_BLOCK = re.compile(r"<<<RESUME (\d+)>>>\n(.*?)\n<<<END RESUME \1>>>", re.S)
+
+
+def _profile_from_text(text: str) -> Dict[str, Any]:
+    name = re.search(r"^Name:\s*(.+)$", text, re.M)
+    skills = re.search(r"^Skills:\s*(.+)$", text, re.M)
+    return {
+        "id": 1,
+        "name": name.group(1).strip() if name else "N/A",
+        "email": "N/A",
+        "phone": "N/A",
+        "position": "N/A",
+        "location": "N/A",
+        "appliedDate": "N/A",
+        "status": "N/A",
+        "avatar": "N/A",
+        "experience": "N/A",
+        "linkedin": "N/A",
+        "github": "N/A",
+        "portfolio": "N/A",
+        "summary": "N/A",
+        "skills": [s.strip() for s in skills.group(1).split(",")] if skills else [],
+        "workExperience": [],
+        "education": [],
+    }
+
+
+def default_responder(prompt: str) -> str:
+    """Echo back a profile per resume found in the prompt."""
+    blocks = RESUME_BLOCK.findall(prompt)
+    if blocks:
+        return json.dumps([{"index": int(index), **_profile_from_text(text)} for index, text in blocks])
+    resume = re.search(r"---\n(.*?)\n\s*---", prompt, re.S)
+    return json.dumps(_profile_from_text(resume.group(1) if resume else prompt))
+
+
+class FakeGeminiServer:
+    """Threaded HTTP server recording every prompt it receives."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 responder: Callable[[str], str] = default_responder):
+        self.responder = responder
+        self.prompts: List[str] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                prompt = "".join(
+                    part.get("text", "")
+                    for content in body.get("contents", [])
+                    for part in content.get("parts", [])
+                )
+                server.prompts.append(prompt)
+                try:
+                    text = server.responder(prompt)
+                    status, payload = 200, {
+                        "candidates": [{
+                            "content": {"parts": [{"text": text}], "role": "model"},
+                            "finishReason": "STOP",
+                            "index": 0,
+                        }],
+                        "usageMetadata": {"promptTokenCount": len(prompt) // 4},
+                    }
+                except Exception as e:
+                    status, payload = 500, {"error": {"code": 500, "message": str(e), "status": "INTERNAL"}}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGeminiServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Gemini API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    fake = FakeGeminiServer(args.host, args.port)
+    print(f"Fake Gemini listening on {fake.endpoint}")
+    fake._httpd.serve_forever()
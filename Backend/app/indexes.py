@@ -0,0 +1,160 @@
+# app/indexes.py
+"""
+Declared MongoDB indexes for every collection the API queries.
+
+Run `python -m app.indexes check` to report drift between the declarations and
+the live database, or `python -m app.indexes ensure --background` to build the
+missing ones on a large deployment without waiting for the API to start.
+"""
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from db import db
+
+logger = logging.getLogger(__name__)
+
+# The compound job_user(job_id, user_id) index also serves job_id-only lookups
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "job_user": [
+        {"keys": [("job_id", ASCENDING), ("user_id", ASCENDING)], "name": "job_id_1_user_id_1", "unique": True},
+        {"keys": [("user_id", ASCENDING)], "name": "user_id_1"},
+        {"keys": [("job_id", ASCENDING), ("resume_score", DESCENDING), ("_id", DESCENDING)],
+         "name": "job_id_1_resume_score_-1__id_-1"},
+        {"keys": [("ingest_state", ASCENDING), ("ingest_next_attempt_at", ASCENDING)],
+         "name": "ingest_state_1_ingest_next_attempt_at_1"},
+        {"keys": [("job_id", ASCENDING), ("_id", ASCENDING)], "name": "job_id_1__id_1"},
+    ],
+    "job": [
+        {"keys": [("hr_id", ASCENDING)], "name": "hr_id_1"},
+        {"keys": [("close_date", DESCENDING)], "name": "close_date_-1"},
+        {"keys": [("job_status", ASCENDING), ("prepare_next_attempt_at", ASCENDING)],
+         "name": "job_status_1_prepare_next_attempt_at_1"},
+    ],
+    "user": [
+        {"keys": [("email", ASCENDING)], "name": "email_1"},
+        {"keys": [("user_name", ASCENDING)], "name": "user_name_1"},
+    ],
+    "hr": [
+        {"keys": [("hr_email", ASCENDING)], "name": "hr_email_1"},
+    ],
+    "notification_outbox": [
+        {"keys": [("state", ASCENDING), ("next_attempt_at", ASCENDING)], "name": "state_1_next_attempt_at_1"},
+        {"keys": [("claim_token", ASCENDING)], "name": "claim_token_1", "sparse": True},
+    ],
+    "workflow_phase": [
+        {"keys": [("state", ASCENDING), ("run_at", ASCENDING)], "name": "state_1_run_at_1"},
+        {"keys": [("job_id", ASCENDING), ("run_at", ASCENDING)], "name": "job_id_1_run_at_1"},
+    ],
+    "rescore_run": [
+        {"keys": [("job_id", ASCENDING), ("active", ASCENDING)], "name": "job_id_1_active_1",
+         "unique": True, "partialFilterExpression": {"active": True}},
+    ],
+    "question_bank": [
+        {"keys": [("bank", ASCENDING), ("uses", ASCENDING), ("_id", ASCENDING)], "name": "bank_1_uses_1__id_1"},
+    ],
+    "resume_cache": [
+        {"keys": [("expires_at", ASCENDING)], "name": "expires_at_ttl", "expireAfterSeconds": 0},
+    ],
+    "transcript_cache": [
+        {"keys": [("expires_at", ASCENDING)], "name": "expires_at_ttl", "expireAfterSeconds": 0},
+    ],
+    "resumes.files": [
+        # Unique so concurrent uploads of one file cannot store it twice (see store_resume);
+        # an older non-unique build shows up as mismatched and must be dropped first
+        {"keys": [("metadata.sha256", ASCENDING)], "name": "metadata.sha256_1", "unique": True},
+    ],
+}
+
+# Options that change index behaviour and must match for an index to count as present
+_COMPARED_OPTIONS = ("unique", "expireAfterSeconds", "sparse", "partialFilterExpression")
+
+
+def _index_model(spec: Dict[str, Any], background: bool) -> IndexModel:
+    options = {key: value for key, value in spec.items() if key != "keys"}
+    if background:
+        options["background"] = True
+    return IndexModel(spec["keys"], **options)
+
+
+async def ensure_indexes(background: bool = False) -> Dict[str, List[str]]:
+    """
+    Create every declared index that does not exist yet.
+
+    Indexes are created one at a time so a single failure (for example a unique
+    index over existing duplicates) is logged without blocking the others.
+
+    Returns:
+        Dict[str, List[str]]: Index names that failed to build, per collection
+    """
+    failures: Dict[str, List[str]] = {}
+    for collection_name, specs in INDEXES.items():
+        collection = db[collection_name]
+        for spec in specs:
+            try:
+                await collection.create_indexes([_index_model(spec, background)])
+            except Exception as e:
+                logger.error(f"Failed to create index {spec['name']} on {collection_name}: {e}")
+                failures.setdefault(collection_name, []).append(spec["name"])
+    return failures
+
+
+async def check_index_drift() -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compare the declared indexes with the ones that exist.
+
+    Returns:
+        Dict[str, Dict[str, List[str]]]: Per collection, the declared indexes that
+        are missing, the existing ones that differ from their declaration and the
+        undeclared extras (the default _id index is ignored)
+    """
+    report: Dict[str, Dict[str, List[str]]] = {}
+    for collection_name, specs in INDEXES.items():
+        existing = {}
+        async for info in db[collection_name].list_indexes():
+            if info["name"] != "_id_":
+                existing[info["name"]] = info
+
+        missing, mismatched = [], []
+        for spec in specs:
+            info = existing.pop(spec["name"], None)
+            if info is None:
+                missing.append(spec["name"])
+                continue
+            same_keys = list(info["key"].items()) == [tuple(key) for key in spec["keys"]]
+            same_options = all(info.get(opt) == spec.get(opt) for opt in _COMPARED_OPTIONS)
+            if not (same_keys and same_options):
+                mismatched.append(spec["name"])
+
+        if missing or mismatched or existing:
+            report[collection_name] = {
+                "missing": missing,
+                "mismatched": mismatched,
+                "extra": sorted(existing),
+            }
+    return report
+
+
+def log_index_drift(report: Dict[str, Dict[str, List[str]]]) -> None:
+    if not report:
+        logger.info("All declared indexes are present.")
+        return
+    for collection_name, drift in report.items():
+        logger.warning(f"Index drift on {collection_name}: {drift}")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    if args.command == "ensure":
+        failures = await ensure_indexes(background=args.background)
+        if failures:
+            logger.error(f"Some indexes could not be built: {failures}")
+    log_index_drift(await check_index_drift())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Manage the declared MongoDB indexes")
+    parser.add_argument("command", choices=["check", "ensure"], help="report drift, or build missing indexes")
+    parser.add_argument("--background", action="store_true", help="build indexes without blocking the collection")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,253 @@
+# app/ingest_queue.py
+"""
+Mongo-backed queue that scores uploaded resumes outside the request.
+
+Each job_user document carries its own queue state:
+    ingest_state            queued -> processing -> done, or dead after the last retry
+    ingest_attempts         number of times a worker has claimed the document
+    ingest_next_attempt_at  earliest time a queued document may be claimed
+    ingest_lease_until      a processing document whose lease has expired is
+                            reclaimed, so a crashed worker never strands it; once
+                            it has used INGEST_MAX_ATTEMPTS it is dead-lettered
+                            instead, so a resume that kills its worker cannot
+                            loop forever
+
+A worker claims up to INGEST_BATCH_SIZE documents at a time, so a burst of
+submissions is extracted in packed prompts and each job's resumes are scored in
+one batch (see extract_and_score_resumes); a failure only fails its own document.
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument, UpdateOne
+from db import job_collection, job_user_collection
+from app.resume_parser import extract_and_score_resumes
+from app.resume_store import open_resume
+from app.pdf_extractor import extract_pdf_text_async, shutdown_pdf_pool, PdfParseError
+from app.candidate_index import index_profiles
+
+logger = logging.getLogger(__name__)
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 4))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 8))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", 5))
+INGEST_LEASE_SECONDS = float(os.getenv("INGEST_LEASE_SECONDS", 300))
+INGEST_RETRY_BASE_SECONDS = float(os.getenv("INGEST_RETRY_BASE_SECONDS", 10))
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", 5))
+
+QUEUED = "queued"
+PROCESSING = "processing"
+DONE = "done"
+DEAD = "dead"
+
+_workers: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+
+
+class PermanentIngestError(Exception):
+    """A failure that retrying cannot fix (e.g. a PDF that cannot be parsed or has no extractable text)."""
+
+
+def queued_fields() -> Dict[str, Any]:
+    """Queue fields for a freshly submitted application."""
+    return {
+        "ingest_state": QUEUED,
+        "ingest_attempts": 0,
+        "ingest_next_attempt_at": datetime.utcnow(),
+        "ingest_error": None,
+    }
+
+
+def notify_ingest_workers() -> None:
+    """Wake idle workers so a new submission does not wait for the next poll."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def _claim() -> Optional[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return await job_user_collection.find_one_and_update(
+        {"$or": [
+            {"ingest_state": QUEUED, "ingest_next_attempt_at": {"$lte": now}},
+            {
+                "ingest_state": PROCESSING,
+                "ingest_lease_until": {"$lt": now},
+                "ingest_attempts": {"$lt": INGEST_MAX_ATTEMPTS},
+            },
+        ]},
+        {
+            "$set": {
+                "ingest_state": PROCESSING,
+                "ingest_lease_until": now + timedelta(seconds=INGEST_LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"ingest_attempts": 1},
+        },
+        projection={"job_id": 1, "user_id": 1, "resume_file_id": 1, "ingest_attempts": 1},
+        sort=[("ingest_next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _dead_letter_expired() -> int:
+    """Dead-letter processing documents whose lease expired on their last attempt."""
+    now = datetime.utcnow()
+    result = await job_user_collection.update_many(
+        {
+            "ingest_state": PROCESSING,
+            "ingest_lease_until": {"$lt": now},
+            "ingest_attempts": {"$gte": INGEST_MAX_ATTEMPTS},
+        },
+        {
+            "$set": {"ingest_state": DEAD, "ingest_error": "Lease expired on the last attempt", "updated_at": now},
+            "$unset": {"ingest_lease_until": ""},
+        }
+    )
+    if result.modified_count:
+        logger.error(f"Moved {result.modified_count} applications to dead-letter after their last lease expired")
+    return result.modified_count
+
+
+async def _read_resume(doc: Dict[str, Any]) -> Tuple[str, Dict[str, Any], List[str]]:
+    grid_out = await open_resume(doc["resume_file_id"])
+    file_bytes = await grid_out.read()
+
+    try:
+        extraction = await extract_pdf_text_async(file_bytes)
+    except PdfParseError as e:
+        raise PermanentIngestError(str(e))
+    resume_content = extraction.pop("text")
+    if not resume_content.strip():
+        raise PermanentIngestError("Could not extract text from resume")
+
+    job_doc = await job_collection.find_one({"_id": doc["job_id"]}, {"job_des": 1})
+    if not job_doc or not job_doc.get("job_des"):
+        raise PermanentIngestError("No job description found for job")
+    job_description = job_doc["job_des"]
+    requirements = job_description if isinstance(job_description, list) else [job_description]
+    return resume_content, extraction, requirements
+
+
+async def _process(docs: List[Dict[str, Any]]) -> int:
+    """Score a batch of claimed documents; returns how many were scored."""
+    read = await asyncio.gather(*(_read_resume(doc) for doc in docs), return_exceptions=True)
+    ready = []
+    for doc, item in zip(docs, read):
+        if isinstance(item, Exception):
+            await _fail(doc, item)
+        else:
+            ready.append((doc, *item))
+    if not ready:
+        return 0
+
+    results = await extract_and_score_resumes([(content, requirements) for _, content, _, requirements in ready])
+
+    now = datetime.utcnow()
+    operations = []
+    scored = []
+    for (doc, resume_content, extraction, _), scoring_result in zip(ready, results):
+        if scoring_result.get("error"):
+            await _fail(doc, RuntimeError(f"Failed to score resume: {scoring_result['error']}"))
+            continue
+        operations.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {
+                "$set": {
+                    "resume_content": resume_content,
+                    "resume_extraction": extraction,
+                    "resume_score": float(scoring_result.get("resumeMatch", 0)),
+                    "resume_detail": scoring_result,
+                    "ingest_state": DONE,
+                    "ingest_error": None,
+                    "updated_at": now,
+                },
+                "$unset": {"ingest_lease_until": "", "ingest_next_attempt_at": ""},
+            }
+        ))
+        scored.append((doc["user_id"], scoring_result))
+    if operations:
+        await job_user_collection.bulk_write(operations, ordered=False)
+
+    try:
+        await index_profiles(scored)
+    except Exception as e:
+        # The applications are scored; missing suggestion entries are rebuilt later
+        logger.error(f"Failed to index {len(scored)} candidates: {e}")
+    return len(operations)
+
+
+async def _fail(doc: Dict[str, Any], error: Exception) -> None:
+    attempts = doc.get("ingest_attempts", 1)
+    now = datetime.utcnow()
+    if isinstance(error, PermanentIngestError) or attempts >= INGEST_MAX_ATTEMPTS:
+        update = {"ingest_state": DEAD, "ingest_error": str(error), "updated_at": now}
+        logger.error(f"Application {doc['_id']} moved to dead-letter after {attempts} attempts: {error}")
+    else:
+        delay = INGEST_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+        update = {
+            "ingest_state": QUEUED,
+            "ingest_error": str(error),
+            "ingest_next_attempt_at": now + timedelta(seconds=delay),
+            "updated_at": now,
+        }
+        logger.warning(f"Application {doc['_id']} failed (attempt {attempts}), retrying in {delay}s: {error}")
+    # Only while still processing: a document of a failed batch may already be done or dead
+    await job_user_collection.update_one(
+        {"_id": doc["_id"], "ingest_state": PROCESSING},
+        {"$set": update, "$unset": {"ingest_lease_until": ""}}
+    )
+
+
+async def _worker_loop(worker_id: int) -> None:
+    logger.info(f"Ingest worker {worker_id} started.")
+    while True:
+        docs = []
+        try:
+            await _dead_letter_expired()
+            while len(docs) < INGEST_BATCH_SIZE:
+                doc = await _claim()
+                if doc is None:
+                    break
+                docs.append(doc)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ingest worker {worker_id} failed to claim work: {e}")
+
+        if not docs:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), INGEST_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            scored = await _process(docs)
+            logger.info(f"Ingest worker {worker_id} scored {scored}/{len(docs)} applications")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            for doc in docs:
+                await _fail(doc, e)
+
+
+def start_ingest_workers(count: int = INGEST_WORKERS) -> None:
+    global _wakeup
+    if _workers:
+        return
+    _wakeup = asyncio.Event()
+    for i in range(count):
+        _workers.append(asyncio.create_task(_worker_loop(i)))
+    logger.info(f"Started {count} ingest workers.")
+
+
+async def stop_ingest_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    shutdown_pdf_pool()
+    logger.info("Ingest workers stopped.")
@@ -0,0 +1,123 @@
+# app/interview_session.py
+"""
+Incremental scoring of a voice interview while it is running.
+
+The interview client streams every message over a WebSocket as it is spoken.
+An InterviewSession groups the messages into turns: an interviewer question
+plus the candidate's answer, which may arrive in several messages. A turn is
+complete when the interviewer speaks again or the interview ends. It is then
+scored on its own in the background (app.transcript_scorer.score_turn) while
+the interview goes on, so:
+
+    - every prompt holds a single exchange, however long the interview gets;
+    - the running score is known after each turn;
+    - at the end only the last turn is still outstanding, so the final
+      technical_score is available almost immediately.
+
+The technical score is the mean over turns the model judged technical, so
+greetings and small talk do not drag it down.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.result_cache import normalize_text
+from app.transcript_scorer import score_turn
+
+logger = logging.getLogger(__name__)
+
+INTERVIEWER_ROLE = "assistant"
+
+
+class InterviewSession:
+    def __init__(self, on_turn_scored: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
+        """
+        Args:
+            on_turn_scored: Awaited with each turn's result and the running score once the turn is scored
+        """
+        self.on_turn_scored = on_turn_scored
+        self.turns: List[Dict[str, Any]] = []
+        self._question: List[str] = []
+        self._answer: List[str] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add_message(self, role: str, content: str) -> None:
+        """Append one transcript message; starts scoring the previous turn when a new question begins."""
+        content = normalize_text(content)
+        if not content:
+            return
+        if role.strip().lower() == INTERVIEWER_ROLE:
+            if self._answer:
+                self._close_turn()
+            self._question.append(content)
+        else:
+            self._answer.append(content)
+
+    def _close_turn(self) -> None:
+        turn = {
+            "turn": len(self.turns),
+            "question": " ".join(self._question),
+            "answer": " ".join(self._answer),
+            "technical": None,
+            "score": None,
+            "feedback": None,
+            "error": None,
+        }
+        self._question, self._answer = [], []
+        self.turns.append(turn)
+        self._tasks.append(asyncio.create_task(self._score(turn)))
+
+    async def _score(self, turn: Dict[str, Any]) -> None:
+        try:
+            result = await score_turn(turn["question"], turn["answer"])
+            turn.update(technical=result["technical"], score=result["score"], feedback=result["feedback"], error=None)
+        except Exception as e:
+            logger.error(f"Failed to score interview turn {turn['turn']}: {e}")
+            turn["error"] = str(e)
+        if self.on_turn_scored is not None:
+            try:
+                await self.on_turn_scored({**self._turn_result(turn), "running_score": self.running_score()})
+            except Exception as e:
+                logger.warning(f"Could not report score of interview turn {turn['turn']}: {e}")
+
+    def _turn_result(self, turn: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "turn": turn["turn"],
+            "question": turn["question"],
+            "technical": turn["technical"],
+            "score": turn["score"],
+            "feedback": turn["feedback"],
+            "error": turn["error"],
+        }
+
+    def running_score(self) -> Optional[float]:
+        """Mean score of the technical turns scored so far, or None before the first one."""
+        scores = [turn["score"] for turn in self.turns if turn["technical"] and turn["score"] is not None]
+        return round(sum(scores) / len(scores), 2) if scores else None
+
+    async def finish(self) -> Dict[str, Any]:
+        """
+        Close the last turn, wait for outstanding scores and retry failed ones once.
+
+        Returns:
+            Dict[str, Any]: "score" (the technical score, 0 when no technical turn was scored),
+                "feedback" (one line per technical turn) and "turns"
+        """
+        if self._answer:
+            self._close_turn()
+        await asyncio.gather(*self._tasks)
+        failed = [turn for turn in self.turns if turn["error"]]
+        if failed:
+            self._tasks = [asyncio.create_task(self._score(turn)) for turn in failed]
+            await asyncio.gather(*self._tasks)
+
+        score = self.running_score()
+        return {
+            "score": score if score is not None else 0,
+            "feedback": [turn["feedback"] for turn in self.turns if turn["technical"] and turn["feedback"]],
+            "turns": [self._turn_result(turn) for turn in self.turns],
+        }
+
+    def cancel(self) -> None:
+        """Stop scoring, e.g. when the client disconnects before the interview ended."""
+        for task in self._tasks:
+            task.cancel()
@@ -0,0 +1,202 @@
+# app/job_pipeline.py
+"""
+Background preparation of newly created jobs.
+
+create_job inserts the job as `preparing` and returns straight away; a worker
+then draws its questions from the question bank, compiles its scoring profile,
+opens it and only then schedules its workflow, so HR never waits on Gemini and
+a job that never opens has no phases. Each job
+document carries its own stage state, like job_user does for ingestion:
+    job_status               preparing -> open, or failed after the last retry
+    prepare_attempts         number of times a worker has claimed the job
+    prepare_next_attempt_at  earliest time a preparing job may be claimed
+    prepare_lease_until      a claimed job whose lease has expired is reclaimed,
+                             so jobs left preparing by a restart resume at startup;
+                             after JOB_PREPARE_MAX_ATTEMPTS it is failed instead
+    prepare_error            last failure, if any
+
+Jobs created before the pipeline existed have no job_status and count as open.
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from pymongo import ReturnDocument
+from db import job_collection
+from app.question_bank import draw_questions, normalize_topics
+from app.resume_parser import flatten_requirements
+from app.scheduler import schedule_workflow, cancel_workflow
+from app.scorer import get_job_profile
+
+logger = logging.getLogger(__name__)
+
+JOB_PREPARE_WORKERS = int(os.getenv("JOB_PREPARE_WORKERS", 2))
+JOB_PREPARE_MAX_ATTEMPTS = int(os.getenv("JOB_PREPARE_MAX_ATTEMPTS", 5))
+JOB_PREPARE_LEASE_SECONDS = float(os.getenv("JOB_PREPARE_LEASE_SECONDS", 300))
+JOB_PREPARE_RETRY_BASE_SECONDS = float(os.getenv("JOB_PREPARE_RETRY_BASE_SECONDS", 10))
+JOB_PREPARE_POLL_SECONDS = float(os.getenv("JOB_PREPARE_POLL_SECONDS", 5))
+
+PREPARING = "preparing"
+OPEN = "open"
+FAILED = "failed"
+
+_workers: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+
+
+def preparing_fields() -> Dict[str, Any]:
+    """Stage fields for a freshly created job."""
+    return {
+        "job_status": PREPARING,
+        "job_questions": [],
+        "prepare_attempts": 0,
+        "prepare_next_attempt_at": datetime.utcnow(),
+        "prepare_error": None,
+    }
+
+
+def workflow_timings(start: datetime) -> Dict[str, datetime]:
+    """Phase transitions of a job's workflow, relative to when it opens."""
+    return {
+        "resume_start": start + timedelta(minutes=0),
+        "resume_end": start + timedelta(minutes=2),
+        "coding_start": start + timedelta(minutes=3),
+        "coding_end": start + timedelta(minutes=8),
+        "interview_start": start + timedelta(minutes=9),
+    }
+
+
+def notify_job_preparers() -> None:
+    """Wake idle workers so a new job does not wait for the next poll."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def _claim() -> Optional[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return await job_collection.find_one_and_update(
+        {"job_status": PREPARING, "$or": [
+            {"prepare_lease_until": {"$exists": False}, "prepare_next_attempt_at": {"$lte": now}},
+            {"prepare_lease_until": {"$lt": now}, "prepare_attempts": {"$lt": JOB_PREPARE_MAX_ATTEMPTS}},
+        ]},
+        {
+            "$set": {"prepare_lease_until": now + timedelta(seconds=JOB_PREPARE_LEASE_SECONDS)},
+            "$inc": {"prepare_attempts": 1},
+        },
+        projection={"job_des": 1, "problem_statements": 1, "prepare_attempts": 1},
+        sort=[("prepare_next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _fail_expired() -> int:
+    """Fail preparing jobs whose lease expired on their last attempt."""
+    result = await job_collection.update_many(
+        {
+            "job_status": PREPARING,
+            "prepare_lease_until": {"$lt": datetime.utcnow()},
+            "prepare_attempts": {"$gte": JOB_PREPARE_MAX_ATTEMPTS},
+        },
+        {
+            "$set": {"job_status": FAILED, "prepare_error": "Lease expired on the last attempt"},
+            "$unset": {"prepare_lease_until": ""},
+        }
+    )
+    if result.modified_count:
+        logger.error(f"Failed {result.modified_count} jobs whose last preparation lease expired")
+    return result.modified_count
+
+
+async def _process(doc: Dict[str, Any]) -> None:
+    labels = doc.get("problem_statements") or []
+    job_questions = await draw_questions(labels) if normalize_topics(labels) else []
+
+    # Compile the scoring profile now rather than on the first application
+    get_job_profile(flatten_requirements(doc.get("job_des")))
+
+    opened = await job_collection.update_one(
+        {"_id": doc["_id"], "job_status": PREPARING},
+        {
+            "$set": {
+                "job_questions": job_questions,
+                "job_status": OPEN,
+                "prepare_error": None,
+                "opened_at": datetime.utcnow(),
+            },
+            "$unset": {"prepare_lease_until": "", "prepare_next_attempt_at": ""},
+        }
+    )
+    if not opened.matched_count:
+        return
+
+    job_id = str(doc["_id"])
+    try:
+        await schedule_workflow(job_id, workflow_timings(datetime.now()))
+    except Exception:
+        # Back to preparing without any phase, so the retry or final failure applies to a closed job
+        await cancel_workflow(job_id)
+        await job_collection.update_one(
+            {"_id": doc["_id"]}, {"$set": {"job_status": PREPARING}, "$unset": {"opened_at": ""}}
+        )
+        raise
+
+
+async def _fail(doc: Dict[str, Any], error: Exception) -> None:
+    attempts = doc.get("prepare_attempts", 1)
+    now = datetime.utcnow()
+    if attempts >= JOB_PREPARE_MAX_ATTEMPTS:
+        update = {"job_status": FAILED, "prepare_error": str(error)}
+        logger.error(f"Job {doc['_id']} failed preparation after {attempts} attempts: {error}")
+    else:
+        delay = JOB_PREPARE_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+        update = {"prepare_error": str(error), "prepare_next_attempt_at": now + timedelta(seconds=delay)}
+        logger.warning(f"Job {doc['_id']} preparation failed (attempt {attempts}), retrying in {delay}s: {error}")
+    await job_collection.update_one({"_id": doc["_id"]}, {"$set": update, "$unset": {"prepare_lease_until": ""}})
+
+
+async def _worker_loop(worker_id: int) -> None:
+    logger.info(f"Job preparation worker {worker_id} started.")
+    while True:
+        try:
+            await _fail_expired()
+            doc = await _claim()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job preparation worker {worker_id} failed to claim work: {e}")
+            doc = None
+
+        if doc is None:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), JOB_PREPARE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            await _process(doc)
+            logger.info(f"Job preparation worker {worker_id} opened job {doc['_id']}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await _fail(doc, e)
+
+
+def start_job_preparers(count: int = JOB_PREPARE_WORKERS) -> None:
+    global _wakeup
+    if _workers:
+        return
+    _wakeup = asyncio.Event()
+    for i in range(count):
+        _workers.append(asyncio.create_task(_worker_loop(i)))
+    logger.info(f"Started {count} job preparation workers.")
+
+
+async def stop_job_preparers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    logger.info("Job preparation workers stopped.")
@@ -0,0 +1,78 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Optional
+from app.model_registry import registry, get_gemini_model, gemini_api_endpoint, GEMINI
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+
+# Created on first use so it binds to the event loop uvicorn is running
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+async def _generate(prompt: str, **kwargs: Any):
+    # The client is created on first use (see app.model_registry); keep that off the event loop
+    model = get_gemini_model() if registry.is_loaded(GEMINI) else await asyncio.to_thread(get_gemini_model)
+    if gemini_api_endpoint():
+        # The REST transport has no async client; run the blocking call in a thread
+        return await asyncio.to_thread(model.generate_content, prompt, **kwargs)
+    return await model.generate_content_async(prompt, **kwargs)
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def generate_text(prompt: str, timeout: Optional[float] = None, **kwargs: Any) -> str:
+    """
+    Run a Gemini prompt without blocking the event loop.
+
+    At most LLM_MAX_CONCURRENCY calls are in flight per process; the rest wait
+    for a slot. The call is cancelled if it exceeds the timeout or if the
+    awaiting request is cancelled.
+
+    Args:
+        prompt (str): The prompt to send
+        timeout (Optional[float]): Seconds to wait for the response (default LLM_TIMEOUT_SECONDS)
+        **kwargs: Extra arguments forwarded to generate_content_async (e.g. generation_config)
+
+    Returns:
+        str: The text of the model response
+    """
+    timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+    async with _get_semaphore():
+        try:
+            response = await asyncio.wait_for(_generate(prompt, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Gemini call timed out after {timeout}s")
+            raise
+
+    if not response or not response.text:
+        raise ValueError("Empty response from Gemini API")
+    return response.text
+
+
+def parse_json_response(text: str, opener: str = "{") -> Any:
+    """
+    Parse a JSON document from a model response, tolerating surrounding prose or code fences.
+
+    Args:
+        text (str): Raw response text
+        opener (str): "{" for an object or "[" for an array
+
+    Returns:
+        Any: The decoded JSON value
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        closer = "}" if opener == "{" else "]"
+        json_str = text[text.find(opener):text.rfind(closer) + 1]
+        return json.loads(json_str)
@@ -0,0 +1,33 @@
+# app/migrations.py
+import asyncio
+import logging
+from datetime import datetime
+from db import job_collection
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate_close_dates() -> int:
+    """
+    Convert job close_date values stored as ISO strings into real datetimes.
+
+    Returns:
+        int: Number of jobs updated
+    """
+    updated = 0
+    cursor = job_collection.find({"close_date": {"$type": "string"}}, {"close_date": 1})
+    async for doc in cursor:
+        try:
+            close_date = datetime.fromisoformat(doc["close_date"])
+        except ValueError:
+            logger.warning(f"Skipping job {doc['_id']} with unparseable close_date {doc['close_date']!r}")
+            continue
+        await job_collection.update_one({"_id": doc["_id"]}, {"$set": {"close_date": close_date}})
+        updated += 1
+    logger.info(f"Converted close_date to datetime on {updated} jobs")
+    return updated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate_close_dates())
@@ -0,0 +1,158 @@
+# app/model_registry.py
+"""
+Lazily initialised, process-wide models.
+
+Nothing heavy happens at import: the Gemini client (google.generativeai and its
+configuration) and the sentence-transformers embedding model are created the
+first time something asks for them, exactly once per process even under
+concurrent first use. Importing any app module therefore needs neither a
+GEMINI_API key nor torch.
+
+The API warms the models up in the background after startup (MODEL_WARMUP),
+so the first request does not pay for the load, and records how long each
+startup step and each load took for the startup report.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+# Comma-separated models to load in the background once the API is up
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "gemini,embedding")
+
+GEMINI = "gemini"
+EMBEDDING = "embedding"
+
+
+def gemini_api_endpoint() -> Optional[str]:
+    """Alternative API host (e.g. app/fake_gemini.py in tests), reached over REST; read at load time like the key."""
+    return os.getenv("GEMINI_API_ENDPOINT")
+
+
+def _load_gemini() -> Any:
+    api_key = os.getenv("GEMINI_API")
+    if not api_key:
+        raise ValueError("GEMINI_API key not found in environment variables")
+    import google.generativeai as genai
+
+    endpoint = gemini_api_endpoint()
+    if endpoint:
+        genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+    else:
+        genai.configure(api_key=api_key)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+def _load_embedding() -> Any:
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+class ModelRegistry:
+    """Named lazy singletons with per-model locks and load timings."""
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._locks[name]:
+            if name not in self._models:
+                started = time.perf_counter()
+                try:
+                    self._models[name] = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._load_seconds[name] = time.perf_counter() - started
+                self._errors.pop(name, None)
+                logger.info(f"Loaded model '{name}' in {self._load_seconds[name]:.2f}s")
+            return self._models[name]
+
+    def reset(self, name: str) -> None:
+        """Forget a loaded model so the next get() loads it again with the current configuration."""
+        with self._locks[name]:
+            self._models.pop(name, None)
+            self._load_seconds.pop(name, None)
+            self._errors.pop(name, None)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "loaded": name in self._models,
+                "load_seconds": round(self._load_seconds[name], 3) if name in self._load_seconds else None,
+                "error": self._errors.get(name),
+            }
+            for name in self._loaders
+        }
+
+
+registry = ModelRegistry()
+registry.register(GEMINI, _load_gemini)
+registry.register(EMBEDDING, _load_embedding)
+
+
+def get_gemini_model() -> Any:
+    return registry.get(GEMINI)
+
+
+def get_embedding_model() -> Any:
+    return registry.get(EMBEDDING)
+
+
+# ------------------ Warm-up and startup report ------------------
+
+_startup_steps: Dict[str, float] = {}
+_warmup: Optional[asyncio.Task] = None
+
+
+def record_startup_step(name: str, seconds: float) -> None:
+    _startup_steps[name] = seconds
+
+
+def startup_report() -> Dict[str, Any]:
+    return {
+        "steps": {name: round(seconds, 3) for name, seconds in _startup_steps.items()},
+        "models": registry.status(),
+    }
+
+
+async def _warm_up(names: List[str]) -> None:
+    # Yield first so the server finishes starting and accepts traffic before any load begins
+    await asyncio.sleep(0)
+    for name in names:
+        try:
+            await asyncio.to_thread(registry.get, name)
+        except Exception as e:
+            logger.error(f"Warm-up of model '{name}' failed: {e}")
+    logger.info(f"Startup report: {startup_report()}")
+
+
+def start_model_warmup() -> None:
+    global _warmup
+    names = [name.strip() for name in MODEL_WARMUP.split(",") if name.strip()]
+    if _warmup is None and names:
+        _warmup = asyncio.create_task(_warm_up(names))
@@ -0,0 +1,247 @@
+# app/outbox.py
+"""
+Durable outbox for candidate notifications.
+
+Selection writes one record per (job, stage, candidate) into the
+notification_outbox collection, keyed by that triple so re-running a selection
+never queues a second email. An independent dispatcher drains the outbox in
+batches: it claims records with a lease, sends them over the SMTP pool and
+records the outcome, retrying failures with exponential backoff.
+
+Delivery is at-least-once: a worker that dies after the SMTP server accepted a
+message but before marking the record sent will have it re-sent once its lease
+expires. Everything else (crashes mid-batch, restarts, retries) is exactly-once.
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from db import job_user_collection, user_collection, notification_outbox_collection
+from app.email_sender import smtp_pool, build_status_update_email
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 200))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 6))
+OUTBOX_RETRY_BASE_SECONDS = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", 30))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", 600))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", 10))
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+NO_EMAIL_ERROR = "No email address"
+
+CODING_ROUND = "coding_round"
+HR_ROUND = "hr_round"
+
+# Every stage currently sends the "selected for the next round" email
+STAGE_TEMPLATES = {
+    CODING_ROUND: build_status_update_email,
+    HR_ROUND: build_status_update_email,
+}
+
+_dispatcher: Optional[asyncio.Task] = None
+_wakeup: Optional[asyncio.Event] = None
+
+_metrics: Dict[str, Any] = {
+    "sent": 0,
+    "failed": 0,
+    "retried": 0,
+    "batches": 0,
+    "last_batch": None,
+}
+
+
+async def enqueue_stage_notifications(job_id: ObjectId, stage: str, match: Dict[str, Any]) -> None:
+    """
+    Queue a notification for every job_user document matching `match`.
+
+    Runs as a single server-side aggregation with $merge, so no candidate list
+    is materialised in the API process. The record _id "<job_id>:<stage>:<user_id>"
+    is the idempotency key: existing records are left untouched.
+    """
+    pipeline = [
+        {"$match": match},
+        {"$project": {
+            "_id": {"$concat": [str(job_id), ":", stage, ":", {"$toString": "$user_id"}]},
+            "job_id": "$job_id",
+            "user_id": "$user_id",
+            "stage": {"$literal": stage},
+            "state": {"$literal": PENDING},
+            "attempts": {"$literal": 0},
+            "next_attempt_at": "$$NOW",
+            "created_at": "$$NOW",
+        }},
+        {"$merge": {
+            "into": notification_outbox_collection.name,
+            "on": "_id",
+            "whenMatched": "keepExisting",
+            "whenNotMatched": "insert",
+        }},
+    ]
+    await job_user_collection.aggregate(pipeline).to_list(length=None)
+
+
+async def _claim_batch() -> List[Dict[str, Any]]:
+    now = datetime.utcnow()
+    claimable = {"$or": [
+        {"state": PENDING, "next_attempt_at": {"$lte": now}},
+        {"state": SENDING, "lease_until": {"$lt": now}},
+    ]}
+    candidates = await notification_outbox_collection.find(claimable, {"_id": 1}) \
+        .sort("next_attempt_at", 1).limit(OUTBOX_BATCH_SIZE).to_list(length=OUTBOX_BATCH_SIZE)
+    if not candidates:
+        return []
+
+    # Re-check claimability in the update so concurrent dispatchers never share a record
+    token = uuid.uuid4().hex
+    await notification_outbox_collection.update_many(
+        {"$and": [{"_id": {"$in": [doc["_id"] for doc in candidates]}}, claimable]},
+        {"$set": {
+            "state": SENDING,
+            "claim_token": token,
+            "lease_until": now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+        }}
+    )
+    return await notification_outbox_collection.find({"claim_token": token, "state": SENDING}) \
+        .to_list(length=OUTBOX_BATCH_SIZE)
+
+
+async def _deliver(record: Dict[str, Any], email: Optional[str]) -> Optional[str]:
+    """Send one record; returns None on success or the error message."""
+    if not email:
+        return NO_EMAIL_ERROR
+    template = STAGE_TEMPLATES.get(record["stage"], build_status_update_email)
+    try:
+        await smtp_pool.send_with_retry(template(email))
+        return None
+    except Exception as e:
+        return str(e) or type(e).__name__
+
+
+async def drain_batch() -> int:
+    """
+    Claim and deliver one batch of due notifications.
+
+    Returns:
+        int: Number of records processed
+    """
+    records = await _claim_batch()
+    if not records:
+        return 0
+
+    started = time.monotonic()
+    user_ids = list({record["user_id"] for record in records})
+    emails = {
+        user["_id"]: user.get("email")
+        async for user in user_collection.find({"_id": {"$in": user_ids}}, {"email": 1})
+    }
+
+    errors = await asyncio.gather(*(_deliver(record, emails.get(record["user_id"])) for record in records))
+
+    now = datetime.utcnow()
+    operations = []
+    sent = failed = retried = 0
+    for record, error in zip(records, errors):
+        attempts = record.get("attempts", 0) + 1
+        if error is None:
+            sent += 1
+            update = {"$set": {"state": SENT, "sent_at": now, "attempts": attempts, "error": None}}
+        elif attempts >= OUTBOX_MAX_ATTEMPTS or error == NO_EMAIL_ERROR:
+            failed += 1
+            update = {"$set": {"state": FAILED, "attempts": attempts, "error": error}}
+            logger.error(f"Notification {record['_id']} failed permanently: {error}")
+        else:
+            retried += 1
+            delay = OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+            update = {"$set": {
+                "state": PENDING,
+                "attempts": attempts,
+                "error": error,
+                "next_attempt_at": now + timedelta(seconds=delay),
+            }}
+        update["$unset"] = {"claim_token": "", "lease_until": ""}
+        operations.append(UpdateOne({"_id": record["_id"], "claim_token": record["claim_token"]}, update))
+
+    await notification_outbox_collection.bulk_write(operations, ordered=False)
+
+    elapsed = time.monotonic() - started
+    _metrics["sent"] += sent
+    _metrics["failed"] += failed
+    _metrics["retried"] += retried
+    _metrics["batches"] += 1
+    _metrics["last_batch"] = {
+        "size": len(records),
+        "sent": sent,
+        "failed": failed,
+        "retried": retried,
+        "seconds": round(elapsed, 3),
+        "per_second": round(len(records) / elapsed, 1) if elapsed else None,
+        "finished_at": now,
+    }
+    logger.info(f"Outbox batch delivered: {_metrics['last_batch']}")
+    return len(records)
+
+
+async def outbox_stats() -> Dict[str, Any]:
+    """Dispatcher counters for this process plus the outbox backlog by state."""
+    backlog = {
+        doc["_id"]: doc["count"]
+        async for doc in notification_outbox_collection.aggregate([
+            {"$group": {"_id": "$state", "count": {"$sum": 1}}}
+        ])
+    }
+    return {**_metrics, "backlog": backlog}
+
+
+def wake_outbox_dispatcher() -> None:
+    """Start draining now instead of at the next poll."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def _dispatch_loop() -> None:
+    logger.info("Outbox dispatcher started.")
+    while True:
+        try:
+            processed = await drain_batch()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Outbox dispatcher error: {e}")
+            processed = 0
+
+        if processed:
+            continue
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), OUTBOX_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_outbox_dispatcher() -> None:
+    global _dispatcher, _wakeup
+    if _dispatcher is not None:
+        return
+    _wakeup = asyncio.Event()
+    _dispatcher = asyncio.create_task(_dispatch_loop())
+
+
+async def stop_outbox_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is None:
+        return
+    _dispatcher.cancel()
+    await asyncio.gather(_dispatcher, return_exceptions=True)
+    _dispatcher = None
+    await smtp_pool.close()
+    logger.info("Outbox dispatcher stopped.")
@@ -0,0 +1,158 @@
+# app/pagination.py
+import os
+import json
+import base64
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from bson import json_util
+from fastapi import HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 1000))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class PageParams:
+    limit: Optional[int]
+    cursor: Optional[str]
+    sort: str
+    fields: Optional[List[str]]
+    format: str
+
+
+def page_params(
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+        sort: str = Query("_id", description="Sort field, prefix with '-' for descending"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+        format: str = Query("json", pattern="^(json|ndjson)$", description="json page or ndjson stream")
+) -> PageParams:
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    return PageParams(limit=limit, cursor=cursor, sort=sort, fields=field_list, format=format)
+
+
+def parse_sort(sort: str, allowed: Iterable[str]) -> Tuple[str, int]:
+    direction = -1 if sort.startswith("-") else 1
+    field = sort.lstrip("-+")
+    if field not in allowed:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{field}'. Allowed: {sorted(allowed)}")
+    return field, direction
+
+
+def build_projection(
+        fields: Optional[List[str]],
+        sort_field: str,
+        hidden: Iterable[str] = (),
+        default_exclude: Iterable[str] = ()
+) -> Dict[str, int]:
+    """
+    Build a Mongo projection for a list route.
+
+    Hidden fields are never returned. Without an explicit field list the
+    default_exclude fields (large blobs) are left out as well.
+    """
+    hidden = set(hidden)
+    if fields:
+        projection = {field: 1 for field in fields if field not in hidden}
+        projection[sort_field] = 1
+        projection["_id"] = 1
+        return projection
+    return {field: 0 for field in hidden | set(default_exclude)}
+
+
+def encode_cursor(doc: Dict[str, Any], sort_field: str) -> str:
+    payload = {"id": doc["_id"]}
+    if sort_field != "_id":
+        payload["v"] = doc.get(sort_field)
+    raw = json_util.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        return json_util.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(sort_field: str, direction: int, cursor: Dict[str, Any]) -> Dict[str, Any]:
+    """Filter selecting documents strictly after the cursor in (sort_field, _id) order."""
+    after = "$gt" if direction == 1 else "$lt"
+    last_id = cursor["id"]
+    if sort_field == "_id":
+        return {"_id": {after: last_id}}
+
+    value = cursor.get("v")
+    if value is None:
+        # Missing values sort first ascending and last descending
+        same_value = {sort_field: None, "_id": {after: last_id}}
+        if direction == 1:
+            return {"$or": [same_value, {sort_field: {"$ne": None}}]}
+        return same_value
+
+    clauses = [
+        {sort_field: {after: value}},
+        {sort_field: value, "_id": {after: last_id}},
+    ]
+    if direction == -1:
+        clauses.append({sort_field: None})
+    return {"$or": clauses}
+
+
+async def paginated_response(
+        collection,
+        base_filter: Dict[str, Any],
+        page: PageParams,
+        serialize: Callable[[Dict[str, Any]], Dict[str, Any]],
+        sortable: Iterable[str] = ("_id",),
+        hidden: Iterable[str] = (),
+        default_exclude: Iterable[str] = ()
+):
+    """
+    Run a keyset-paginated, projected query and build the HTTP response.
+
+    In json mode a request without limit or cursor gets every matching document,
+    as before pagination existed. Otherwise one page (limit, or DEFAULT_PAGE_SIZE
+    when only a cursor is given) is returned as a list, with the cursor for the
+    next page in the X-Next-Cursor header. In ndjson mode documents are streamed
+    one per line straight from the Mongo cursor, unbounded unless a limit is given.
+    """
+    sort_field, direction = parse_sort(page.sort, sortable)
+    query = dict(base_filter)
+    if page.cursor:
+        query = {"$and": [base_filter, keyset_filter(sort_field, direction, decode_cursor(page.cursor))]}
+
+    projection = build_projection(page.fields, sort_field, hidden, default_exclude)
+    sort_spec = [(sort_field, direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+
+    if page.format == "ndjson":
+        cursor = collection.find(query, projection).sort(sort_spec)
+        if page.limit:
+            cursor = cursor.limit(page.limit)
+
+        async def stream():
+            async for doc in cursor:
+                yield json.dumps(jsonable_encoder(serialize(doc))) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    if not page.limit and not page.cursor:
+        docs = await collection.find(query, projection).sort(sort_spec).to_list(length=None)
+        return JSONResponse(content=jsonable_encoder([serialize(doc) for doc in docs]))
+
+    limit = page.limit or DEFAULT_PAGE_SIZE
+    # Fetch one extra document to learn whether another page exists
+    docs = await collection.find(query, projection).sort(sort_spec).limit(limit + 1).to_list(length=limit + 1)
+    headers = {}
+    if len(docs) > limit:
+        docs = docs[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1], sort_field)
+        headers["Access-Control-Expose-Headers"] = NEXT_CURSOR_HEADER
+
+    # The cursor must be built from raw values, so serialise afterwards
+    data = [serialize(doc) for doc in docs]
+    return JSONResponse(content=jsonable_encoder(data), headers=headers)
@@ -0,0 +1,218 @@
+# app/pdf_extractor.py
+"""
+Resume PDF text extraction in a process pool.
+
+Extraction is CPU-bound pure Python, so it runs in worker processes rather than
+on the event loop. pypdf is tried first as a fast path; pdfplumber, slower but
+better on multi-column and table-heavy layouts, is only used when the fast path
+is unavailable or yields too little text.
+"""
+import os
+import io
+import time
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+try:
+    import pypdf
+except ImportError:  # optional fast path
+    pypdf = None
+
+logger = logging.getLogger(__name__)
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 2))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 20))
+PDF_TIME_BUDGET_SECONDS = float(os.getenv("PDF_TIME_BUDGET_SECONDS", 10))
+# Below this many characters per page the fast path is assumed to have missed text
+PDF_MIN_CHARS_PER_PAGE = int(os.getenv("PDF_MIN_CHARS_PER_PAGE", 200))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class PdfParseError(ValueError):
+    """The file is not a PDF either engine can read; retrying will not help."""
+
+
+def looks_like_pdf(file_bytes: bytes) -> bool:
+    """Whether the file starts with a PDF header (allowed anywhere in the first 1 KB)."""
+    return b"%PDF-" in file_bytes[:1024]
+
+
+def _extract_pages(pages, page_count: int, engine: str, deadline: float, max_pages: int) -> Dict[str, Any]:
+    texts: List[str] = []
+    page_timings_ms: List[float] = []
+    truncated = page_count > max_pages
+    for i, page in enumerate(pages):
+        if i >= max_pages:
+            break
+        if time.perf_counter() > deadline:
+            truncated = True
+            break
+        started = time.perf_counter()
+        texts.append(page.extract_text() or "")
+        page_timings_ms.append(round((time.perf_counter() - started) * 1000, 2))
+    return {
+        "text": "\n".join(texts),
+        "engine": engine,
+        "pages_total": page_count,
+        "pages_extracted": len(texts),
+        "truncated": truncated,
+        "page_timings_ms": page_timings_ms,
+    }
+
+
+def _extract_with_pypdf(file_bytes: bytes, deadline: float, max_pages: int) -> Dict[str, Any]:
+    reader = pypdf.PdfReader(io.BytesIO(file_bytes))
+    return _extract_pages(reader.pages, len(reader.pages), "pypdf", deadline, max_pages)
+
+
+def _extract_with_pdfplumber(file_bytes: bytes, deadline: float, max_pages: int) -> Dict[str, Any]:
+    # Imported here: only the fallback path in the worker processes needs it
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        return _extract_pages(pdf.pages, len(pdf.pages), "pdfplumber", deadline, max_pages)
+
+
+def extract_pdf_text(
+        file_bytes: bytes,
+        max_pages: int = PDF_MAX_PAGES,
+        time_budget: float = PDF_TIME_BUDGET_SECONDS
+) -> Dict[str, Any]:
+    """
+    Extract text from a PDF within a page cap and time budget.
+
+    Runs in a worker process, so it must stay a picklable top-level function.
+
+    Args:
+        file_bytes: Raw PDF content
+        max_pages: Pages beyond this are ignored
+        time_budget: Seconds after which remaining pages are skipped
+
+    Returns:
+        Dict[str, Any]: text, engine used, page counts, whether the output was
+        truncated, total elapsed_ms and per-page page_timings_ms
+
+    Raises:
+        PdfParseError: If neither engine can parse the file
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    result = None
+
+    if pypdf is not None:
+        try:
+            result = _extract_with_pypdf(file_bytes, deadline, max_pages)
+            chars_per_page = len(result["text"].strip()) / max(1, result["pages_extracted"])
+            if chars_per_page < PDF_MIN_CHARS_PER_PAGE and time.perf_counter() < deadline:
+                result = None
+        except Exception:
+            result = None
+
+    if result is None:
+        try:
+            result = _extract_with_pdfplumber(file_bytes, deadline, max_pages)
+        except Exception as e:
+            raise PdfParseError(f"Could not parse PDF: {e}")
+
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def count_pdf_pages(file_bytes: bytes) -> int:
+    """
+    Number of pages, read from the document structure without extracting any text.
+
+    Runs in a worker process, like extract_pdf_text.
+
+    Raises:
+        PdfParseError: If the file has no PDF header or cannot be parsed
+    """
+    if not looks_like_pdf(file_bytes):
+        raise PdfParseError("Missing PDF header")
+    try:
+        if pypdf is not None:
+            return len(pypdf.PdfReader(io.BytesIO(file_bytes)).pages)
+        import pdfplumber
+
+        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+            return len(pdf.pages)
+    except Exception as e:
+        raise PdfParseError(f"Could not parse PDF: {e}")
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Kill a pool's workers and drop it so the next call starts a fresh one.
+
+    shutdown() alone waits for running tasks, so a worker stuck inside one page
+    would keep its slot forever. Other extractions in flight on the same pool fail
+    with BrokenProcessPool; the ingest queue retries them.
+    """
+    global _pool
+    if _pool is pool:
+        _pool = None
+    # Captured before shutdown(), which clears the executor's process table
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+async def _run_in_pool(fn, file_bytes: bytes, timeout: float):
+    pool = _get_pool()
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(pool, fn, file_bytes), timeout)
+    except (asyncio.TimeoutError, BrokenProcessPool) as e:
+        logger.warning(f"PDF pool {'timed out' if isinstance(e, asyncio.TimeoutError) else 'broke'}, starting a new one")
+        _discard_pool(pool)
+        raise
+
+
+async def extract_pdf_text_async(file_bytes: bytes) -> Dict[str, Any]:
+    """
+    Extract PDF text in the process pool without blocking the event loop.
+
+    The worker enforces PDF_TIME_BUDGET_SECONDS between pages; the await is also
+    bounded so a single pathological page cannot hold the caller forever. On that
+    timeout, or if a worker dies, the pool is killed and replaced.
+    """
+    result = await _run_in_pool(extract_pdf_text, file_bytes, PDF_TIME_BUDGET_SECONDS * 3)
+    logger.info(
+        f"Extracted {result['pages_extracted']}/{result['pages_total']} pages with {result['engine']} "
+        f"in {result['elapsed_ms']}ms{' (truncated)' if result['truncated'] else ''}"
+    )
+    logger.debug(f"Per-page extraction timings (ms): {result['page_timings_ms']}")
+    return result
+
+
+async def count_pdf_pages_async(file_bytes: bytes) -> int:
+    """
+    Cheap upload-time check: the page count, in the process pool.
+
+    Files without a PDF header are rejected without touching the pool.
+
+    Raises:
+        PdfParseError: If the file is not a readable PDF
+        asyncio.TimeoutError: If counting takes longer than PDF_TIME_BUDGET_SECONDS
+    """
+    if not looks_like_pdf(file_bytes):
+        raise PdfParseError("Missing PDF header")
+    return await _run_in_pool(count_pdf_pages, file_bytes, PDF_TIME_BUDGET_SECONDS)
+
+
+def shutdown_pdf_pool() -> None:
+    if _pool is not None:
+        _discard_pool(_pool)
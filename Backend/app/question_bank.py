@@ -0,0 +1,185 @@
+# app/question_bank.py
+"""
+Persisted bank of generated interview questions, shared by jobs with the same stack.
+
+HR reuses the same topics ("Java, Spring Boot, React") across many postings, so
+questions are generated per topic set rather than per job. A topic set is the
+job's problem_statements lowercased, whitespace-collapsed, de-duplicated and
+sorted, so ["React", "java "] and ["Java", "react"] share one bank.
+
+Each question is its own document in question_bank, with the bank key and a
+`uses` counter:
+
+    - draw_questions() hands a new job the least-used questions of its bank,
+      which is a single indexed query, and bumps their counters;
+    - when fewer than QUESTION_BANK_LOW_WATER questions remain unused, a
+      background task generates another batch, until the bank holds
+      QUESTION_BANK_MAX_SIZE questions;
+    - only a topic set seen for the first time waits for Gemini, and concurrent
+      jobs for the same new set share that one generation.
+
+New questions that are near-duplicates (rapidfuzz token_sort_ratio at or above
+QUESTION_BANK_DEDUP_THRESHOLD) of a question already in the bank, or earlier in
+the same batch, are dropped.
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+from pymongo import ASCENDING
+from rapidfuzz import fuzz, process
+from db import question_bank_collection
+from app.question_generator import generate_question_batch
+from app.result_cache import make_key, normalize_text
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS_PER_JOB = int(os.getenv("QUESTIONS_PER_JOB", 5))
+QUESTION_BANK_BATCH_SIZE = int(os.getenv("QUESTION_BANK_BATCH_SIZE", 10))
+# Refill in the background once fewer unused questions than this are left
+QUESTION_BANK_LOW_WATER = int(os.getenv("QUESTION_BANK_LOW_WATER", 10))
+QUESTION_BANK_MAX_SIZE = int(os.getenv("QUESTION_BANK_MAX_SIZE", 100))
+QUESTION_BANK_DEDUP_THRESHOLD = float(os.getenv("QUESTION_BANK_DEDUP_THRESHOLD", 90))
+# Existing questions listed in a refill prompt so the model avoids them
+QUESTION_BANK_AVOID_LIMIT = int(os.getenv("QUESTION_BANK_AVOID_LIMIT", 30))
+
+_refills: Dict[str, asyncio.Task] = {}
+# Serialises picking within a process so concurrent jobs get different questions
+_take_locks: Dict[str, asyncio.Lock] = {}
+_stats = {"draws": 0, "cold_generations": 0, "refills": 0, "duplicates_dropped": 0}
+
+
+def normalize_topics(labels: List[str]) -> List[str]:
+    return sorted({normalize_text(str(label)).lower() for label in labels or [] if normalize_text(str(label))})
+
+
+def bank_key(topics: List[str]) -> str:
+    return make_key("question-bank", topics)
+
+
+def dedupe_questions(
+        candidates: List[Dict[str, str]],
+        existing: List[str],
+        threshold: float = QUESTION_BANK_DEDUP_THRESHOLD
+) -> List[Dict[str, str]]:
+    """
+    Drop candidates that are near-duplicates of an existing question or of an earlier candidate.
+
+    Args:
+        candidates: Generated {"question", "answer"} pairs
+        existing: Question texts already in the bank
+        threshold: rapidfuzz token_sort_ratio (0-100) from which two questions count as the same
+
+    Returns:
+        List[Dict[str, str]]: The candidates to keep, in order
+    """
+    seen = [normalize_text(question).lower() for question in existing]
+    kept = []
+    for item in candidates:
+        text = normalize_text(item["question"]).lower()
+        if seen and process.extractOne(text, seen, scorer=fuzz.token_sort_ratio, score_cutoff=threshold):
+            continue
+        seen.append(text)
+        kept.append(item)
+    return kept
+
+
+async def _refill(key: str, topics: List[str]) -> int:
+    existing = [
+        doc["question"]
+        async for doc in question_bank_collection.find({"bank": key}, {"question": 1}).sort("_id", ASCENDING)
+    ]
+    if len(existing) >= QUESTION_BANK_MAX_SIZE:
+        return 0
+
+    generated = await generate_question_batch(
+        topics, count=QUESTION_BANK_BATCH_SIZE, avoid=existing[-QUESTION_BANK_AVOID_LIMIT:]
+    )
+    fresh = dedupe_questions(generated, existing)[:QUESTION_BANK_MAX_SIZE - len(existing)]
+    _stats["duplicates_dropped"] += len(generated) - len(fresh)
+    if fresh:
+        now = datetime.utcnow()
+        await question_bank_collection.insert_many([
+            {"bank": key, "topics": topics, "question": item["question"], "answer": item["answer"],
+             "uses": 0, "created_at": now}
+            for item in fresh
+        ])
+    logger.info(f"Added {len(fresh)}/{len(generated)} generated questions to bank {topics}")
+    return len(fresh)
+
+
+def _start_refill(key: str, topics: List[str]) -> asyncio.Task:
+    """One refill per bank at a time; later callers share the running one."""
+    task = _refills.get(key)
+    if task is None:
+        task = asyncio.create_task(_refill(key, topics))
+        _refills[key] = task
+        task.add_done_callback(lambda _: _refills.pop(key, None))
+    return task
+
+
+def _log_refill_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Question bank refill failed: {task.exception()}")
+
+
+async def _take(key: str, count: int) -> List[Dict[str, Any]]:
+    async with _take_locks.setdefault(key, asyncio.Lock()):
+        docs = await question_bank_collection.find(
+            {"bank": key}, {"question": 1, "answer": 1}
+        ).sort([("uses", ASCENDING), ("_id", ASCENDING)]).limit(count).to_list(length=count)
+        if docs:
+            await question_bank_collection.update_many(
+                {"_id": {"$in": [doc["_id"] for doc in docs]}}, {"$inc": {"uses": 1}}
+            )
+    return docs
+
+
+async def draw_questions(labels: List[str], count: int = QUESTIONS_PER_JOB) -> List[Dict[str, str]]:
+    """
+    Questions for a new job, drawn from the bank of its topic set.
+
+    Only a topic set without enough banked questions waits for generation; otherwise the
+    least-used questions are returned at once and the bank is refilled in the background
+    when it runs low.
+
+    Args:
+        labels: The job's topics (problem_statements)
+        count: Number of questions to return
+
+    Returns:
+        List[Dict[str, str]]: Dictionaries with 'question' and 'answer' keys
+
+    Raises:
+        ValueError: If labels is empty
+        RuntimeError: If the bank still holds fewer than count questions after filling it
+        Exception: Whatever question generation raised, when the bank had to be filled first
+    """
+    topics = normalize_topics(labels)
+    if not topics:
+        raise ValueError("Labels list cannot be empty.")
+    key = bank_key(topics)
+    _stats["draws"] += 1
+
+    size = await question_bank_collection.count_documents({"bank": key})
+    if size < count:
+        _stats["cold_generations"] += 1
+        await asyncio.shield(_start_refill(key, topics))
+        size = await question_bank_collection.count_documents({"bank": key})
+        if size < count:
+            # Generation came back short (e.g. mostly duplicates); let the caller retry
+            raise RuntimeError(f"Question bank has {size} of {count} questions for {', '.join(topics)}")
+
+    docs = await _take(key, count)
+
+    unused = await question_bank_collection.count_documents({"bank": key, "uses": 0})
+    if unused < QUESTION_BANK_LOW_WATER and size < QUESTION_BANK_MAX_SIZE and key not in _refills:
+        _stats["refills"] += 1
+        _start_refill(key, topics).add_done_callback(_log_refill_failure)
+
+    return [{"question": doc["question"], "answer": doc["answer"]} for doc in docs]
+
+
+def question_bank_stats() -> Dict[str, Any]:
+    return {**_stats, "refilling": len(_refills)}
@@ -1,82 +1,74 @@
-import os
 import json
+import asyncio
 import logging
-from typing import List, Dict, Any
-from dotenv import load_dotenv
-import google.generativeai as genai
+from typing import List, Dict, Optional
+from app.llm_client import generate_text, parse_json_response
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
 
-# Get API key
-GEMINI_API_KEY = os.getenv("GEMINI_API")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API key not found in environment variables")
-
-try:
-    # Configure Gemini API
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel("gemini-1.5-flash")
-except Exception as e:
-    logger.error(f"Failed to initialize Gemini API: {e}")
-    raise
-
-
-def generate_questions_with_answers(labels: List[str]) -> List[Dict[str, str]]:
+async def generate_question_batch(labels: List[str], count: int = 5, avoid: Optional[List[str]] = None) -> List[Dict[str, str]]:
     """
-    Generate 5 technical question-answer pairs based on provided labels.
+    Generate technical question-answer pairs, raising on any failure.
 
     Args:
         labels (List[str]): List of technical topics or skills
+        count (int): Number of pairs to ask for
+        avoid (Optional[List[str]]): Questions already known, which the model is asked not to repeat
 
     Returns:
-        List[Dict[str, str]]: A list of dictionaries with 'question' and 'answer' keys
+        List[Dict[str, str]]: Dictionaries with non-empty 'question' and 'answer' strings
     """
-    try:
-        if not labels:
-            raise ValueError("Labels list cannot be empty.")
+    if not labels:
+        raise ValueError("Labels list cannot be empty.")
 
-        prompt = (
-            f"Generate 5 technical interview question-answer pairs for these technologies: "
-            f"{', '.join(labels)}. Format the output strictly as a JSON array like this:\n"
-            f"""[
+    prompt = (
+        f"Generate {count} technical interview question-answer pairs for these technologies: "
+        f"{', '.join(labels)}. Format the output strictly as a JSON array like this:\n"
+        f"""[
   {{
     "question": "What is ...?",
     "answer": "..."
   }},
   ...
 ]"""
-        )
+    )
+    if avoid:
+        prompt += "\nDo not repeat or rephrase any of these questions:\n" + "\n".join(f"- {q}" for q in avoid)
 
-        response = model.generate_content(prompt)
+    response_text = await generate_text(prompt)
 
-        if not response or not response.text:
-            raise ValueError("Empty response from Gemini API")
+    result = parse_json_response(response_text, opener="[")
+    if not isinstance(result, list):
+        raise ValueError("Parsed response is not a list")
+    return [
+        {"question": str(item["question"]).strip(), "answer": str(item.get("answer") or "").strip()}
+        for item in result
+        if isinstance(item, dict) and str(item.get("question") or "").strip()
+    ]
 
-        try:
-            # Attempt direct JSON parse
-            result = json.loads(response.text)
-            if not isinstance(result, list):
-                raise ValueError("Parsed response is not a list")
-            return result
 
-        except json.JSONDecodeError:
-            # Try extracting JSON substring if needed
-            json_str = response.text[response.text.find("["):response.text.rfind("]") + 1]
-            result = json.loads(json_str)
-            return result
+async def generate_questions_with_answers(labels: List[str]) -> List[Dict[str, str]]:
+    """
+    Generate 5 technical question-answer pairs based on provided labels.
+
+    Args:
+        labels (List[str]): List of technical topics or skills
+
+    Returns:
+        List[Dict[str, str]]: A list of dictionaries with 'question' and 'answer' keys
+    """
+    try:
+        return await generate_question_batch(labels)
 
     except Exception as e:
         logger.error(f"Error in generate_questions_with_answers: {e}")
         return [{"question": "N/A", "answer": f"Error occurred: {str(e)}"}]
 
-
 # Example usage
 if __name__ == "__main__":
     topics = ["Java", "Spring Boot", "React"]
-    qa_pairs = generate_questions_with_answers(topics)
+    qa_pairs = asyncio.run(generate_questions_with_answers(topics))
     print(json.dumps(qa_pairs,indent=2))
\ No newline at end of file
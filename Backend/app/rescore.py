@@ -0,0 +1,223 @@
+# app/rescore.py
+"""
+Re-score every stored resume of a job against its current job_des.
+
+A run is recorded in the rescore_run collection and executed as a background
+task. Applications are read in _id-ordered batches; each resume is re-scored
+from the profile already stored in its resume_detail, so the common case needs
+no Gemini call at all. Only resumes without a usable profile are re-extracted,
+several per prompt (see extract_resume_profiles); each batch is then scored in
+one call (see score_resume_profiles), and the LLM tiebreak runs only when the
+run asks for it. Both kinds of Gemini work share a bounded
+semaphore, and every batch is written back with a single bulk_write.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from db import job_collection, job_user_collection, rescore_run_collection
+from app.resume_parser import (
+    extract_resume_profiles,
+    score_resume_profiles,
+    resume_score_key,
+    resume_cache,
+    validate_profile,
+)
+
+logger = logging.getLogger(__name__)
+
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", 200))
+RESCORE_LLM_CONCURRENCY = int(os.getenv("RESCORE_LLM_CONCURRENCY", 4))
+# A run whose process died stops updating; after this long it no longer blocks new runs
+RESCORE_STALE_SECONDS = float(os.getenv("RESCORE_STALE_SECONDS", 600))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCORE_FIELDS = ("resumeMatch", "scoreMethod", "matchedRequirements", "missingRequirements")
+
+# Keep references so running tasks are not garbage-collected
+_tasks: Set[asyncio.Task] = set()
+
+
+class RescoreInProgressError(Exception):
+    """A rescore run for the job is already queued or running."""
+
+
+def _stored_profile(detail: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The extracted profile inside a resume_detail, or None if it cannot be reused.
+
+    A well-formed profile is reused even when it lists no skills; re-extracting
+    the resume would most likely produce the same empty list.
+    """
+    if not detail or detail.get("error"):
+        return None
+    try:
+        return validate_profile({key: value for key, value in detail.items() if key not in SCORE_FIELDS})
+    except ValueError:
+        return None
+
+
+async def _rescore_batch(
+        docs: List[Dict[str, Any]],
+        requirements: List[str],
+        use_llm: bool,
+        llm_slots: asyncio.Semaphore
+) -> Dict[str, int]:
+    profiles = [_stored_profile(doc.get("resume_detail")) for doc in docs]
+    missing = [i for i, profile in enumerate(profiles) if profile is None]
+    if missing:
+        # Resumes without a usable profile are extracted together in batched prompts
+        async with llm_slots:
+            extracted = await extract_resume_profiles([docs[i]["resume_content"] for i in missing])
+        for i, profile in zip(missing, extracted):
+            profiles[i] = profile
+
+    usable = [i for i, profile in enumerate(profiles) if "error" not in profile]
+    scores = await score_resume_profiles(
+        [profiles[i] for i in usable], requirements, use_llm_tiebreak=use_llm, llm_slots=llm_slots
+    )
+    results = {i: {**profiles[i], **score} for i, score in zip(usable, scores)}
+    await asyncio.gather(*(
+        resume_cache.set(resume_score_key(docs[i]["resume_content"], requirements), result)
+        for i, result in results.items()
+    ))
+
+    now = datetime.utcnow()
+    operations = []
+    failed = 0
+    for i, doc in enumerate(docs):
+        result = results.get(i)
+        if result is None:
+            failed += 1
+            logger.error(f"Failed to rescore application {doc['_id']}: {profiles[i]['error']}")
+            continue
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {
+            "resume_score": float(result.get("resumeMatch", 0)),
+            "resume_detail": result,
+            "updated_at": now,
+        }}))
+    if operations:
+        await job_user_collection.bulk_write(operations, ordered=False)
+    return {"updated": len(operations), "failed": failed}
+
+
+async def _execute(run_id: ObjectId, job_id: ObjectId, requirements: List[str], use_llm: bool) -> None:
+    started = time.monotonic()
+    match = {"job_id": job_id, "resume_content": {"$exists": True, "$ne": None}}
+    total = await job_user_collection.count_documents(match)
+    await rescore_run_collection.update_one(
+        {"_id": run_id},
+        {"$set": {"state": RUNNING, "total": total, "started_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+    )
+
+    llm_slots = asyncio.Semaphore(RESCORE_LLM_CONCURRENCY)
+    last_id = None
+    while True:
+        page_filter = dict(match)
+        if last_id is not None:
+            page_filter["_id"] = {"$gt": last_id}
+        docs = await job_user_collection.find(
+            page_filter, {"resume_content": 1, "resume_detail": 1}
+        ).sort("_id", 1).limit(RESCORE_BATCH_SIZE).to_list(length=RESCORE_BATCH_SIZE)
+        if not docs:
+            break
+
+        counts = await _rescore_batch(docs, requirements, use_llm, llm_slots)
+        last_id = docs[-1]["_id"]
+        await rescore_run_collection.update_one({"_id": run_id}, {
+            "$inc": {"processed": len(docs), "updated": counts["updated"], "failed": counts["failed"]},
+            "$set": {"updated_at": datetime.utcnow()},
+        })
+
+    elapsed = time.monotonic() - started
+    await rescore_run_collection.update_one({"_id": run_id}, {
+        "$set": {"state": DONE, "finished_at": datetime.utcnow(), "elapsed_seconds": round(elapsed, 3)},
+        "$unset": {"active": ""},
+    })
+    logger.info(f"Rescored {total} applications of job {job_id} in {elapsed:.1f}s")
+
+
+async def _run(run_id: ObjectId, job_id: ObjectId, requirements: List[str], use_llm: bool) -> None:
+    try:
+        await _execute(run_id, job_id, requirements, use_llm)
+    except Exception as e:
+        logger.error(f"Rescore run {run_id} for job {job_id} failed: {e}")
+        await rescore_run_collection.update_one(
+            {"_id": run_id},
+            {"$set": {"state": FAILED, "error": str(e), "finished_at": datetime.utcnow()}, "$unset": {"active": ""}}
+        )
+
+
+async def start_rescore(job_id: str, use_llm: bool = False) -> Optional[str]:
+    """
+    Queue a rescore of every stored resume of a job and start it in the background.
+
+    Args:
+        job_id: Job whose applications are re-scored against its current job_des
+        use_llm: Let Gemini break ties in the ambiguous score band
+
+    Returns:
+        Optional[str]: The run id, or None if the job does not exist
+
+    Raises:
+        RescoreInProgressError: If a run for the job has not finished yet
+    """
+    job_oid = ObjectId(job_id)
+    job = await job_collection.find_one({"_id": job_oid}, {"job_des": 1})
+    if not job:
+        return None
+    await rescore_run_collection.update_many(
+        {"job_id": job_oid, "active": True,
+         "updated_at": {"$lt": datetime.utcnow() - timedelta(seconds=RESCORE_STALE_SECONDS)}},
+        {"$set": {"state": FAILED, "error": "Abandoned"}, "$unset": {"active": ""}}
+    )
+
+    job_description = job.get("job_des") or []
+    requirements = job_description if isinstance(job_description, list) else [job_description]
+
+    run_id = ObjectId()
+    now = datetime.utcnow()
+    try:
+        # The unique partial index on (job_id, active) allows one unfinished run per job
+        await rescore_run_collection.insert_one({
+            "_id": run_id,
+            "job_id": job_oid,
+            "active": True,
+            "state": QUEUED,
+            "use_llm": use_llm,
+            "total": None,
+            "processed": 0,
+            "updated": 0,
+            "failed": 0,
+            "created_at": now,
+            "updated_at": now,
+        })
+    except DuplicateKeyError:
+        raise RescoreInProgressError(f"A rescore of job {job_id} is already in progress")
+
+    task = asyncio.create_task(_run(run_id, job_oid, requirements, use_llm))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return str(run_id)
+
+
+async def rescore_status(job_id: str, run_id: str) -> Optional[Dict[str, Any]]:
+    """Progress of a rescore run, JSON-ready, or None if it does not exist."""
+    run = await rescore_run_collection.find_one({"_id": ObjectId(run_id), "job_id": ObjectId(job_id)})
+    if run is None:
+        return None
+    run.pop("active", None)
+    run["_id"] = str(run["_id"])
+    run["job_id"] = str(run["job_id"])
+    if run.get("total"):
+        run["progress"] = round(run["processed"] / run["total"], 4)
+    return run
@@ -0,0 +1,200 @@
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so the same document extracted twice hashes identically."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        *parts: JSON-serialisable values identifying the cached result
+
+    Returns:
+        str: Hex SHA-256 of the canonical JSON encoding of the parts
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU cache whose entries expire after ttl_seconds."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class MongoBackend:
+    """
+    Persistent cache stored in a Mongo collection.
+
+    Documents are {_id: key, value, expires_at}; a TTL index on expires_at lets
+    Mongo purge stale entries, and reads also ignore anything already expired.
+    """
+
+    def __init__(self, collection, ttl_seconds: float = 30 * 24 * 3600):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key: str) -> Optional[Any]:
+        doc = await self.collection.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.utcnow()}},
+            {"value": 1}
+        )
+        return doc["value"] if doc else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.collection.update_one(
+            {"_id": key},
+            {"$set": {
+                "value": value,
+                "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+            }},
+            upsert=True
+        )
+
+
+class ResultCache:
+    """
+    Layered cache over one or more backends, fastest first.
+
+    A hit in a slower layer is copied into the faster ones. Backend errors are
+    logged and treated as misses so the cache can never fail a request.
+    get_or_compute() also coalesces concurrent misses on the same key into a
+    single computation.
+    """
+
+    def __init__(self, name: str, backends: List[Any]):
+        self.name = name
+        self.backends = backends
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        for i, backend in enumerate(self.backends):
+            try:
+                value = await backend.get(key)
+            except Exception as e:
+                logger.error(f"[{self.name}] cache read failed on {type(backend).__name__}: {e}")
+                continue
+            if value is not None:
+                self.hits += 1
+                for faster in self.backends[:i]:
+                    await self._safe_set(faster, key, value)
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        for backend in self.backends:
+            await self._safe_set(backend, key, value)
+
+    async def _load(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self.get(key)
+        if value is None:
+            value = await compute()
+            if value is not None:
+                await self.set(key, value)
+        return value
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Callers that ask for a key while it is already being loaded wait for that
+        load instead of starting their own. The load runs as its own task, so a
+        caller going away does not cancel it for the others; if compute() raises,
+        nothing is cached and every waiting caller gets the exception.
+
+        Args:
+            key: Cache key
+            compute: Coroutine function producing the value on a miss
+
+        Returns:
+            Any: The cached or freshly computed value
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key, compute))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    async def _safe_set(self, backend, key: str, value: Any) -> None:
+        try:
+            await backend.set(key, value)
+        except Exception as e:
+            logger.error(f"[{self.name}] cache write failed on {type(backend).__name__}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "backends": [type(backend).__name__ for backend in self.backends],
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def build_result_cache(name: str, backends: str, collection, max_entries: int, ttl_seconds: float) -> ResultCache:
+    """
+    Build a ResultCache from a comma-separated backend list such as "memory,mongo".
+
+    Args:
+        name: Cache name used in logs and stats
+        backends: Backends to layer, fastest first ("memory" and/or "mongo")
+        collection: Motor collection backing the "mongo" layer
+        max_entries: Size of the "memory" layer
+        ttl_seconds: Lifetime of an entry in every layer
+
+    Returns:
+        ResultCache: The configured cache
+    """
+    layers = []
+    for backend in (part.strip() for part in backends.split(",")):
+        if backend == "memory":
+            layers.append(MemoryBackend(max_entries, ttl_seconds))
+        elif backend == "mongo":
+            layers.append(MongoBackend(collection, ttl_seconds))
+        elif backend:
+            raise ValueError(f"Unknown {name} cache backend: {backend}")
+    return ResultCache(name, layers)
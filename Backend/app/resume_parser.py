@@ -1,45 +1,146 @@
 import os
 import json
+import asyncio
 import logging
-from typing import List, Dict, Any
-from dotenv import load_dotenv
-import google.generativeai as genai
+from typing import List, Dict, Any, Optional, Tuple
+from app.llm_client import generate_text, parse_json_response
+from app.scorer import compute_weighted_similarity_batch
+from app.result_cache import build_result_cache, make_key, normalize_text
+from db import resume_cache_collection
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+RESUME_CACHE_BACKENDS = os.getenv("RESUME_CACHE_BACKENDS", "memory,mongo")
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", 2048))
+RESUME_CACHE_TTL_SECONDS = float(os.getenv("RESUME_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+RESUME_LLM_TIEBREAK = os.getenv("RESUME_LLM_TIEBREAK", "false").lower() == "true"
+RESUME_TIEBREAK_LOW = float(os.getenv("RESUME_TIEBREAK_LOW", 40))
+RESUME_TIEBREAK_HIGH = float(os.getenv("RESUME_TIEBREAK_HIGH", 60))
+# Batched extraction packs several resumes into one prompt, bounded by both limits
+RESUME_BATCH_TOKEN_BUDGET = int(os.getenv("RESUME_BATCH_TOKEN_BUDGET", 24000))
+RESUME_BATCH_MAX_ITEMS = int(os.getenv("RESUME_BATCH_MAX_ITEMS", 8))
 
-# Get API key
-GEMINI_API_KEY = os.getenv("GEMINI_API")
-if not GEMINI_API_KEY:
-  raise ValueError("GEMINI_API key not found in environment variables")
+PROFILE_TEMPLATE = """{
+    "id": 1,
+    "name": "",
+    "email": "",
+    "phone": "",
+    "position": "",
+    "location": "",
+    "appliedDate": "N/A",
+    "status": "N/A",
+    "avatar": "N/A",
+    "experience": "",
+    "linkedin": "",
+    "github": "",
+    "portfolio": "",
+    "summary": "",
+    "skills": [],
+    "workExperience": [
+        {
+            "company": "",
+            "position": "",
+            "duration": "",
+            "description": ""
+        }
+    ],
+    "education": [
+        {
+            "degree": "",
+            "school": "",
+            "year": ""
+        }
+    ]
+}"""
+
+PROFILE_LIST_FIELDS = ("skills", "workExperience", "education")
+
+
+resume_cache = build_result_cache(
+  "resume", RESUME_CACHE_BACKENDS, resume_cache_collection, RESUME_CACHE_MAX_ENTRIES, RESUME_CACHE_TTL_SECONDS
+)
+
+
+def resume_score_key(resume_text: str, requirements: List[str]) -> str:
+  """Cache key for a resume scored against a specific set of job requirements."""
+  return make_key("resume-score", normalize_text(resume_text), requirements)
+
+
+def resume_extraction_key(resume_text: str) -> str:
+  """Cache key for the structured extraction, which depends on the resume text alone."""
+  return make_key("resume-extract", normalize_text(resume_text))
 
-try:
-  # Configure Gemini API
-  genai.configure(api_key=GEMINI_API_KEY)
-  model = genai.GenerativeModel("gemini-1.5-flash")
-except Exception as e:
-  logger.error(f"Failed to initialize Gemini API: {e}")
-  raise
 
-def extract_and_score_resume(resume_text: str, requirements: List[str]) -> Dict[str, Any]:
+def empty_resume_profile(error: str = None) -> Dict[str, Any]:
+  profile = {
+    "id": 1,
+    "name": "N/A",
+    "email": "N/A",
+    "phone": "N/A",
+    "position": "N/A",
+    "location": "N/A",
+    "appliedDate": "N/A",
+    "status": "N/A",
+    "avatar": "N/A",
+    "experience": "N/A",
+    "linkedin": "N/A",
+    "github": "N/A",
+    "portfolio": "N/A",
+    "summary": "N/A",
+    "skills": [],
+    "workExperience": [],
+    "education": [],
+  }
+  if error is not None:
+    profile["error"] = error
+  return profile
+
+
+def flatten_requirements(requirements: List[Any]) -> List[str]:
+  """Flatten job requirements (job_des may arrive nested) into a list of non-empty labels."""
+  labels = []
+  for item in requirements or []:
+    if isinstance(item, (list, tuple)):
+      labels.extend(flatten_requirements(item))
+    elif item and str(item).strip():
+      labels.append(str(item).strip())
+  return labels
+
+
+def profile_labels(profile: Dict[str, Any]) -> List[str]:
+  """Labels the local scorer compares against the JD: skills plus the stated experience."""
+  skills = profile.get("skills")
+  # Profiles cached before extraction was validated may hold "N/A" instead of a list
+  labels = [str(skill) for skill in skills if skill] if isinstance(skills, list) else []
+  experience = profile.get("experience")
+  if experience and experience != "N/A":
+    labels.append(f"{experience} experience")
+  return labels
+
+
+async def extract_resume_profile(resume_text: str) -> Dict[str, Any]:
   """
-  Extract information from resume and score it against requirements.
+  Extract the structured candidate profile from a resume.
+
+  The profile does not depend on the job, so it is cached on the resume text
+  alone and one extraction serves every job the candidate applies to.
 
   Args:
       resume_text (str): The text content of the resume
-      requirements (List[str]): List of job requirements
 
   Returns:
-      Dict[str, Any]: Parsed resume information and scoring
+      Dict[str, Any]: Parsed resume information (with an "error" key on failure)
   """
   try:
-    # Validate inputs
-    if not resume_text or not requirements:
-      raise ValueError("Resume text and requirements cannot be empty")
+    if not resume_text:
+      raise ValueError("Resume text cannot be empty")
+
+    extraction_key = resume_extraction_key(resume_text)
+    cached = await resume_cache.get(extraction_key)
+    if cached is not None:
+      return dict(cached)
 
     # Create prompt
     prompt = f"""
@@ -50,99 +151,356 @@ def extract_and_score_resume(resume_text: str, requirements: List[str]) -> Dict[
         {resume_text}
         ---
 
-        Here is the job requirement list:
-        ---
-        {requirements}
-        ---
-
-        1. Calculate `resumeMatch` (0-100) based on how closely the resume aligns with these job requirements.
-        2. Extract all the information and fill it into this JSON format (fill missing fields as "N/A").
+        Extract all the information and fill it into this JSON format (fill missing fields as "N/A").
         Note: Fill workExperience and education arrays with all relevant entries found in the resume.
 
-        {{
-            "id": 1,
-            "name": "",
-            "email": "",
-            "phone": "",
-            "position": "",
-            "location": "",
-            "resumeMatch": 0,
-            "appliedDate": "N/A",
-            "status": "N/A",
-            "avatar": "N/A",
-            "experience": "",
-            "linkedin": "",
-            "github": "",
-            "portfolio": "",
-            "summary": "",
-            "skills": [],
-            "workExperience": [
-                {{
-                    "company": "",
-                    "position": "",
-                    "duration": "",
-                    "description": ""
-                }}
-            ],
-            "education": [
-                {{
-                    "degree": "",
-                    "school": "",
-                    "year": ""
-                }}
-            ]
-        }}
+        {PROFILE_TEMPLATE}
         """
 
-    # Generate response
-    response = model.generate_content(prompt)
-    if not response or not response.text:
-      raise ValueError("Empty response from Gemini API")
+    # Generate response off the event loop
+    response_text = await generate_text(prompt)
 
     # Parse JSON response
     try:
-      result = json.loads(response.text)
+      profile = parse_json_response(response_text)
+    except (json.JSONDecodeError, ValueError) as e:
+      logger.error(f"Failed to parse JSON response: {e}")
+      raise ValueError(f"Invalid JSON response: {e}")
+
+    profile = validate_profile(profile)
+
+    await resume_cache.set(extraction_key, profile)
+    return profile
+
+  except Exception as e:
+    logger.error(f"Error in extract_resume_profile: {e}")
+    return empty_resume_profile(str(e))
+
+
+def validate_profile(value: Any) -> Dict[str, Any]:
+  """
+  Check a model-produced profile against the extraction schema.
+
+  Missing scalar fields are filled with "N/A" and list fields the model marked
+  "N/A" (as the prompt asks for anything missing) become empty lists; a profile
+  without a name or with other non-list skills/workExperience/education is rejected.
+
+  Raises:
+      ValueError: If the value cannot be used as a profile
+  """
+  if not isinstance(value, dict):
+    raise ValueError("Profile is not an object")
+  if not value.get("name"):
+    raise ValueError("Profile has no name")
+  value = dict(value)
+  for field in PROFILE_LIST_FIELDS:
+    if value.get(field) in (None, "N/A"):
+      value[field] = []
+    if not isinstance(value[field], list):
+      raise ValueError(f"Profile field {field} is not a list")
+
+  profile = empty_resume_profile()
+  profile.update(value)
+  profile.pop("index", None)
+  profile.pop("resumeMatch", None)
+  return profile
+
+
+def _estimate_tokens(text: str) -> int:
+  # Roughly four characters per token, plus the per-resume delimiters
+  return len(text) // 4 + 16
+
+
+def pack_resume_batches(texts: List[str]) -> List[List[int]]:
+  """
+  Group resume indexes into batches under RESUME_BATCH_TOKEN_BUDGET and RESUME_BATCH_MAX_ITEMS.
+
+  A resume larger than the budget on its own gets a batch of one.
+  """
+  batches, current, used = [], [], 0
+  for i, text in enumerate(texts):
+    tokens = _estimate_tokens(text)
+    if current and (used + tokens > RESUME_BATCH_TOKEN_BUDGET or len(current) >= RESUME_BATCH_MAX_ITEMS):
+      batches.append(current)
+      current, used = [], 0
+    current.append(i)
+    used += tokens
+  if current:
+    batches.append(current)
+  return batches
+
+
+async def _extract_batch(texts: List[str]) -> List[Dict[str, Any]]:
+  """
+  Extract several resumes in one Gemini request.
+
+  Returns:
+      List[Dict[str, Any]]: One entry per input; items the model dropped or got
+      wrong come from a single-resume call instead
+  """
+  blocks = "\n".join(f"<<<RESUME {i}>>>\n{text}\n<<<END RESUME {i}>>>" for i, text in enumerate(texts))
+  prompt = f"""
+        You are an intelligent hiring assistant.
+
+        Below are {len(texts)} candidate resumes, each between <<<RESUME n>>> and <<<END RESUME n>>>.
+        {blocks}
+
+        For every resume extract all the information into this JSON format (fill missing fields as "N/A"),
+        adding an "index" field with the resume's number n.
+        Note: Fill workExperience and education arrays with all relevant entries found in the resume.
+
+        {PROFILE_TEMPLATE}
+
+        Respond with a JSON array containing exactly one object per resume.
+        """
+
+  results: List[Any] = [None] * len(texts)
+  try:
+    items = parse_json_response(
+      await generate_text(prompt, generation_config={"response_mime_type": "application/json"}),
+      opener="["
+    )
+    if not isinstance(items, list):
+      raise ValueError("Batched response is not an array")
+    for item in items:
+      index = item.get("index") if isinstance(item, dict) else None
+      if isinstance(index, int) and 0 <= index < len(texts) and results[index] is None:
+        try:
+          results[index] = validate_profile(item)
+        except ValueError as e:
+          logger.warning(f"Discarding batched profile {index}: {e}")
+  except Exception as e:
+    logger.error(f"Batched extraction of {len(texts)} resumes failed: {e}")
 
-      # Validate resumeMatch
-      if not isinstance(result.get("resumeMatch"), (int, float)):
-        raise ValueError("Invalid resumeMatch value")
+  missing = [i for i, result in enumerate(results) if result is None]
+  await asyncio.gather(*(
+    resume_cache.set(resume_extraction_key(texts[i]), results[i])
+    for i in range(len(texts)) if results[i] is not None
+  ))
+  if missing:
+    logger.info(f"Falling back to single extraction for {len(missing)}/{len(texts)} resumes")
+    fallbacks = await asyncio.gather(*(extract_resume_profile(texts[i]) for i in missing))
+    for i, profile in zip(missing, fallbacks):
+      results[i] = profile
+  return results
 
-      # Ensure resumeMatch is between 0 and 100
-      result["resumeMatch"] = max(0, min(100, float(result["resumeMatch"])))
 
-      return result
+async def _extract_group(texts: List[str]) -> List[Dict[str, Any]]:
+  # A lone resume gets the plain single-resume prompt
+  if len(texts) == 1:
+    return [await extract_resume_profile(texts[0])]
+  return await _extract_batch(texts)
 
-    except json.JSONDecodeError:
-      # Try to extract JSON from text response
-      try:
-        json_str = response.text[response.text.find("{"):response.text.rfind("}") + 1]
-        result = json.loads(json_str)
-        result["resumeMatch"] = max(0, min(100, float(result.get("resumeMatch", 0))))
-        return result
-      except (json.JSONDecodeError, ValueError) as e:
-        logger.error(f"Failed to parse JSON response: {e}")
-        raise ValueError(f"Invalid JSON response: {e}")
 
+async def extract_resume_profiles(resume_texts: List[str]) -> List[Dict[str, Any]]:
+  """
+  Extract many resumes with as few Gemini requests as possible.
+
+  Cached and duplicate resumes are served without a call; the rest are packed
+  into token-bounded batches (see pack_resume_batches) sent concurrently, with
+  single-resume calls as the fallback for anything a batch fails to return.
+
+  Args:
+      resume_texts (List[str]): Resume text contents
+
+  Returns:
+      List[Dict[str, Any]]: Profiles in input order (with an "error" key on failure)
+  """
+  profiles: List[Any] = [None] * len(resume_texts)
+  pending: Dict[str, List[int]] = {}
+  for i, text in enumerate(resume_texts):
+    if not text:
+      profiles[i] = empty_resume_profile("Resume text cannot be empty")
+      continue
+    key = resume_extraction_key(text)
+    if key in pending:
+      pending[key].append(i)
+      continue
+    cached = await resume_cache.get(key)
+    if cached is not None:
+      profiles[i] = dict(cached)
+    else:
+      pending[key] = [i]
+
+  positions = list(pending.values())
+  texts = [resume_texts[group[0]] for group in positions]
+  batches = pack_resume_batches(texts)
+  outputs = await asyncio.gather(*(_extract_group([texts[i] for i in batch]) for batch in batches))
+  for batch, batch_profiles in zip(batches, outputs):
+    for i, profile in zip(batch, batch_profiles):
+      for position in positions[i]:
+        profiles[position] = dict(profile)
+  return profiles
+
+
+async def _llm_score_profile(profile: Dict[str, Any], requirements: List[str]) -> float:
+  """Ask Gemini for a resumeMatch using only the compact profile, not the full resume."""
+  summary = {
+    "position": profile.get("position"),
+    "experience": profile.get("experience"),
+    "skills": profile.get("skills"),
+    "summary": profile.get("summary"),
+    "workExperience": [
+      {"position": item.get("position"), "duration": item.get("duration")}
+      for item in profile.get("workExperience") or [] if isinstance(item, dict)
+    ],
+  }
+  prompt = f"""
+        You are an intelligent hiring assistant.
+
+        Candidate profile:
+        {json.dumps(summary)}
+
+        Job requirements:
+        {json.dumps(requirements)}
+
+        Calculate `resumeMatch` (0-100) based on how closely the candidate aligns with these job requirements.
+        Respond strictly in this JSON format: {{"resumeMatch": 0}}
+        """
+  result = parse_json_response(await generate_text(prompt))
+  return max(0, min(100, float(result["resumeMatch"])))
+
+
+async def _tiebreak(
+    profile: Dict[str, Any],
+    jd_labels: List[str],
+    score: Dict[str, Any],
+    llm_slots: Optional[asyncio.Semaphore]
+) -> None:
+  try:
+    if llm_slots is None:
+      resume_match = await _llm_score_profile(profile, jd_labels)
+    else:
+      async with llm_slots:
+        resume_match = await _llm_score_profile(profile, jd_labels)
+    score.update(resumeMatch=resume_match, scoreMethod="llm")
   except Exception as e:
-    logger.error(f"Error in extract_and_score_resume: {e}")
-    return {
-      "id": 1,
-      "name": "N/A",
-      "email": "N/A",
-      "phone": "N/A",
-      "position": "N/A",
-      "location": "N/A",
-      "resumeMatch": 0,
-      "appliedDate": "N/A",
-      "status": "N/A",
-      "avatar": "N/A",
-      "experience": "N/A",
-      "linkedin": "N/A",
-      "github": "N/A",
-      "portfolio": "N/A",
-      "summary": "N/A",
-      "skills": [],
-      "workExperience": [],
-      "education": [],
-      "error": str(e)
-    }
\ No newline at end of file
+    logger.error(f"LLM tiebreak failed, keeping local score: {e}")
+
+
+async def score_resume_profiles(
+    profiles: List[Dict[str, Any]],
+    requirements: List[str],
+    use_llm_tiebreak: bool = None,
+    llm_slots: Optional[asyncio.Semaphore] = None
+) -> List[Dict[str, Any]]:
+  """
+  Score extracted profiles against one job's requirements.
+
+  The local weighted label similarity of every profile comes from a single
+  compute_weighted_similarity_batch call. Gemini is only consulted when the
+  tiebreak is enabled, for the profiles whose local score falls inside the
+  ambiguous band [RESUME_TIEBREAK_LOW, RESUME_TIEBREAK_HIGH].
+
+  Args:
+      profiles (List[Dict[str, Any]]): Profiles returned by extract_resume_profile(s)
+      requirements (List[str]): List of job requirements (the job's job_des)
+      use_llm_tiebreak (bool): Override RESUME_LLM_TIEBREAK for this call
+      llm_slots (asyncio.Semaphore): Bounds concurrent tiebreak calls, if given
+
+  Returns:
+      List[Dict[str, Any]]: Per profile, resumeMatch (0-100), the scoring method and matched/missing requirements
+  """
+  jd_labels = flatten_requirements(requirements)
+  local = compute_weighted_similarity_batch(jd_labels, [profile_labels(profile) for profile in profiles])
+  scores = [
+    {
+      "resumeMatch": round(float(score) * 100, 1),
+      "scoreMethod": "local",
+      "matchedRequirements": matched,
+      "missingRequirements": missing,
+    }
+    for score, matched, missing in local
+  ]
+
+  if use_llm_tiebreak is None:
+    use_llm_tiebreak = RESUME_LLM_TIEBREAK
+  if use_llm_tiebreak:
+    await asyncio.gather(*(
+      _tiebreak(profile, jd_labels, score, llm_slots)
+      for profile, score in zip(profiles, scores)
+      if RESUME_TIEBREAK_LOW <= score["resumeMatch"] <= RESUME_TIEBREAK_HIGH
+    ))
+  return scores
+
+
+async def score_resume_profile(
+    profile: Dict[str, Any],
+    requirements: List[str],
+    use_llm_tiebreak: bool = None
+) -> Dict[str, Any]:
+  """Score a single extracted profile; see score_resume_profiles."""
+  return (await score_resume_profiles([profile], requirements, use_llm_tiebreak))[0]
+
+
+def _failed_result(error: str) -> Dict[str, Any]:
+  return {**empty_resume_profile(error), "resumeMatch": 0}
+
+
+async def extract_and_score_resumes(applications: List[Tuple[str, List[str]]]) -> List[Dict[str, Any]]:
+  """
+  Extract and score many resumes, each against its own job's requirements.
+
+  Applications whose score is cached are served from the cache. The remaining
+  resumes are extracted together (see extract_resume_profiles) and the resumes
+  of each job are scored in one batch (see score_resume_profiles).
+
+  Args:
+      applications (List[Tuple[str, List[str]]]): (resume text, job requirements) pairs
+
+  Returns:
+      List[Dict[str, Any]]: Parsed resume information and scoring in input order
+      (an error profile with an "error" key for the ones that failed)
+  """
+  results: List[Any] = [None] * len(applications)
+  pending = []
+  for i, (resume_text, requirements) in enumerate(applications):
+    if not resume_text or not requirements:
+      results[i] = _failed_result("Resume text and requirements cannot be empty")
+      continue
+    cached = await resume_cache.get(resume_score_key(resume_text, requirements))
+    if cached is not None:
+      results[i] = dict(cached)
+    else:
+      pending.append(i)
+
+  profiles = dict(zip(pending, await extract_resume_profiles([applications[i][0] for i in pending])))
+  by_job: Dict[str, List[int]] = {}
+  for i, profile in profiles.items():
+    if "error" in profile:
+      logger.error(f"Error in extract_and_score_resumes: {profile['error']}")
+      results[i] = _failed_result(profile["error"])
+    else:
+      by_job.setdefault(make_key("requirements", applications[i][1]), []).append(i)
+
+  for group in by_job.values():
+    requirements = applications[group[0]][1]
+    try:
+      scores = await score_resume_profiles([profiles[i] for i in group], requirements)
+    except Exception as e:
+      logger.error(f"Error in extract_and_score_resumes: {e}")
+      for i in group:
+        results[i] = _failed_result(str(e))
+      continue
+    for i, score in zip(group, scores):
+      results[i] = {**profiles[i], **score}
+      await resume_cache.set(resume_score_key(applications[i][0], requirements), results[i])
+  return results
+
+
+async def extract_and_score_resume(resume_text: str, requirements: List[str]) -> Dict[str, Any]:
+  """
+  Extract information from resume and score it against requirements.
+
+  Extraction runs once per unique resume (see extract_resume_profile) and the
+  per-job score is computed locally, so resubmitting an identical resume for
+  the same requirements returns without calling Gemini.
+
+  Args:
+      resume_text (str): The text content of the resume
+      requirements (List[str]): List of job requirements
+
+  Returns:
+      Dict[str, Any]: Parsed resume information and scoring
+  """
+  return (await extract_and_score_resumes([(resume_text, requirements)]))[0]
@@ -0,0 +1,140 @@
+# app/resume_store.py
+import os
+import asyncio
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from bson import ObjectId
+from gridfs.errors import NoFile
+from pymongo.errors import DuplicateKeyError
+from db import resume_bucket, resume_files_collection, job_user_collection
+
+logger = logging.getLogger(__name__)
+
+RESUME_CHUNK_SIZE = int(os.getenv("RESUME_CHUNK_SIZE", 255 * 1024))
+
+
+async def store_resume(file_bytes: bytes, filename: str, content_type: str) -> Dict[str, Any]:
+    """
+    Store a resume in GridFS, deduplicated by content hash.
+
+    The unique metadata.sha256 index settles concurrent uploads of the same file:
+    the loser drops its chunks and reuses the winner's file id.
+
+    Args:
+        file_bytes: Raw file content
+        filename: Original upload filename
+        content_type: MIME type of the upload
+
+    Returns:
+        Dict[str, Any]: Reference fields to embed in the job_user document
+    """
+    sha256 = hashlib.sha256(file_bytes).hexdigest()
+
+    existing = await resume_files_collection.find_one({"metadata.sha256": sha256}, {"_id": 1})
+    if existing:
+        file_id = existing["_id"]
+    else:
+        file_id = ObjectId()
+        try:
+            await resume_bucket.upload_from_stream_with_id(
+                file_id,
+                filename,
+                file_bytes,
+                chunk_size_bytes=RESUME_CHUNK_SIZE,
+                metadata={"sha256": sha256, "content_type": content_type}
+            )
+            logger.info(f"Stored resume {sha256[:12]} as GridFS file {file_id}")
+        except DuplicateKeyError:
+            try:
+                # Removes the chunks written before the files document was rejected
+                await resume_bucket.delete(file_id)
+            except NoFile:
+                pass
+            existing = await resume_files_collection.find_one({"metadata.sha256": sha256}, {"_id": 1})
+            file_id = existing["_id"]
+            logger.info(f"Resume {sha256[:12]} was stored concurrently as GridFS file {file_id}")
+
+    return {
+        "resume_file_id": file_id,
+        "resume_sha256": sha256,
+        "resume_size": len(file_bytes),
+    }
+
+
+async def open_resume(file_id):
+    """Open a GridFS download stream for a stored resume."""
+    return await resume_bucket.open_download_stream(file_id)
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "bytes=" header into inclusive (start, end) offsets.
+
+    Returns None when there is no usable Range header (serve the whole file) and
+    raises ValueError when the range cannot be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        # Multipart ranges are not supported; fall back to the full body
+        return None
+
+    start_str, _, end_str = spec.partition("-")
+    if not start_str:
+        # Suffix range: the last N bytes
+        length = int(end_str)
+        if length <= 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, size - length), size - 1
+
+    start = int(start_str)
+    end = int(end_str) if end_str else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+async def iter_resume_chunks(grid_out, start: int, end: int) -> AsyncIterator[bytes]:
+    """Yield the inclusive byte range [start, end] of a GridFS file chunk by chunk."""
+    grid_out.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = await grid_out.read(min(grid_out.chunk_size, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+async def migrate_embedded_resumes(batch_size: int = 100) -> int:
+    """
+    Move resume bytes still embedded in job_user documents into GridFS.
+
+    Returns:
+        int: Number of documents migrated
+    """
+    migrated = 0
+    cursor = job_user_collection.find(
+        {"resume_file": {"$exists": True, "$ne": None}},
+        {"resume_file": 1, "resume_filename": 1, "resume_content_type": 1},
+        batch_size=batch_size
+    )
+    async for doc in cursor:
+        ref = await store_resume(
+            doc["resume_file"],
+            doc.get("resume_filename") or f"{doc['_id']}.pdf",
+            doc.get("resume_content_type") or "application/pdf"
+        )
+        await job_user_collection.update_one(
+            {"_id": doc["_id"]},
+            {"$set": ref, "$unset": {"resume_file": ""}}
+        )
+        migrated += 1
+    logger.info(f"Migrated {migrated} embedded resumes to GridFS")
+    return migrated
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_embedded_resumes())
@@ -1,85 +1,243 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.date import DateTrigger
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+import os
+import uuid
+import socket
 import logging
 import asyncio
-from bson import ObjectId
-from app.candidate_selector import select_top_candidates
-from app.candidate_selector_for_hr import shortlist_candidates_for_hr
-from app.notification_service import send_coding_round_emails
-from db import job_user_collection
+from pymongo import ReturnDocument, UpdateOne
+from app.workflow import start_workflow, run_transition, TransitionNotReady
+from app.outbox import wake_outbox_dispatcher
+from db import workflow_phase_collection
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 scheduler = AsyncIOScheduler()
 
-print("\n\nScheduler initialized.\n\n")
-
-def start_resume_collection(job_id):
+# Phases are persisted in the workflow_phase collection and every API process
+# polls for due ones. A phase is claimed atomically with a lease, so exactly one
+# process runs it; a phase whose owner died is reclaimed when its lease expires,
+# and phases that fell due while no process was running are caught up on startup.
+# Phases of different jobs run concurrently; a failed phase is retried with
+# exponential backoff until WORKFLOW_MAX_ATTEMPTS.
+WORKFLOW_POLL_SECONDS = float(os.getenv("WORKFLOW_POLL_SECONDS", 15))
+WORKFLOW_LEASE_SECONDS = float(os.getenv("WORKFLOW_LEASE_SECONDS", 300))
+WORKFLOW_MAX_ATTEMPTS = int(os.getenv("WORKFLOW_MAX_ATTEMPTS", 3))
+WORKFLOW_CONCURRENCY = int(os.getenv("WORKFLOW_CONCURRENCY", 4))
+WORKFLOW_RETRY_BASE_SECONDS = float(os.getenv("WORKFLOW_RETRY_BASE_SECONDS", 30))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+logger.info("Scheduler initialized.")
+
+async def start_resume_collection(job_id: str):
+    await start_workflow(job_id)
     logging.info(f"[Job {job_id}] Resume collection started.")
 
 async def end_resume_collection(job_id: str):
-    try:
-        print(f"\n\nEnding resume collection for job: {job_id}\n\n")
-        logger.info(f"Selecting top candidates for job: {job_id}")
-
-        selected_candidates = await select_top_candidates(job_id, 0.5)
-
-        if selected_candidates:
-            logger.info(f"Selected {len(selected_candidates)} candidates for job {job_id}")
-            await send_coding_round_emails(job_id, selected_candidates)
+    logger.info(f"[Job {job_id}] Ending resume collection.")
+    logger.info(f"Selecting top candidates for job: {job_id}")
 
-            # The status is already updated in select_top_candidates function
-            # No need to update again here unless you want a different status
-            logger.info(f"Candidates already marked as shortlisted in select_top_candidates")
+    # Shortlists in checkpointed batches; a retried phase resumes from the last batch
+    result = await run_transition(job_id, "resume_end")
+    logger.info(f"Selected {result.get('selected', 0)} candidates for job {job_id}")
 
-        else:
-            logger.warning(f"No candidates selected for job {job_id}")
-
-    except Exception as e:
-        logger.error(f"Error selecting top candidates for job {job_id}: {e}")
+    # Selected candidates' emails were queued in the outbox batch by batch;
+    # the dispatcher delivers them independently of this job
+    wake_outbox_dispatcher()
 
 def start_coding_round(job_id):
     logging.info(f"[Job {job_id}] Coding round started.")
 
 async def end_coding_round(job_id: str):
-    try:
-        print(f"\n\nEnding coding round for job: {job_id}\n\n")
-        logger.info(f"Shortlisting candidates for HR for job: {job_id}")
+    logger.info(f"[Job {job_id}] Ending coding round.")
+    logger.info(f"Shortlisting candidates for HR for job: {job_id}")
 
-        # Call the shortlist_candidates_for_hr function
-        shortlisted_candidates = await shortlist_candidates_for_hr(job_id, 0.5)
+    result = await run_transition(job_id, "coding_end")
+    logger.info(f"Shortlisted {result.get('selected', 0)} candidates for HR for job {job_id}")
 
-        if shortlisted_candidates:
-            logger.info(f"Shortlisted {len(shortlisted_candidates)} candidates for HR for job {job_id}")
+    wake_outbox_dispatcher()
 
-            # Send emails to shortlisted candidates
-            await send_coding_round_emails(job_id, shortlisted_candidates)
-
-            logger.info(f"Emails sent to shortlisted candidates for job {job_id}")
-        else:
-            logger.warning(f"No candidates shortlisted for HR for job {job_id}")
-
-    except Exception as e:
-        logger.error(f"Error shortlisting candidates for HR for job {job_id}: {e}")
-
-def start_interview_round(job_id):
+async def start_interview_round(job_id: str):
+    await run_transition(job_id, "interview_start")
     logging.info(f"[Job {job_id}] Interview round started.")
 
-def schedule_workflow(job_id, timings):
-    scheduler.add_job(start_resume_collection, DateTrigger(run_date=timings['resume_start']), args=[job_id])
-    scheduler.add_job(end_resume_collection, DateTrigger(run_date=timings['resume_end']), args=[job_id])
-    scheduler.add_job(start_coding_round, DateTrigger(run_date=timings['coding_start']), args=[job_id])
-    scheduler.add_job(end_coding_round, DateTrigger(run_date=timings['coding_end']), args=[job_id])
-    scheduler.add_job(start_interview_round, DateTrigger(run_date=timings['interview_start']), args=[job_id])
+PHASE_HANDLERS = {
+    "resume_start": start_resume_collection,
+    "resume_end": end_resume_collection,
+    "coding_start": start_coding_round,
+    "coding_end": end_coding_round,
+    "interview_start": start_interview_round,
+}
+
+def _to_utc(moment: datetime) -> datetime:
+    # Naive timings are local time; Mongo stores naive UTC
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+async def schedule_workflow(job_id, timings):
+    """
+    Persist the phase transitions of a job.
+
+    Re-scheduling the same job is idempotent: phases that already exist keep
+    their state and only get their run time updated if still pending.
+    """
+    operations = []
+    for phase, run_at in timings.items():
+        if phase not in PHASE_HANDLERS:
+            raise ValueError(f"Unknown workflow phase: {phase}")
+        phase_id = f"{job_id}:{phase}"
+        operations.append(UpdateOne(
+            {"_id": phase_id},
+            {"$setOnInsert": {"job_id": job_id, "phase": phase, "state": PENDING, "attempts": 0}},
+            upsert=True
+        ))
+        operations.append(UpdateOne(
+            {"_id": phase_id, "state": PENDING},
+            {"$set": {"run_at": _to_utc(run_at)}}
+        ))
+    await workflow_phase_collection.bulk_write(operations, ordered=True)
+
+async def cancel_workflow(job_id: str) -> None:
+    """Drop the phases of a job that have not started yet."""
+    await workflow_phase_collection.delete_many({"job_id": job_id, "state": PENDING})
+
+async def _claim_due_phase(skip: List[str]) -> Optional[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return await workflow_phase_collection.find_one_and_update(
+        {"_id": {"$nin": skip}, "$or": [
+            # next_attempt_at is only set while a failed phase backs off
+            {"state": PENDING, "run_at": {"$lte": now}, "next_attempt_at": {"$not": {"$gt": now}}},
+            {"state": RUNNING, "lease_until": {"$lt": now}},
+        ]},
+        {
+            "$set": {
+                "state": RUNNING,
+                "owner": WORKER_ID,
+                "lease_until": now + timedelta(seconds=WORKFLOW_LEASE_SECONDS),
+                "started_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+async def _earlier_phase_unfinished(phase: Dict[str, Any]) -> bool:
+    # After downtime several phases of a job can be due at once; keep them in order
+    earlier = await workflow_phase_collection.find_one({
+        "job_id": phase["job_id"],
+        "run_at": {"$lt": phase["run_at"]},
+        "state": {"$nin": [DONE, FAILED]},
+    }, {"_id": 1})
+    return earlier is not None
+
+async def _renew_lease(phase_id: str) -> None:
+    while True:
+        await asyncio.sleep(WORKFLOW_LEASE_SECONDS / 3)
+        await workflow_phase_collection.update_one(
+            {"_id": phase_id, "owner": WORKER_ID, "state": RUNNING},
+            {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=WORKFLOW_LEASE_SECONDS)}}
+        )
+
+async def _release_phase(phase: Dict[str, Any], delay: Optional[float] = None) -> None:
+    # Hand a claimed phase back without consuming an attempt, optionally not before delay seconds
+    update: Dict[str, Any] = {"state": PENDING}
+    if delay:
+        update["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=delay)
+    await workflow_phase_collection.update_one(
+        {"_id": phase["_id"], "owner": WORKER_ID},
+        {"$set": update, "$inc": {"attempts": -1}, "$unset": {"lease_until": ""}}
+    )
+
+async def _finish_phase(phase: Dict[str, Any], error: Optional[Exception]) -> None:
+    now = datetime.utcnow()
+    update: Dict[str, Any] = {"finished_at": now}
+    unset = {"lease_until": ""}
+    if error is None:
+        update["state"] = DONE
+        unset["next_attempt_at"] = ""
+    elif phase["attempts"] >= WORKFLOW_MAX_ATTEMPTS:
+        update.update(state=FAILED, error=str(error))
+    else:
+        delay = WORKFLOW_RETRY_BASE_SECONDS * (2 ** (phase["attempts"] - 1))
+        update.update(state=PENDING, error=str(error), next_attempt_at=now + timedelta(seconds=delay))
+        logger.warning(f"[Job {phase['job_id']}] Phase {phase['phase']} will be retried in {delay}s")
+    await workflow_phase_collection.update_one(
+        {"_id": phase["_id"], "owner": WORKER_ID},
+        {"$set": update, "$unset": unset}
+    )
+
+async def _run_phase(phase: Dict[str, Any]) -> None:
+    handler = PHASE_HANDLERS[phase["phase"]]
+    renewer = asyncio.create_task(_renew_lease(phase["_id"]))
+    error = None
+    try:
+        result = handler(phase["job_id"])
+        if asyncio.iscoroutine(result):
+            await result
+    except TransitionNotReady as e:
+        logger.info(f"[Job {phase['job_id']}] Phase {phase['phase']} deferred: {e}")
+        renewer.cancel()
+        await _release_phase(phase, delay=WORKFLOW_POLL_SECONDS)
+        return
+    except Exception as e:
+        error = e
+        logger.error(f"[Job {phase['job_id']}] Phase {phase['phase']} failed: {e}")
+    finally:
+        renewer.cancel()
+    await _finish_phase(phase, error)
+
+async def run_due_phases():
+    """Claim every phase that is due and run up to WORKFLOW_CONCURRENCY of them at once."""
+    # Phases handed back this tick; excluded from further claims so the loop moves on
+    skipped: List[str] = []
+    running: Set[asyncio.Task] = set()
+    slots = asyncio.Semaphore(WORKFLOW_CONCURRENCY)
+
+    def finished(task: asyncio.Task) -> None:
+        running.discard(task)
+        slots.release()
+
+    while True:
+        await slots.acquire()
+        phase = await _claim_due_phase(skipped)
+        if phase is None:
+            slots.release()
+            break
+        if await _earlier_phase_unfinished(phase):
+            # It runs once its predecessor is done; other jobs' phases go ahead meanwhile
+            await _release_phase(phase)
+            skipped.append(phase["_id"])
+            slots.release()
+            continue
+        task = asyncio.create_task(_run_phase(phase))
+        running.add(task)
+        task.add_done_callback(finished)
+    await asyncio.gather(*running)
 
 def start_scheduler():
     if not scheduler.running:
+        # The first tick runs immediately so phases missed while down are caught up
+        scheduler.add_job(
+            run_due_phases, "interval",
+            seconds=WORKFLOW_POLL_SECONDS,
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True,
+            id="run_due_phases",
+            replace_existing=True
+        )
         scheduler.start()
-        logging.info("Scheduler started.")
+        logging.info(f"Scheduler started as {WORKER_ID}.")
 
 # Optional: Add a function to stop the scheduler gracefully
 def stop_scheduler():
     if scheduler.running:
         scheduler.shutdown()
-        logging.info("Scheduler stopped.")
\ No newline at end of file
+        logging.info("Scheduler stopped.")
@@ -1,21 +1,66 @@
-from sklearn.metrics.pairwise import cosine_similarity
-from fuzzywuzzy import process
-from sentence_transformers import SentenceTransformer, util
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from rapidfuzz import fuzz, process, utils
 import numpy as np
 from app.utils import normalize_experience
+from app.embedding_cache import EmbeddingCache
+from app.model_registry import get_embedding_model, EMBEDDING_MODEL_NAME
 
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+JOB_PROFILE_CACHE_SIZE = int(os.getenv("JOB_PROFILE_CACHE_SIZE", 512))
+
+# The model itself is only loaded when a text misses the cache
+embedding_cache = EmbeddingCache(get_embedding_model, EMBEDDING_MODEL_NAME)
+
+class LabelMatcher:
+    # Matches candidate labels to a fixed set of JD labels. The JD side is
+    # preprocessed once; every target label of every candidate in a batch is
+    # then scored in a single C-level cdist call with a score cutoff.
+    def __init__(self, source_labels, threshold=80):
+        self.source_labels = list(source_labels)
+        self.threshold = threshold
+        self._choices = [utils.default_process(label) for label in self.source_labels]
+
+    def _best_matches(self, target_labels):
+        if not target_labels or not self.source_labels:
+            return [None] * len(target_labels)
+        queries = [utils.default_process(label) for label in target_labels]
+        # fuzzywuzzy rounded WRatio to an int before comparing, so x.5 below the threshold still matched
+        scores = process.cdist(
+            queries, self._choices, scorer=fuzz.WRatio,
+            processor=None, score_cutoff=self.threshold - 0.5
+        )
+        best = scores.argmax(axis=1)
+        return [
+            self.source_labels[column] if scores[row, column] >= self.threshold - 0.5 else None
+            for row, column in enumerate(best)
+        ]
+
+    def match(self, target_labels):
+        return self.match_many([target_labels])[0]
+
+    def match_many(self, targets_labels):
+        flat = [label for labels in targets_labels for label in labels]
+        best = self._best_matches(flat)
+        results, offset = [], 0
+        for labels in targets_labels:
+            matched, unmatched = [], []
+            for label, match in zip(labels, best[offset:offset + len(labels)]):
+                if match is not None:
+                    matched.append(match)
+                else:
+                    unmatched.append(label)
+            results.append((matched, unmatched))
+            offset += len(labels)
+        return results
+
+@lru_cache(maxsize=256)
+def get_label_matcher(source_labels, threshold=80):
+    return LabelMatcher(source_labels, threshold)
 
 def fuzzy_match_labels(source_labels, target_labels, threshold=80):
-    matched = []
-    unmatched = []
-    for label in target_labels:
-        best_match, score = process.extractOne(label, source_labels)
-        if score >= threshold:
-            matched.append(best_match)
-        else:
-            unmatched.append(label)
-    return matched, unmatched
+    return get_label_matcher(tuple(source_labels), threshold).match(target_labels)
 
 def get_label_weights(labels, priority_labels=None, jd_labels=None):
     weights = {}
@@ -40,27 +85,78 @@ def get_label_weights(labels, priority_labels=None, jd_labels=None):
             weights[label] = 1.0
     return weights
 
-def compute_weighted_similarity(jd_labels, candidate_labels, priority_labels=None, use_semantic=False):
-    jd_normalized = [label.lower() for label in jd_labels]
-    candidate_normalized = [label.lower() for label in candidate_labels]
+class JobProfile:
+    # Everything about a JD that does not depend on the candidate, compiled once:
+    # the normalized label vocabulary, its weight vector (experience labels
+    # already weighted against the JD's requirement), the fuzzy matcher and
+    # (lazily) the JD embedding.
+    #
+    # The old per-pair computation built a weight vector over JD + candidate
+    # labels, but the candidate side was only non-zero on matched JD labels, so
+    # the cosine reduces to a sparse dot product over the JD vocabulary:
+    #   cos = sum(w[m]^2 for m in M) / (|w| * sqrt(sum(w[m]^2 for m in M)))
+    def __init__(self, jd_labels, priority_labels=None):
+        self.jd_labels = list(jd_labels)
+        normalized = [label.lower() for label in self.jd_labels]
+        self.vocabulary = list(dict.fromkeys(normalized))
+        self.positions = {label: i for i, label in enumerate(self.vocabulary)}
+        weights = get_label_weights(self.vocabulary, priority_labels, normalized)
+        self.weights = np.array([weights[label] for label in self.vocabulary], dtype=np.float64)
+        self.norm = float(np.sqrt(self.weights @ self.weights))
+        self.matcher = LabelMatcher(normalized)
+        self._embedding = None
+
+    @property
+    def embedding(self):
+        if self._embedding is None:
+            self._embedding = embedding_cache.encode(" ".join(self.jd_labels))
+        return self._embedding
 
-    matched_labels, unmatched_labels = fuzzy_match_labels(jd_normalized, candidate_normalized)
-    all_labels = list(set(jd_normalized + candidate_normalized))
-    weights = get_label_weights(all_labels, priority_labels, jd_normalized)
+    def _cosine(self, matched_labels):
+        rows = [self.positions[label] for label in set(matched_labels)]
+        if not rows or not self.norm:
+            return 0.0
+        matched_weights = self.weights[rows]
+        dot = float(matched_weights @ matched_weights)
+        return dot / (self.norm * np.sqrt(dot))
 
-    jd_vec = [weights[label] if label in jd_normalized else 0.0 for label in all_labels]
-    cand_vec = [weights[label] if label in matched_labels else 0.0 for label in all_labels]
+    def score_many(self, candidates_labels, use_semantic=False):
+        all_matches = self.matcher.match_many([[label.lower() for label in labels] for labels in candidates_labels])
+        scores = [self._cosine(matched) for matched, _ in all_matches]
+        if use_semantic and candidates_labels:
+            vectors = embedding_cache.encode_many([" ".join(labels) for labels in candidates_labels])
+            semantic = vectors @ self.embedding
+            scores = [(score + float(sem)) / 2 for score, sem in zip(scores, semantic)]
 
-    jd_vec = np.array(jd_vec).reshape(1, -1)
-    cand_vec = np.array(cand_vec).reshape(1, -1)
+        # we can show 'unmatched_labels' --> like extra skills...
+        return [
+            (round(score, 3), matched, list(set(self.vocabulary) - set(matched)))
+            for score, (matched, _) in zip(scores, all_matches)
+        ]
 
-    cosine_score = cosine_similarity(jd_vec, cand_vec)[0][0]
+    def score(self, candidate_labels, use_semantic=False):
+        return self.score_many([candidate_labels], use_semantic)[0]
 
-    if use_semantic:
-        jd_embed = embedding_model.encode(" ".join(jd_labels), convert_to_tensor=True)
-        cand_embed = embedding_model.encode(" ".join(candidate_labels), convert_to_tensor=True)
-        semantic_score = float(util.pytorch_cos_sim(jd_embed, cand_embed)[0][0])
-        cosine_score = (cosine_score + semantic_score) / 2
+_job_profiles = OrderedDict()
+_job_profiles_lock = Lock()
+
+def get_job_profile(jd_labels, priority_labels=None):
+    # Cached by the JD's content, so editing a job's requirements compiles a new profile
+    key = (tuple(jd_labels), tuple(priority_labels or ()))
+    with _job_profiles_lock:
+        profile = _job_profiles.get(key)
+        if profile is not None:
+            _job_profiles.move_to_end(key)
+            return profile
+    profile = JobProfile(jd_labels, priority_labels)
+    with _job_profiles_lock:
+        _job_profiles[key] = profile
+        while len(_job_profiles) > JOB_PROFILE_CACHE_SIZE:
+            _job_profiles.popitem(last=False)
+    return profile
+
+def compute_weighted_similarity(jd_labels, candidate_labels, priority_labels=None, use_semantic=False):
+    return get_job_profile(jd_labels, priority_labels).score(candidate_labels, use_semantic)
 
-    # we can show 'unmatched_labels' --> like extra skills...
-    return round(cosine_score, 3), matched_labels, list(set(jd_normalized) - set(matched_labels))
+def compute_weighted_similarity_batch(jd_labels, candidates_labels, priority_labels=None, use_semantic=False):
+    return get_job_profile(jd_labels, priority_labels).score_many(candidates_labels, use_semantic)
@@ -0,0 +1,84 @@
+# app/shortlist.py
+"""
+Server-side top-k selection over a job's applications.
+
+Applications are ranked by (resume_score desc, _id desc), which the
+job_user(job_id, resume_score, _id) index serves directly. Instead of loading
+every application, we count them, read the single document at rank k (the
+cutoff) and express "selected" and "not selected" as range predicates relative
+to it, so memory stays constant however many people applied.
+
+Only applications whose resume has been scored are ranked. Ones still queued or
+processing in the ingest queue (or dead-lettered) have no score yet and are left
+alone rather than ranked last.
+"""
+from typing import Any, Dict, Optional
+from bson import ObjectId
+from db import job_user_collection
+from app.ingest_queue import DONE as INGEST_DONE
+
+RANK_SORT = [("resume_score", -1), ("_id", -1)]
+# Applications from before the ingest queue have no ingest_state and were scored inline
+RANKED = {"ingest_state": {"$in": [INGEST_DONE, None]}}
+
+
+def ranked_filter(job_id: ObjectId) -> Dict[str, Any]:
+    """Applications of a job that take part in the ranking."""
+    return {"job_id": job_id, **RANKED}
+
+
+async def find_cutoff(job_id: ObjectId, percentage: float) -> Optional[Dict[str, Any]]:
+    """
+    Locate the lowest-ranked application that still makes the top percentage.
+
+    Returns:
+        Optional[Dict[str, Any]]: total applications, number selected and the
+        cutoff's score and _id, or None when the job has no applications
+    """
+    total = await job_user_collection.count_documents(ranked_filter(job_id))
+    if not total:
+        return None
+
+    num_to_select = max(1, int(total * percentage))
+    docs = await (
+        job_user_collection.find(ranked_filter(job_id), {"resume_score": 1})
+        .sort(RANK_SORT)
+        .skip(num_to_select - 1)
+        .limit(1)
+        .to_list(length=1)
+    )
+    if not docs:
+        return None
+    return {
+        "total": total,
+        "selected": num_to_select,
+        "score": docs[0].get("resume_score"),
+        "_id": docs[0]["_id"],
+    }
+
+
+def selected_filter(job_id: ObjectId, cutoff: Dict[str, Any]) -> Dict[str, Any]:
+    """Applications ranked at or above the cutoff."""
+    score, cutoff_id = cutoff["score"], cutoff["_id"]
+    if score is None:
+        # Missing scores rank last, so everything scored is above the cutoff
+        return {**ranked_filter(job_id), "$or": [
+            {"resume_score": {"$ne": None}},
+            {"resume_score": None, "_id": {"$gte": cutoff_id}},
+        ]}
+    return {**ranked_filter(job_id), "$or": [
+        {"resume_score": {"$gt": score}},
+        {"resume_score": score, "_id": {"$gte": cutoff_id}},
+    ]}
+
+
+def rejected_filter(job_id: ObjectId, cutoff: Dict[str, Any]) -> Dict[str, Any]:
+    """Applications ranked below the cutoff (the complement of selected_filter)."""
+    score, cutoff_id = cutoff["score"], cutoff["_id"]
+    if score is None:
+        return {**ranked_filter(job_id), "resume_score": None, "_id": {"$lt": cutoff_id}}
+    return {**ranked_filter(job_id), "$or": [
+        {"resume_score": {"$lt": score}},
+        {"resume_score": score, "_id": {"$lt": cutoff_id}},
+        {"resume_score": None},
+    ]}
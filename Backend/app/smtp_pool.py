@@ -0,0 +1,150 @@
+# app/smtp_pool.py
+"""
+Pooled SMTP delivery.
+
+A bounded set of authenticated sessions is kept open and reused, so bulk
+notifications pay the TCP + STARTTLS + AUTH handshake once per connection
+rather than once per email. Sends run concurrently (one per pooled session),
+are rate-limited to the provider's quota and retried with exponential backoff
+before the caller (the notification outbox) records a failure.
+"""
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from typing import Optional
+import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` acquisitions per second with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class SMTPPool:
+    def __init__(
+            self,
+            hostname: str,
+            port: int,
+            username: Optional[str] = None,
+            password: Optional[str] = None,
+            start_tls: bool = True,
+            size: int = 5,
+            rate_per_second: float = 10,
+            max_retries: int = 3,
+            retry_base_seconds: float = 1.0,
+            timeout: float = 30
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.size = size
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate_per_second)
+        self._idle: Optional[asyncio.LifoQueue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _ensure_started(self) -> None:
+        # Created lazily so they bind to the running event loop
+        if self._slots is None:
+            self._idle = asyncio.LifoQueue()
+            self._slots = asyncio.Semaphore(self.size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            start_tls=self.start_tls,
+            timeout=self.timeout
+        )
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password)
+        return client
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connected session, opening one if none is idle; at most `size` exist."""
+        self._ensure_started()
+        async with self._slots:
+            client = None
+            while not self._idle.empty():
+                candidate = self._idle.get_nowait()
+                if candidate.is_connected:
+                    client = candidate
+                    break
+            if client is None:
+                client = await self._connect()
+            try:
+                yield client
+            except Exception:
+                # The session may be in an unknown state; never hand it out again
+                await self._discard(client)
+                raise
+            else:
+                self._idle.put_nowait(client)
+
+    async def _discard(self, client: aiosmtplib.SMTP) -> None:
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def send(self, message: EmailMessage) -> None:
+        async with self.connection() as client:
+            await self.rate_limiter.acquire()
+            await client.send_message(message)
+
+    async def send_with_retry(self, message: EmailMessage) -> int:
+        """
+        Send one message, retrying with exponential backoff.
+
+        Returns:
+            int: Number of attempts made
+
+        Raises:
+            The last error once max_retries attempts have failed.
+        """
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self.send(message)
+                return attempt
+            except (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_base_seconds * (2 ** (attempt - 1))
+                logger.warning(f"Send to {message['To']} failed (attempt {attempt}), retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
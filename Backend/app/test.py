@@ -1,4 +1,5 @@
-from resume_parser import extract_and_score_resume
+import asyncio
+from app.resume_parser import extract_and_score_resume
 
 # Sample data
 resume_text = """
@@ -19,5 +20,5 @@ requirements = [
 ]
 
 # Call the function
-result = extract_and_score_resume(resume_text, requirements)
+result = asyncio.run(extract_and_score_resume(resume_text, requirements))
 print(result)
\ No newline at end of file
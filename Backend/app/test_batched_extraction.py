@@ -0,0 +1,77 @@
+# test_batched_extraction.py
+# Exercises batched resume extraction against app/fake_gemini.py; no Gemini key needed.
+import json
+import asyncio
+import uuid
+import pytest
+from app.fake_gemini import FakeGeminiServer, default_responder
+from app.model_registry import registry, GEMINI
+from app.result_cache import build_result_cache
+from app import resume_parser
+
+@pytest.fixture
+def fake(monkeypatch):
+    server = FakeGeminiServer().start()
+    monkeypatch.setenv("GEMINI_API_ENDPOINT", server.endpoint)
+    monkeypatch.setenv("GEMINI_API", "test-key")
+    monkeypatch.setattr(resume_parser, "resume_cache", build_result_cache("resume", "memory", None, 1024, 3600))
+    # The Gemini client is configured on first use; reload it against this server and again after it
+    registry.reset(GEMINI)
+    yield server
+    registry.reset(GEMINI)
+    server.stop()
+
+def make_resumes(count: int, tag: str = ""):
+    run = uuid.uuid4().hex[:6]
+    return [f"Name: Candidate {tag}{i} {run}\nSkills: python, docker, skill{i}" for i in range(count)]
+
+def test_packs_resumes_into_one_request(fake):
+    texts = make_resumes(5)
+    profiles = asyncio.run(resume_parser.extract_resume_profiles(texts))
+
+    assert len(fake.prompts) == 1
+    assert [p["name"] for p in profiles] == [t.splitlines()[0][len("Name: "):] for t in texts]
+    assert profiles[3]["skills"] == ["python", "docker", "skill3"]
+
+def test_invalid_items_fall_back_to_single_calls(fake):
+    def corrupt_batches(prompt):
+        reply = default_responder(prompt)
+        items = json.loads(reply)
+        if isinstance(items, list):
+            items[1]["skills"] = "not a list"
+            del items[2]
+        return json.dumps(items)
+
+    fake.responder = corrupt_batches
+    texts = make_resumes(4, tag="fallback")
+    profiles = asyncio.run(resume_parser.extract_resume_profiles(texts))
+
+    # One batched request plus a single-resume request for each bad item
+    assert len(fake.prompts) == 3
+    assert all("error" not in p for p in profiles)
+    assert profiles[1]["skills"] == ["python", "docker", "skill1"]
+
+def test_single_extraction_is_validated(fake):
+    def missing_skills(prompt):
+        profile = json.loads(default_responder(prompt))
+        profile["skills"] = "N/A"
+        return json.dumps(profile)
+
+    fake.responder = missing_skills
+    [text] = make_resumes(1, tag="single")
+    profile = asyncio.run(resume_parser.extract_resume_profile(text))
+
+    assert "error" not in profile
+    assert profile["skills"] == []
+    # A cached profile from before validation is not iterated character by character
+    assert resume_parser.profile_labels({"skills": "N/A"}) == []
+
+def test_token_budget_splits_batches_and_cache_skips_repeats(fake, monkeypatch):
+    monkeypatch.setattr(resume_parser, "RESUME_BATCH_TOKEN_BUDGET", 40)
+    texts = make_resumes(4, tag="budget")
+    asyncio.run(resume_parser.extract_resume_profiles(texts + texts[:1]))
+    assert len(fake.prompts) == 4
+
+    fake.prompts.clear()
+    asyncio.run(resume_parser.extract_resume_profiles(texts))
+    assert fake.prompts == []
@@ -0,0 +1,42 @@
+# test_label_matcher.py
+# Compares the rapidfuzz LabelMatcher with the fuzzywuzzy extractOne loop it replaced.
+import random
+import pytest
+from app.scorer import LabelMatcher
+from app.bench_label_matcher import random_label, fuzzywuzzy_match
+
+pytest.importorskip("fuzzywuzzy")
+
+JD = ["python", "node.js", "spring boot", "machine learning", "3 years experience", "docker"]
+
+@pytest.mark.parametrize("label", [
+    "python", "PYTHON", "pyhton", "node", "nodejs", "spring", "spring boot developer",
+    "machine-learning", "2 years experience", "dockr", "kubernetes", "cobol", "",
+])
+def test_clear_cases_match_like_fuzzywuzzy(label):
+    assert LabelMatcher(JD).match([label]) == fuzzywuzzy_match(JD, [label])
+
+def test_random_labels_get_the_same_decision():
+    # WRatio's partial ratio is exact in rapidfuzz and heuristic in fuzzywuzzy, so a
+    # few labels right at the threshold may be decided differently
+    rng = random.Random(3)
+    total = agree = 0
+    for _ in range(300):
+        jd = [random_label(rng) for _ in range(rng.randint(1, 12))]
+        candidate = [random_label(rng) for _ in range(rng.randint(1, 12))]
+        _, unmatched = LabelMatcher(jd).match(candidate)
+        _, expected_unmatched = fuzzywuzzy_match(jd, candidate)
+        total += len(candidate)
+        agree += sum((label in unmatched) == (label in expected_unmatched) for label in candidate)
+    assert agree / total >= 0.99
+
+def test_match_many_equals_match_per_candidate():
+    rng = random.Random(5)
+    jd = [random_label(rng) for _ in range(20)]
+    candidates = [[random_label(rng) for _ in range(rng.randint(0, 15))] for _ in range(30)]
+    matcher = LabelMatcher(jd)
+    assert matcher.match_many(candidates) == [matcher.match(labels) for labels in candidates]
+
+def test_empty_sides():
+    assert LabelMatcher([]).match(["python"]) == ([], ["python"])
+    assert LabelMatcher(JD).match([]) == ([], [])
@@ -1,15 +0,0 @@
-# # test_notification_service.py
-# import asyncio
-# from app.notification_service import send_coding_round_emails
-#
-# async def test_send_coding_round_emails():
-#     # Replace with a valid job_id and user IDs from your database
-#     job_id = "683308bd4d7fa7194497983e"  # Example Job ID
-#     selected_candidates = ["6832bc9a4a7fe5a9cacf2762"]  # Example User IDs
-#
-#     # Call the function
-#     await send_coding_round_emails(job_id, selected_candidates)
-#
-# # Run the test
-# if __name__ == "__main__":
-#     asyncio.run(test_send_coding_round_emails())
\ No newline at end of file
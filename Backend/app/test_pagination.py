@@ -0,0 +1,55 @@
+# test_pagination.py
+# Walks keyset pages over an in-memory Mongo (mongomock) with many ties on the sort key.
+import json
+import asyncio
+import mongomock
+from mongomock_motor import AsyncMongoMockClient
+from app.pagination import PageParams, encode_cursor, decode_cursor, keyset_filter, paginated_response
+
+def make_docs():
+    # Few distinct values (including missing ones) so most pages end inside a run of ties
+    return [{"_id": i, "score": [None, 10, 20, 20, 30][i % 5]} for i in range(40)]
+
+def walk(collection, sort_field, direction, page_size):
+    sort_spec = [(sort_field, direction), ("_id", direction)]
+    seen, cursor = [], None
+    while True:
+        query = keyset_filter(sort_field, direction, decode_cursor(cursor)) if cursor else {}
+        docs = list(collection.find(query).sort(sort_spec).limit(page_size))
+        if not docs:
+            return seen
+        seen.extend(doc["_id"] for doc in docs)
+        cursor = encode_cursor(docs[-1], sort_field)
+
+def test_keyset_pages_visit_every_document_once_despite_ties():
+    collection = mongomock.MongoClient().db.jobs
+    collection.insert_many(make_docs())
+    for direction in (1, -1):
+        expected = [doc["_id"] for doc in collection.find().sort([("score", direction), ("_id", direction)])]
+        for page_size in (1, 3, 7):
+            assert walk(collection, "score", direction, page_size) == expected
+
+def test_keyset_on_id_only():
+    assert keyset_filter("_id", 1, {"id": 5}) == {"_id": {"$gt": 5}}
+    assert keyset_filter("_id", -1, {"id": 5}) == {"_id": {"$lt": 5}}
+
+def page(limit=None, cursor=None):
+    return PageParams(limit=limit, cursor=cursor, sort="score", fields=None, format="json")
+
+def test_without_limit_or_cursor_the_full_list_is_returned():
+    async def run():
+        collection = AsyncMongoMockClient()["db"]["jobs"]
+        await collection.insert_many(make_docs())
+        everything = await paginated_response(collection, {}, page(), dict, sortable=("score",))
+        first = await paginated_response(collection, {}, page(limit=15), dict, sortable=("score",))
+        rest = await paginated_response(
+            collection, {}, page(cursor=first.headers["X-Next-Cursor"], limit=100), dict, sortable=("score",)
+        )
+        return everything, first, rest
+
+    everything, first, rest = asyncio.run(run())
+    assert len(json.loads(everything.body)) == 40
+    assert "X-Next-Cursor" not in everything.headers
+    assert len(json.loads(first.body)) == 15
+    assert len(json.loads(rest.body)) == 25
+    assert "X-Next-Cursor" not in rest.headers
@@ -0,0 +1,55 @@
+# test_pdf_extractor.py
+# A worker that hangs or dies gets its pool killed and replaced, so later extractions still run.
+import io
+import os
+import time
+import asyncio
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from app import pdf_extractor
+
+pypdf = pytest.importorskip("pypdf")
+
+def blank_pdf(pages):
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def hang(file_bytes):
+    time.sleep(60)
+
+def crash(file_bytes):
+    os._exit(1)
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    pdf_extractor.shutdown_pdf_pool()
+    yield
+    pdf_extractor.shutdown_pdf_pool()
+
+def test_timeout_kills_the_stuck_worker_and_replaces_the_pool():
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await pdf_extractor._run_in_pool(hang, b"", 0.5)
+        return await pdf_extractor.count_pdf_pages_async(blank_pdf(3))
+
+    pool = pdf_extractor._get_pool()
+    # Start the workers so there is a process table to inspect
+    pool.submit(os.getpid).result()
+    workers = list(pool._processes.values())
+    assert asyncio.run(run()) == 3
+    assert pdf_extractor._pool is not pool
+    for worker in workers:
+        worker.join(5)
+        assert not worker.is_alive()
+
+def test_broken_pool_is_replaced():
+    async def run():
+        with pytest.raises(BrokenProcessPool):
+            await pdf_extractor._run_in_pool(crash, b"", 5)
+        return await pdf_extractor.count_pdf_pages_async(blank_pdf(2))
+
+    assert asyncio.run(run()) == 2
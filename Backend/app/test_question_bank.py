@@ -0,0 +1,42 @@
+# test_question_bank.py
+# Near-duplicate filtering of generated questions and topic-set normalisation.
+from app.question_bank import dedupe_questions, normalize_topics, bank_key
+
+def qa(question):
+    return {"question": question, "answer": "a"}
+
+def test_drops_near_duplicates_of_the_bank():
+    existing = ["What is a Python decorator?", "Explain the Java memory model."]
+    candidates = [
+        qa("what is a python   decorator"),
+        qa("Explain the memory model of Java."),
+        qa("How does the React virtual DOM work?"),
+    ]
+    assert dedupe_questions(candidates, existing) == [candidates[2]]
+
+def test_drops_duplicates_within_the_batch_keeping_the_first():
+    candidates = [
+        qa("How do Spring Boot starters work?"),
+        qa("How do Spring Boot starters work ?"),
+        qa("What is dependency injection in Spring?"),
+    ]
+    assert dedupe_questions(candidates, []) == [candidates[0], candidates[2]]
+
+def test_related_but_different_questions_are_kept():
+    existing = ["What is a Python list comprehension?"]
+    candidates = [
+        qa("What is a Python generator expression?"),
+        qa("What is a Python list?"),
+        qa("When would you use a Python dict comprehension over a loop?"),
+    ]
+    assert dedupe_questions(candidates, existing) == candidates
+
+def test_threshold_controls_what_counts_as_the_same():
+    existing = ["What is a Python list comprehension?"]
+    candidate = [qa("What is a Python dict comprehension?")]
+    assert dedupe_questions(candidate, existing, threshold=100) == candidate
+    assert dedupe_questions(candidate, existing, threshold=80) == []
+
+def test_topic_sets_ignore_case_spacing_order_and_repeats():
+    assert normalize_topics(["React", " java  ", "java", ""]) == ["java", "react"]
+    assert bank_key(normalize_topics(["Java", "react"])) == bank_key(normalize_topics(["react ", "JAVA"]))
@@ -0,0 +1,70 @@
+# test_result_cache.py
+# Concurrent misses on one key share a single computation; failures reach every waiter and are not cached.
+import asyncio
+import pytest
+from app.result_cache import ResultCache, MemoryBackend
+
+def make_cache():
+    return ResultCache("test", [MemoryBackend(max_entries=16, ttl_seconds=60)])
+
+def test_concurrent_misses_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"score": 7}
+
+    async def run():
+        cache = make_cache()
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(10)))
+        again = await cache.get_or_compute("k", compute)
+        return cache, results, again
+
+    cache, results, again = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [{"score": 7}] * 10
+    assert again == {"score": 7}
+    assert cache.coalesced == 9
+    assert cache.stats()["in_flight"] == 0
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("model unavailable")
+
+    async def succeeding():
+        return "ok"
+
+    async def run():
+        cache = make_cache()
+        results = await asyncio.gather(
+            *(cache.get_or_compute("k", failing) for _ in range(5)), return_exceptions=True
+        )
+        retried = await cache.get_or_compute("k", succeeding)
+        return results, retried
+
+    results, retried = asyncio.run(run())
+    assert len(attempts) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "ok"
+
+def test_cancelled_caller_does_not_cancel_the_shared_computation():
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        cache = make_cache()
+        first = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        second = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "value"
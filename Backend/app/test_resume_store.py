@@ -0,0 +1,29 @@
+# test_resume_store.py
+# Range header parsing used by the resume download route.
+import pytest
+from app.resume_store import parse_range_header
+
+def test_no_or_unsupported_range_serves_whole_file():
+    assert parse_range_header(None, 100) is None
+    assert parse_range_header("items=0-10", 100) is None
+    assert parse_range_header("bytes=0-10,20-30", 100) is None
+
+def test_closed_range():
+    assert parse_range_header("bytes=0-9", 100) == (0, 9)
+    assert parse_range_header("bytes=10-10", 100) == (10, 10)
+    # An end past the file is clamped to the last byte
+    assert parse_range_header("bytes=90-500", 100) == (90, 99)
+
+def test_open_range_runs_to_end_of_file():
+    assert parse_range_header("bytes=40-", 100) == (40, 99)
+    assert parse_range_header("bytes=99-", 100) == (99, 99)
+
+def test_suffix_range_is_the_last_n_bytes():
+    assert parse_range_header("bytes=-10", 100) == (90, 99)
+    # Asking for more than the file holds returns all of it
+    assert parse_range_header("bytes=-500", 100) == (0, 99)
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-200", "bytes=20-10", "bytes=-0", "bytes=abc-", "bytes=-"])
+def test_unsatisfiable_or_malformed_ranges_raise(header):
+    with pytest.raises(ValueError):
+        parse_range_header(header, 100)
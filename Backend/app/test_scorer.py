@@ -0,0 +1,55 @@
+# test_scorer.py
+# Checks the compiled JobProfile against the original per-pair cosine over JD + candidate labels.
+import random
+import numpy as np
+from app.scorer import LabelMatcher, JobProfile, get_label_weights, compute_weighted_similarity_batch
+
+SKILLS = [
+    "python", "java", "react", "node.js", "mongodb", "docker", "kubernetes", "aws",
+    "fastapi", "django", "spring boot", "rest api", "redis", "kafka", "git", "linux",
+]
+EXPERIENCE = ["1 year experience", "2 years", "3+ yr exp", "5 years experience", "10 yrs"]
+
+def reference_score(jd_labels, candidate_labels, priority_labels=None):
+    # The scorer before JobProfile: a dense weight vector over JD + candidate labels
+    jd_normalized = [label.lower() for label in jd_labels]
+    candidate_normalized = [label.lower() for label in candidate_labels]
+    matched_labels, _ = LabelMatcher(jd_normalized).match(candidate_normalized)
+    all_labels = list(set(jd_normalized + candidate_normalized))
+    weights = get_label_weights(all_labels, priority_labels, jd_normalized)
+
+    jd_vec = np.array([weights[label] if label in jd_normalized else 0.0 for label in all_labels])
+    cand_vec = np.array([weights[label] if label in matched_labels else 0.0 for label in all_labels])
+    norms = np.linalg.norm(jd_vec) * np.linalg.norm(cand_vec)
+    cosine_score = float(jd_vec @ cand_vec / norms) if norms else 0.0
+    return round(cosine_score, 3), matched_labels, list(set(jd_normalized) - set(matched_labels))
+
+def random_labels(rng, low, high):
+    labels = rng.sample(SKILLS, rng.randint(low, high))
+    labels = [label.upper() if rng.random() < 0.2 else label for label in labels]
+    if rng.random() < 0.5:
+        labels.append(rng.choice(EXPERIENCE))
+    if labels and rng.random() < 0.2:
+        labels.append(labels[0])
+    return labels
+
+def test_job_profile_matches_reference_on_random_cases():
+    rng = random.Random(7)
+    for _ in range(3000):
+        jd_labels = random_labels(rng, 0, 8)
+        candidate_labels = random_labels(rng, 0, 10)
+        priority_labels = [label.lower() for label in rng.sample(jd_labels, min(len(jd_labels), rng.randint(0, 2)))]
+
+        score, matched, missing = JobProfile(jd_labels, priority_labels).score(candidate_labels)
+        expected_score, expected_matched, expected_missing = reference_score(jd_labels, candidate_labels, priority_labels)
+
+        assert abs(score - expected_score) <= 0.001, (jd_labels, candidate_labels, priority_labels)
+        assert matched == expected_matched
+        assert sorted(missing) == sorted(expected_missing)
+
+def test_batch_scores_equal_single_scores():
+    rng = random.Random(11)
+    jd_labels = random_labels(rng, 3, 8)
+    candidates = [random_labels(rng, 0, 10) for _ in range(50)]
+    profile = JobProfile(jd_labels)
+    assert compute_weighted_similarity_batch(jd_labels, candidates) == [profile.score(labels) for labels in candidates]
@@ -0,0 +1,60 @@
+# test_shortlist.py
+# selected_filter/rejected_filter around the cutoff, with ties, missing scores and unscored applications.
+import asyncio
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from app import shortlist
+
+def rank(docs):
+    # Mongo's (resume_score desc, _id desc): missing scores sort lowest
+    return sorted(docs, key=lambda doc: (doc["resume_score"] is not None, doc["resume_score"] or 0, doc["_id"]), reverse=True)
+
+def make_applications(job_id, scores):
+    docs = [{"_id": ObjectId(), "job_id": job_id, "resume_score": score, "ingest_state": "done"} for score in scores]
+    # Scored before the ingest queue existed: no ingest_state, still ranked
+    docs[0].pop("ingest_state")
+    return docs
+
+@pytest.mark.parametrize("scores", [
+    [80, 70, 70, 70, 70, 60, 50],
+    [90, 90, 90, 90],
+    [70, None, 70, None, 40, None],
+    [None, None, None],
+])
+@pytest.mark.parametrize("percentage", [0.1, 0.3, 0.5, 0.75, 1.0])
+def test_filters_split_ranking_exactly_at_cutoff(monkeypatch, scores, percentage):
+    collection = AsyncMongoMockClient()["db"]["job_user"]
+    monkeypatch.setattr(shortlist, "job_user_collection", collection)
+    job_id = ObjectId()
+    ranked = make_applications(job_id, scores)
+    unscored = {"_id": ObjectId(), "job_id": job_id, "resume_score": None, "ingest_state": "queued"}
+    other_job = {"_id": ObjectId(), "job_id": ObjectId(), "resume_score": 100, "ingest_state": "done"}
+
+    async def run():
+        await collection.insert_many(ranked + [unscored, other_job])
+        cutoff = await shortlist.find_cutoff(job_id, percentage)
+        selected = [doc["_id"] async for doc in collection.find(shortlist.selected_filter(job_id, cutoff))]
+        rejected = [doc["_id"] async for doc in collection.find(shortlist.rejected_filter(job_id, cutoff))]
+        return cutoff, selected, rejected
+
+    cutoff, selected, rejected = asyncio.run(run())
+    expected = [doc["_id"] for doc in rank(ranked)]
+    count = max(1, int(len(ranked) * percentage))
+
+    assert cutoff["total"] == len(ranked)
+    assert cutoff["_id"] == expected[count - 1]
+    assert sorted(selected) == sorted(expected[:count])
+    assert sorted(rejected) == sorted(expected[count:])
+    assert unscored["_id"] not in selected + rejected
+
+def test_no_ranked_applications_means_no_cutoff(monkeypatch):
+    collection = AsyncMongoMockClient()["db"]["job_user"]
+    monkeypatch.setattr(shortlist, "job_user_collection", collection)
+    job_id = ObjectId()
+
+    async def run():
+        await collection.insert_one({"job_id": job_id, "resume_score": None, "ingest_state": "processing"})
+        return await shortlist.find_cutoff(job_id, 0.5)
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,56 @@
+# test_smtp_pool.py
+# Exercises SMTPPool against a local aiosmtpd server; no real mail provider needed.
+import asyncio
+from email.message import EmailMessage
+from aiosmtpd.controller import Controller
+from app.smtp_pool import SMTPPool
+
+class RecordingHandler:
+    def __init__(self):
+        self.recipients = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recipients.extend(envelope.rcpt_tos)
+        self.sessions.add(session.peer)
+        return "250 Message accepted for delivery"
+
+class EphemeralController(Controller):
+    """Listens on a port picked by the OS (port 0) and exposes it as .port once started."""
+
+    def _trigger_server(self):
+        self.port = self.server.sockets[0].getsockname()[1]
+        super()._trigger_server()
+
+def build_message(to_email: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "hr@example.com"
+    message["To"] = to_email
+    message["Subject"] = "Pool test"
+    message.set_content("Hello")
+    return message
+
+def test_concurrent_sends_reuse_pooled_sessions():
+    handler = RecordingHandler()
+    controller = EphemeralController(handler, hostname="127.0.0.1", port=0)
+    controller.start()
+    try:
+        async def run():
+            pool = SMTPPool("127.0.0.1", controller.port, start_tls=False, size=3, rate_per_second=0)
+            recipients = [f"candidate{i}@example.com" for i in range(50)]
+            attempts = await asyncio.gather(*(pool.send_with_retry(build_message(to)) for to in recipients))
+            await pool.close()
+            return recipients, attempts
+
+        recipients, attempts = asyncio.run(run())
+    finally:
+        controller.stop()
+
+    assert attempts == [1] * len(recipients)
+    assert sorted(handler.recipients) == sorted(recipients)
+    # 50 messages went over at most 3 reused sessions
+    assert len(handler.sessions) <= 3
+
+# Run the test
+if __name__ == "__main__":
+    test_concurrent_sends_reuse_pooled_sessions()
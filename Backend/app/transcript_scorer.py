@@ -1,32 +1,95 @@
 import os
 import json
+import asyncio
 import logging
 from typing import Dict, Any, Union, List
-from dotenv import load_dotenv
-import google.generativeai as genai
+from app.llm_client import generate_text, parse_json_response
+from app.result_cache import build_result_cache, make_key, normalize_text
+from db import transcript_cache_collection
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+TRANSCRIPT_CACHE_BACKENDS = os.getenv("TRANSCRIPT_CACHE_BACKENDS", "memory,mongo")
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", 1024))
+TRANSCRIPT_CACHE_TTL_SECONDS = float(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+# Longer questions/answers are truncated so a single turn's prompt stays bounded
+TRANSCRIPT_TURN_MAX_CHARS = int(os.getenv("TRANSCRIPT_TURN_MAX_CHARS", 4000))
 
-# Get API key
-GEMINI_API_KEY = os.getenv("GEMINI_API")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API key not found in environment variables")
+transcript_cache = build_result_cache(
+    "transcript", TRANSCRIPT_CACHE_BACKENDS, transcript_cache_collection,
+    TRANSCRIPT_CACHE_MAX_ENTRIES, TRANSCRIPT_CACHE_TTL_SECONDS
+)
 
-try:
-    # Configure Gemini API
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel("gemini-1.5-flash")
-except Exception as e:
-    logger.error(f"Failed to initialize Gemini API: {e}")
-    raise
 
+def normalize_turns(turns: List[Dict[str, str]]) -> List[List[str]]:
+    """
+    Canonical form of a role/content transcript: [role, content] pairs with the role
+    lowercased, whitespace collapsed and empty turns dropped, so a retried submission
+    that only differs in formatting maps to the same pairs.
+    """
+    pairs = []
+    for turn in turns:
+        content = normalize_text(str(turn.get("content") or ""))
+        if content:
+            pairs.append([str(turn.get("role") or "").strip().lower(), content])
+    return pairs
+
+
+def transcript_key(turns: List[Dict[str, str]]) -> str:
+    """Cache key for the score of a role/content transcript."""
+    return make_key("transcript-score", normalize_turns(turns))
+
+
+def _format_transcript(transcript: Union[str, List[Dict[str, str]]]) -> str:
+    # Handle list input by converting it to a formatted string
+    if isinstance(transcript, list):
+        transcript = "\n".join(
+            f"bot: {item.get('bot', item.get('question', '')).strip()}\nuser: {item.get('user', item.get('answer', '')).strip()}"
+            for item in transcript
+        )
+
+    if not isinstance(transcript, str) or not transcript.strip():
+        raise ValueError("Transcript must be a non-empty string.")
+    return transcript
+
+
+async def _score_transcript(transcript: Union[str, List[Dict[str, str]]]) -> Dict[str, Any]:
+    transcript = _format_transcript(transcript)
+
+    prompt = f"""
+    You are a senior technical interviewer. Below is the transcript of a technical interview:
+
+    ---
+    {transcript}
+    ---
+
+    1. Evaluate the candidate's responses in terms of technical correctness, depth, and clarity.
+    2. Assign a score out of 100.
+    3. Provide 2-3 bullet points of constructive feedback.
+
+    Respond strictly in this JSON format:
+    {{
+        "score": 85,
+        "feedback": [
+            "Answer to question 2 lacked detail on database indexing.",
+            "Great explanation of REST principles."
+        ]
+    }}
+    """
+
+    response_text = await generate_text(prompt)
+
+    # Parse the JSON response
+    result = parse_json_response(response_text)
 
-def score_transcript(transcript: Union[str, List[Dict[str, str]]]) -> Dict[str, Any]:
+    # Ensure the score is within the valid range
+    result["score"] = max(0, min(100, float(result.get("score", 0))))
+    return result
+
+
+async def score_transcript(transcript: Union[str, List[Dict[str, str]]]) -> Dict[str, Any]:
     """
     Score the given interview transcript based on technical correctness and quality of answers.
 
@@ -38,52 +101,7 @@ def score_transcript(transcript: Union[str, List[Dict[str, str]]]) -> Dict[str,
         Dict[str, Any]: A dictionary with a score and optional feedback.
     """
     try:
-        # Handle list input by converting it to a formatted string
-        if isinstance(transcript, list):
-            transcript = "\n".join(
-                f"bot: {item.get('bot', item.get('question', '')).strip()}\nuser: {item.get('user', item.get('answer', '')).strip()}"
-                for item in transcript
-            )
-
-        if not isinstance(transcript, str) or not transcript.strip():
-            raise ValueError("Transcript must be a non-empty string.")
-
-        prompt = f"""
-        You are a senior technical interviewer. Below is the transcript of a technical interview:
-
-        ---
-        {transcript}
-        ---
-
-        1. Evaluate the candidate's responses in terms of technical correctness, depth, and clarity.
-        2. Assign a score out of 100.
-        3. Provide 2-3 bullet points of constructive feedback.
-
-        Respond strictly in this JSON format:
-        {{
-            "score": 85,
-            "feedback": [
-                "Answer to question 2 lacked detail on database indexing.",
-                "Great explanation of REST principles."
-            ]
-        }}
-        """
-
-        response = model.generate_content(prompt)
-
-        if not response or not response.text:
-            raise ValueError("Empty response from Gemini API")
-
-        # Parse the JSON response
-        try:
-            result = json.loads(response.text)
-        except json.JSONDecodeError:
-            json_str = response.text[response.text.find("{"):response.text.rfind("}") + 1]
-            result = json.loads(json_str)
-
-        # Ensure the score is within the valid range
-        result["score"] = max(0, min(100, float(result.get("score", 0))))
-        return result
+        return await _score_transcript(transcript)
 
     except Exception as e:
         logger.error(f"Error in score_transcript: {e}")
@@ -93,6 +111,88 @@ def score_transcript(transcript: Union[str, List[Dict[str, str]]]) -> Dict[str,
         }
 
 
+async def score_conversation(turns: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Score a role/content transcript (as posted by the interview client), reusing the result
+    for identical transcripts.
+
+    Results are cached by transcript_key(), so a retried submission gets the same score
+    without another Gemini call, and concurrent identical submissions share one call.
+    Failed scorings are not cached.
+
+    Args:
+        turns (List[Dict[str, str]]): Items with "role" ("assistant" for the interviewer) and "content".
+
+    Returns:
+        Dict[str, Any]: A dictionary with a score and optional feedback.
+    """
+    pairs = normalize_turns(turns)
+    transcript = [{"bot": content} if role == "assistant" else {"user": content} for role, content in pairs]
+    try:
+        return await transcript_cache.get_or_compute(
+            transcript_key(turns), lambda: _score_transcript(transcript)
+        )
+    except Exception as e:
+        logger.error(f"Error in score_conversation: {e}")
+        return {
+            "score": 0,
+            "feedback": [f"Error occurred while processing: {str(e)}"]
+        }
+
+
+def turn_key(question: str, answer: str) -> str:
+    """Cache key for the score of a single question/answer exchange."""
+    return make_key("transcript-turn", normalize_text(question), normalize_text(answer))
+
+
+async def _score_turn(question: str, answer: str) -> Dict[str, Any]:
+    prompt = f"""
+    You are a senior technical interviewer. Below is one exchange from a technical interview:
+
+    ---
+    bot: {question[:TRANSCRIPT_TURN_MAX_CHARS]}
+    user: {answer[:TRANSCRIPT_TURN_MAX_CHARS]}
+    ---
+
+    1. Decide whether the bot asked a technical question (greetings, small talk and logistics are not technical).
+    2. If it did, evaluate the answer in terms of technical correctness, depth, and clarity and assign a score out of 100.
+    3. Provide one sentence of constructive feedback.
+
+    Respond strictly in this JSON format:
+    {{
+        "technical": true,
+        "score": 85,
+        "feedback": "Good explanation of REST principles, but no mention of statelessness."
+    }}
+    """
+
+    result = parse_json_response(await generate_text(prompt))
+    technical = bool(result.get("technical", True))
+    return {
+        "technical": technical,
+        "score": max(0, min(100, float(result.get("score", 0)))) if technical else None,
+        "feedback": str(result.get("feedback") or ""),
+    }
+
+
+async def score_turn(question: str, answer: str) -> Dict[str, Any]:
+    """
+    Score a single interviewer question and the candidate's answer.
+
+    Used for incremental scoring while the interview is running (see app/interview_session.py):
+    the prompt holds just this exchange, so its size does not grow with the interview.
+    Results are cached like whole transcripts.
+
+    Args:
+        question (str): What the interviewer asked
+        answer (str): The candidate's answer
+
+    Returns:
+        Dict[str, Any]: "technical" (whether the exchange counts towards the score),
+            "score" (0-100, None for non-technical exchanges) and "feedback".
+    """
+    return await transcript_cache.get_or_compute(turn_key(question, answer), lambda: _score_turn(question, answer))
+
 # Example usage
 if __name__ == "__main__":
     sample_transcript = [
@@ -105,5 +205,5 @@ if __name__ == "__main__":
             "user": "Spring Boot auto-configures dependencies and provides embedded servers, which makes it faster to set up..."
         }
     ]
-    result = score_transcript(sample_transcript)
+    result = asyncio.run(score_transcript(sample_transcript))
     print(json.dumps(result, indent=2))
\ No newline at end of file
@@ -0,0 +1,272 @@
+# app/workflow.py
+"""
+Per-job hiring workflow as an explicit state machine.
+
+A job moves through the stages resume -> coding -> hr -> interview. Each move is
+a named transition; the ones that shortlist applicants run in fixed-size batches
+over job_user in _id order, and checkpoint after every committed batch into the
+job's workflow document:
+
+    {
+        "_id": "<job_id>",
+        "stage": "coding",
+        "transitions": {
+            "resume_end": {"state": "running", "cutoff": {...}, "last_id": ObjectId,
+                           "processed": 1200, "selected": 600, "rejected": 600, ...}
+        }
+    }
+
+The cutoff is computed once when a transition starts and stored, so a transition
+resumed after a crash continues from `last_id` against the same ranking instead
+of starting over. A shortlisting transition does not start while applications of
+the job are still waiting to be scored: it raises TransitionNotReady (the
+scheduler retries it later) for up to WORKFLOW_INGEST_WAIT_SECONDS, then ranks
+the scored applications and leaves the stragglers out. Every batch is idempotent (status writes and the outbox merge),
+so re-running the batch that was in flight is harmless.
+"""
+import os
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+from bson import ObjectId
+from db import job_user_collection, workflow_collection, workflow_phase_collection
+from app.shortlist import find_cutoff, selected_filter, rejected_filter
+from app.ingest_queue import QUEUED as INGEST_QUEUED, PROCESSING as INGEST_PROCESSING
+from app.outbox import enqueue_stage_notifications, CODING_ROUND, HR_ROUND
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW_BATCH_SIZE = int(os.getenv("WORKFLOW_BATCH_SIZE", 1000))
+# How long a shortlist waits for the job's ingest backlog before ranking without it
+WORKFLOW_INGEST_WAIT_SECONDS = float(os.getenv("WORKFLOW_INGEST_WAIT_SECONDS", 1800))
+
+RESUME = "resume"
+CODING = "coding"
+HR = "hr"
+INTERVIEW = "interview"
+
+STAGES = (RESUME, CODING, HR, INTERVIEW)
+
+WAITING = "waiting"
+RUNNING = "running"
+DONE = "done"
+
+
+class WorkflowTransitionError(Exception):
+    """A transition was requested from a stage the job is not in."""
+
+
+class TransitionNotReady(Exception):
+    """The transition cannot start yet (applications are still being scored); retry it later."""
+
+
+@dataclass(frozen=True)
+class Transition:
+    source: str
+    target: str
+    percentage: Optional[float] = None
+    selected_status: Optional[str] = None
+    rejected_status: Optional[str] = None
+    notify_stage: Optional[str] = None
+
+    @property
+    def shortlists(self) -> bool:
+        return self.percentage is not None
+
+
+TRANSITIONS = {
+    "resume_end": Transition(RESUME, CODING, 0.5, "shortlisted", "not_selected", CODING_ROUND),
+    "coding_end": Transition(CODING, HR, 0.5, "shortlisted for HR", "not shortlisted in HR", HR_ROUND),
+    "interview_start": Transition(HR, INTERVIEW),
+}
+
+
+async def start_workflow(job_id: str) -> None:
+    """Create the job's workflow document in its first stage (no-op if it exists)."""
+    now = datetime.utcnow()
+    await workflow_collection.update_one(
+        {"_id": job_id},
+        {"$setOnInsert": {"job_id": ObjectId(job_id), "stage": RESUME, "transitions": {}, "created_at": now}},
+        upsert=True
+    )
+
+
+async def _checkpoint(job_id: str, name: str, fields: Dict[str, Any]) -> None:
+    update = {f"transitions.{name}.{key}": value for key, value in fields.items()}
+    update["updated_at"] = datetime.utcnow()
+    await workflow_collection.update_one({"_id": job_id}, {"$set": update})
+
+
+async def _wait_for_ingest(job_id: str, name: str, checkpoint: Optional[Dict[str, Any]]) -> None:
+    pending = await job_user_collection.count_documents({
+        "job_id": ObjectId(job_id), "ingest_state": {"$in": [INGEST_QUEUED, INGEST_PROCESSING]}
+    })
+    if not pending:
+        return
+    now = datetime.utcnow()
+    waiting_since = (checkpoint or {}).get("waiting_since")
+    if waiting_since is None:
+        waiting_since = now
+        await _checkpoint(job_id, name, {"state": WAITING, "waiting_since": now})
+    if (now - waiting_since).total_seconds() < WORKFLOW_INGEST_WAIT_SECONDS:
+        raise TransitionNotReady(f"{pending} applications of job {job_id} are still being scored")
+    logger.warning(f"[Job {job_id}] {name} proceeds with {pending} unscored applications left out of the ranking")
+
+
+async def _begin(job_id: str, name: str, transition: Transition) -> Optional[Dict[str, Any]]:
+    """
+    Load or initialise the checkpoint of a transition.
+
+    Returns:
+        Optional[Dict[str, Any]]: The checkpoint to run from, or None if the
+        transition already completed
+    """
+    await start_workflow(job_id)
+    workflow = await workflow_collection.find_one({"_id": job_id})
+    checkpoint = workflow.get("transitions", {}).get(name)
+    if checkpoint and checkpoint.get("state") == DONE:
+        return None
+    if checkpoint and checkpoint.get("state") == RUNNING:
+        logger.info(f"[Job {job_id}] Resuming {name} after {checkpoint.get('processed', 0)} applications")
+        return checkpoint
+    if workflow["stage"] != transition.source:
+        raise WorkflowTransitionError(
+            f"Job {job_id} is in stage '{workflow['stage']}', cannot run {name} from '{transition.source}'"
+        )
+    if transition.shortlists:
+        await _wait_for_ingest(job_id, name, checkpoint)
+
+    checkpoint = {
+        "state": RUNNING,
+        "started_at": datetime.utcnow(),
+        "last_id": None,
+        "processed": 0,
+        "selected": 0,
+        "rejected": 0,
+        "batches": 0,
+    }
+    if transition.shortlists:
+        cutoff = await find_cutoff(ObjectId(job_id), transition.percentage)
+        checkpoint["cutoff"] = cutoff
+        checkpoint["total"] = cutoff["total"] if cutoff else 0
+    await _checkpoint(job_id, name, checkpoint)
+    return checkpoint
+
+
+async def _run_batch(job_oid: ObjectId, transition: Transition, cutoff: Dict[str, Any],
+                     lower: Optional[ObjectId], upper: ObjectId) -> Dict[str, int]:
+    id_range = {"$lte": upper}
+    if lower is not None:
+        id_range["$gt"] = lower
+    in_batch = {"_id": id_range}
+
+    selected = {"$and": [selected_filter(job_oid, cutoff), in_batch]}
+    selected_result = await job_user_collection.update_many(
+        selected, {"$set": {"status": transition.selected_status}}
+    )
+    if transition.notify_stage:
+        await enqueue_stage_notifications(job_oid, transition.notify_stage, selected)
+    rejected_result = await job_user_collection.update_many(
+        {"$and": [rejected_filter(job_oid, cutoff), in_batch]},
+        {"$set": {"status": transition.rejected_status}}
+    )
+    return {"selected": selected_result.matched_count, "rejected": rejected_result.matched_count}
+
+
+async def _shortlist(job_id: str, name: str, transition: Transition, checkpoint: Dict[str, Any]) -> None:
+    cutoff = checkpoint.get("cutoff")
+    if cutoff is None:
+        logger.warning(f"[Job {job_id}] No applications to shortlist in {name}")
+        return
+
+    job_oid = ObjectId(job_id)
+    last_id = checkpoint.get("last_id")
+    while True:
+        page_filter = {"job_id": job_oid}
+        if last_id is not None:
+            page_filter["_id"] = {"$gt": last_id}
+        batch = await job_user_collection.find(page_filter, {"_id": 1}) \
+            .sort("_id", 1).limit(WORKFLOW_BATCH_SIZE).to_list(length=WORKFLOW_BATCH_SIZE)
+        if not batch:
+            return
+
+        upper = batch[-1]["_id"]
+        counts = await _run_batch(job_oid, transition, cutoff, last_id, upper)
+        last_id = upper
+        checkpoint["processed"] += len(batch)
+        checkpoint["selected"] += counts["selected"]
+        checkpoint["rejected"] += counts["rejected"]
+        checkpoint["batches"] += 1
+        await _checkpoint(job_id, name, {
+            "last_id": last_id,
+            "processed": checkpoint["processed"],
+            "selected": checkpoint["selected"],
+            "rejected": checkpoint["rejected"],
+            "batches": checkpoint["batches"],
+        })
+        logger.info(f"[Job {job_id}] {name}: {checkpoint['processed']}/{checkpoint.get('total', '?')} applications")
+
+
+async def run_transition(job_id: str, name: str) -> Dict[str, Any]:
+    """
+    Run (or resume) a workflow transition and move the job to its target stage.
+
+    Args:
+        job_id: Job whose workflow advances
+        name: Key of TRANSITIONS, matching the scheduled phase name
+
+    Returns:
+        Dict[str, Any]: The transition's final checkpoint
+    """
+    transition = TRANSITIONS[name]
+    checkpoint = await _begin(job_id, name, transition)
+    if checkpoint is None:
+        logger.info(f"[Job {job_id}] {name} already completed")
+        workflow = await workflow_collection.find_one({"_id": job_id}, {"transitions": 1})
+        return workflow["transitions"][name]
+
+    if transition.shortlists:
+        await _shortlist(job_id, name, transition, checkpoint)
+
+    finished = datetime.utcnow()
+    await workflow_collection.update_one(
+        {"_id": job_id},
+        {"$set": {
+            "stage": transition.target,
+            f"transitions.{name}.state": DONE,
+            f"transitions.{name}.finished_at": finished,
+            "updated_at": finished,
+        }}
+    )
+    checkpoint.update(state=DONE, finished_at=finished)
+    logger.info(f"[Job {job_id}] {name} done, job moved to stage '{transition.target}'")
+    return checkpoint
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _serialize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_serialize(item) for item in value]
+    return value
+
+
+async def workflow_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """The job's stage, transition checkpoints and scheduled phases, JSON-ready."""
+    workflow = await workflow_collection.find_one({"_id": job_id})
+    phases = await workflow_phase_collection.find(
+        {"job_id": job_id}, {"job_id": 0, "owner": 0}
+    ).sort("run_at", 1).to_list(length=None)
+    if workflow is None and not phases:
+        return None
+
+    workflow = workflow or {"_id": job_id, "stage": None, "transitions": {}}
+    for name, checkpoint in workflow.get("transitions", {}).items():
+        total = checkpoint.get("total")
+        if total:
+            checkpoint["progress"] = round(checkpoint.get("processed", 0) / total, 4)
+    workflow["phases"] = phases
+    return _serialize(workflow)
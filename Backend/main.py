@@ -1,26 +1,46 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Path, Query, Body
-from fastapi.responses import StreamingResponse
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Path, Query, Body, Request, Depends, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional, Dict, Any
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timedelta
 
-from app.transcript_scorer import score_transcript
+from app.transcript_scorer import score_conversation, transcript_cache
 from db import hr_collection, job_collection, user_collection, job_user_collection
-import io
-import json
+import asyncio
+import hashlib
 import logging
-import pdfplumber
-from app.resume_parser import extract_and_score_resume
-from app.scheduler import start_scheduler, schedule_workflow
-from app.question_generator import generate_questions_with_answers
+import io
+from app.resume_parser import resume_cache
+from app.scorer import embedding_cache
+from app.scheduler import start_scheduler
+from app.question_bank import question_bank_stats
+from app.resume_store import store_resume, open_resume, parse_range_header, iter_resume_chunks
+from app.pagination import PageParams, page_params, paginated_response
+from app.indexes import ensure_indexes, check_index_drift, log_index_drift
+from app.ingest_queue import queued_fields, notify_ingest_workers, start_ingest_workers, stop_ingest_workers
+from app.pdf_extractor import count_pdf_pages_async, PdfParseError
+from app.outbox import start_outbox_dispatcher, stop_outbox_dispatcher, outbox_stats
+from app.workflow import workflow_status
+from app.rescore import start_rescore, rescore_status, RescoreInProgressError
+from app.candidate_index import candidate_index, suggest_candidates, start_candidate_index, stop_candidate_index
+from app.model_registry import record_startup_step, startup_report, start_model_warmup
+from app.interview_session import InterviewSession
+from app.job_pipeline import (
+    OPEN, PREPARING, FAILED, preparing_fields, notify_job_preparers, start_job_preparers, stop_job_preparers
+)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+record_startup_step("import", time.perf_counter() - _import_started)
 
 # Add CORS middleware
 app.add_middleware(
@@ -76,11 +96,72 @@ class UserModel(BaseModel):
     user_pass: str
     email: EmailStr
 
+# ------------------ LIST OPTIONS ------------------
+# Resume bytes live in GridFS; never pull legacy embedded copies into listings
+JOB_USER_HIDDEN_FIELDS = ("resume_file",)
+JOB_USER_LIST_PROJECTION = {field: 0 for field in JOB_USER_HIDDEN_FIELDS}
+JOB_USER_HEAVY_FIELDS = ("resume_content",)
+JOB_USER_SORTABLE = ("_id", "created_at", "updated_at", "resume_score", "technical_score")
+JOB_SORTABLE = ("_id", "job_title", "posted_date", "open_date", "close_date")
+USER_SORTABLE = ("_id", "user_name", "email")
+HR_SORTABLE = ("_id", "hr_username", "hr_email", "hr_company")
+
+def serialize_id(doc: Dict[str, Any]) -> Dict[str, Any]:
+    doc["_id"] = str(doc["_id"])
+    return doc
+
+def serialize_job(doc: Dict[str, Any]) -> Dict[str, Any]:
+    doc["_id"] = str(doc["_id"])
+    if "hr_id" in doc:
+        doc["hr_id"] = str(doc["hr_id"])
+    return doc
+
+HR_DETAILS_PROJECTION = {
+    "hr_username": 1, "hr_email": 1, "hr_company": 1, "hr_location": 1, "hr_description": 1
+}
+
+def hr_details(hr: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: hr.get(key) for key in HR_DETAILS_PROJECTION}
+
+def serialize_job_user(doc: Dict[str, Any]) -> Dict[str, Any]:
+    doc["_id"] = str(doc["_id"])
+    for key in ("job_id", "user_id"):
+        if key in doc:
+            doc[key] = str(doc[key])
+    if doc.get("resume_file_id"):
+        doc["resume_file_id"] = str(doc["resume_file_id"])
+    return doc
+
 # ------------------ APP STARTUP ------------------
 
 @app.on_event("startup")
 async def startup_event():
+    started = time.perf_counter()
+    try:
+        await ensure_indexes()
+        log_index_drift(await check_index_drift())
+    except Exception as e:
+        logger.error(f"Index check failed: {e}")
+    record_startup_step("indexes", time.perf_counter() - started)
+
+    started = time.perf_counter()
     start_scheduler()
+    start_ingest_workers()
+    start_outbox_dispatcher()
+    start_candidate_index()
+    start_job_preparers()
+    record_startup_step("background_tasks", time.perf_counter() - started)
+
+    # Models load in the background once the server is accepting requests
+    start_model_warmup()
+    logger.info(f"Startup report: {startup_report()}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_ingest_workers()
+    await stop_outbox_dispatcher()
+    await stop_candidate_index()
+    await stop_job_preparers()
 
 # ------------------ HR Routes ------------------
 
@@ -94,14 +175,14 @@ async def create_hr(hr: HRModel):
         raise HTTPException(status_code=500, detail="Failed to create HR")
 
 @app.get("/hr/")
-async def get_all_hrs() -> List[Dict[str, Any]]:
+async def get_all_hrs(page: PageParams = Depends(page_params)) -> List[Dict[str, Any]]:
     try:
-        cursor = hr_collection.find({})
-        data = []
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            data.append(doc)
-        return data
+        return await paginated_response(
+            hr_collection, {}, page, serialize_id,
+            sortable=HR_SORTABLE, hidden=("hr_pass",)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching HRs: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch HRs")
@@ -125,7 +206,7 @@ async def get_hr_by_credentials(
 
 # ------------------ Job Routes ------------------
 
-@app.post("/job/")
+@app.post("/job/", status_code=202)
 async def create_job(job: JobModel):
     try:
         # Parse dates
@@ -133,32 +214,23 @@ async def create_job(job: JobModel):
         opened = datetime.strptime(job.open_date, "%Y-%m-%d")
         closed = opened + timedelta(days=3)
 
-        # Generate questions based on job description
-        job_questions = generate_questions_with_answers(job.problem_statements)
-
         # Prepare the job document
         doc = job.dict()
         doc["posted_date"] = posted.isoformat()
         doc["open_date"] = opened.isoformat()
-        doc["close_date"] = closed.isoformat()
+        doc["close_date"] = closed  # stored as a datetime so it can be range-queried and indexed
         doc["hr_id"] = ObjectId(doc["hr_id"])
-        doc["job_questions"] = job_questions  # Add generated questions
+
+        # Questions, the scoring profile and the workflow are set up by the job preparation
+        # workers, which then open the job
+        doc.update(preparing_fields())
+        doc["created_at"] = datetime.utcnow()
 
         # Insert the job into the database
         result = await job_collection.insert_one(doc)
+        notify_job_preparers()
 
-        # Schedule workflow
-        now = datetime.now()
-        timings = {
-            "resume_start": now + timedelta(minutes=0),
-            "resume_end": now + timedelta(minutes=2),
-            "coding_start": now + timedelta(minutes=3),
-            "coding_end": now + timedelta(minutes=8),
-            "interview_start": now + timedelta(minutes=9),
-        }
-        schedule_workflow(str(result.inserted_id), timings)
-
-        return {"message": "Job created", "id": str(result.inserted_id)}
+        return {"message": "Job created", "id": str(result.inserted_id), "job_status": doc["job_status"]}
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
     except Exception as e:
@@ -170,42 +242,39 @@ async def get_all_jobs(user_id: str) -> List[Dict[str, Any]]:
     try:
         today = datetime.utcnow()
 
-        cursor = job_collection.find({})
-        data = []
+        # Only jobs whose close_date is today or in the future. Older documents
+        # stored close_date as an ISO string, which still compares correctly.
+        docs = await job_collection.find({
+            "$or": [
+                {"close_date": {"$gte": today}},
+                {"close_date": {"$gte": today.isoformat()}},
+            ],
+            # Jobs still being prepared (or that failed to) are not visible to candidates
+            "job_status": {"$nin": [PREPARING, FAILED]},
+        }).to_list(length=None)
+        if not docs:
+            return []
+
+        job_ids = [doc["_id"] for doc in docs]
+        hr_ids = list({doc["hr_id"] for doc in docs if doc.get("hr_id")})
+
+        # One batched lookup per collection instead of two queries per job
+        applied_cursor = job_user_collection.find(
+            {"user_id": ObjectId(user_id), "job_id": {"$in": job_ids}},
+            {"job_id": 1}
+        )
+        applied_job_ids = {app_doc["job_id"] async for app_doc in applied_cursor}
+
+        hr_cursor = hr_collection.find({"_id": {"$in": hr_ids}}, HR_DETAILS_PROJECTION)
+        hrs = {hr["_id"]: hr async for hr in hr_cursor}
 
-        async for doc in cursor:
-            # Convert string dates to datetime objects
-            close_date = doc.get("close_date")
-            if close_date:
-                # Convert ISO date string to datetime if needed
-                if isinstance(close_date, str):
-                    close_date = datetime.fromisoformat(close_date)
-
-                # Filter: Only include jobs whose close_date is today or in the future
-                if close_date >= today:
-                    doc["_id"] = str(doc["_id"])
-                    doc["hr_id"] = str(doc["hr_id"])
-
-                    # Check if the user has applied for this job
-                    job_user = await job_user_collection.find_one({
-                        "job_id": ObjectId(doc["_id"]),
-                        "user_id": ObjectId(user_id)
-                    })
-                    doc["applied"] = bool(job_user)  # Set applied = true if found, else false
-
-                    # Fetch HR details using hr_id
-                    hr = await hr_collection.find_one({"_id": ObjectId(doc["hr_id"])})
-                    if hr:
-                        hr["_id"] = str(hr["_id"])
-                        doc["hr_details"] = {
-                            "hr_username": hr.get("hr_username"),
-                            "hr_email": hr.get("hr_email"),
-                            "hr_company": hr.get("hr_company"),
-                            "hr_location": hr.get("hr_location"),
-                            "hr_description": hr.get("hr_description"),
-                        }
-
-                    data.append(doc)
+        data = []
+        for doc in docs:
+            doc["applied"] = doc["_id"] in applied_job_ids
+            hr = hrs.get(doc.get("hr_id"))
+            if hr:
+                doc["hr_details"] = hr_details(hr)
+            data.append(serialize_job(doc))
 
         return data
 
@@ -214,15 +283,17 @@ async def get_all_jobs(user_id: str) -> List[Dict[str, Any]]:
         raise HTTPException(status_code=500, detail="Failed to fetch jobs")
 
 @app.get("/job/byHrId/{hr_id}")
-async def get_jobs_by_hr_id(hr_id: str = Path(...)) -> List[Dict[str, Any]]:
+async def get_jobs_by_hr_id(
+        hr_id: str = Path(...),
+        page: PageParams = Depends(page_params)
+) -> List[Dict[str, Any]]:
     try:
-        cursor = job_collection.find({"hr_id": ObjectId(hr_id)})
-        data = []
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            doc["hr_id"] = str(doc["hr_id"])
-            data.append(doc)
-        return data
+        return await paginated_response(
+            job_collection, {"hr_id": ObjectId(hr_id)}, page, serialize_job,
+            sortable=JOB_SORTABLE
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching jobs by HR ID: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch jobs")
@@ -255,22 +326,127 @@ async def get_job_by_job_id_and_user_id(
             doc["status"] = None  # Set status to None if not applied
 
         # Fetch HR details using hr_id
-        hr = await hr_collection.find_one({"_id": ObjectId(doc["hr_id"])})
+        hr = await hr_collection.find_one({"_id": ObjectId(doc["hr_id"])}, HR_DETAILS_PROJECTION)
         if hr:
-            hr["_id"] = str(hr["_id"])
-            doc["hr_details"] = {
-                "hr_username": hr.get("hr_username"),
-                "hr_email": hr.get("hr_email"),
-                "hr_company": hr.get("hr_company"),
-                "hr_location": hr.get("hr_location"),
-                "hr_description": hr.get("hr_description"),
-            }
+            doc["hr_details"] = hr_details(hr)
 
         return doc
     except Exception as e:
         logger.error(f"Error fetching job by Job ID and User ID: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch job")
 
+@app.get("/job/{job_id}/preparation")
+async def get_job_preparation_status(job_id: str = Path(..., description="The ID of the job")) -> Dict[str, Any]:
+    try:
+        doc = await job_collection.find_one(
+            {"_id": ObjectId(job_id)},
+            {"job_status": 1, "prepare_attempts": 1, "prepare_error": 1, "prepare_next_attempt_at": 1}
+        )
+        if not doc:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        # Jobs created before the preparation stage existed were prepared inline
+        return {
+            "id": job_id,
+            "job_status": doc.get("job_status", OPEN),
+            "attempts": doc.get("prepare_attempts", 0),
+            "error": doc.get("prepare_error"),
+            "next_attempt_at": doc.get("prepare_next_attempt_at"),
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching preparation status for job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch job status")
+
+@app.get("/job/{job_id}/workflow")
+async def get_job_workflow(job_id: str = Path(..., description="The ID of the job")) -> Dict[str, Any]:
+    try:
+        status = await workflow_status(job_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="No workflow found for job")
+        return status
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching workflow for job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch workflow")
+
+@app.get("/job/{job_id}/suggested-candidates")
+async def get_suggested_candidates(
+        job_id: str = Path(..., description="The ID of the job"),
+        k: int = Query(10, ge=1, le=200, description="Number of candidates to return")
+) -> List[Dict[str, Any]]:
+    try:
+        job = await job_collection.find_one({"_id": ObjectId(job_id)}, {"job_des": 1})
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        # People who already applied are not suggestions
+        applied = {
+            str(doc["user_id"])
+            async for doc in job_user_collection.find({"job_id": ObjectId(job_id)}, {"user_id": 1, "_id": 0})
+        }
+        job_description = job.get("job_des") or []
+        requirements = job_description if isinstance(job_description, list) else [job_description]
+        matches = await suggest_candidates(requirements, k, exclude=applied)
+
+        users = {
+            str(user["_id"]): user
+            async for user in user_collection.find(
+                {"_id": {"$in": [ObjectId(user_id) for user_id, _ in matches]}},
+                {"user_name": 1, "email": 1}
+            )
+        }
+        return [
+            {
+                "user_id": user_id,
+                "user_name": users[user_id].get("user_name"),
+                "email": users[user_id].get("email"),
+                "similarity": round(score, 4),
+            }
+            for user_id, score in matches if user_id in users
+        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error suggesting candidates for job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to suggest candidates")
+
+@app.post("/job/{job_id}/rescore", status_code=202)
+async def rescore_job(
+        job_id: str = Path(..., description="The ID of the job"),
+        use_llm: bool = Query(False, description="Let Gemini break ties in the ambiguous score band")
+) -> Dict[str, Any]:
+    try:
+        run_id = await start_rescore(job_id, use_llm=use_llm)
+        if run_id is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {"message": "Rescore started", "job_id": job_id, "run_id": run_id}
+    except HTTPException:
+        raise
+    except RescoreInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting rescore for job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to start rescore")
+
+@app.get("/job/{job_id}/rescore/{run_id}")
+async def get_rescore_status(
+        job_id: str = Path(..., description="The ID of the job"),
+        run_id: str = Path(..., description="The ID returned when the rescore was started")
+) -> Dict[str, Any]:
+    try:
+        status = await rescore_status(job_id, run_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Rescore run not found")
+        return status
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching rescore run {run_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch rescore status")
+
 @app.post("/job/{job_id}/{user_id}/score")
 async def update_technical_score(
         job_id: str = Path(..., description="The ID of the job"),
@@ -282,14 +458,8 @@ async def update_technical_score(
         if not transcript_data or not all("role" in item and "content" in item for item in transcript_data):
             raise HTTPException(status_code=400, detail="Invalid transcript format. Each item must have 'role' and 'content' keys.")
 
-        # Convert the transcript into a format suitable for scoring
-        sample_transcript = [
-            {"bot": item["content"]} if item["role"] == "assistant" else {"user": item["content"]}
-            for item in transcript_data
-        ]
-
-        # Call the score_transcript function
-        scoring_result = score_transcript(sample_transcript)
+        # Identical (e.g. retried) transcripts share one cached score
+        scoring_result = await score_conversation(transcript_data)
         technical_score = scoring_result.get("score", 0)
         feedback = scoring_result.get("feedback", [])
 
@@ -317,6 +487,64 @@ async def update_technical_score(
         logger.error(f"Unexpected error updating technical score: {e}")
         raise HTTPException(status_code=500, detail="Failed to update technical score")
 
+@app.websocket("/job/{job_id}/{user_id}/interview")
+async def stream_interview(websocket: WebSocket, job_id: str, user_id: str):
+    """
+    Score a voice interview turn by turn while it runs.
+
+    The client sends {"role": "assistant" | "user", "content": "..."} for every message as it
+    is spoken and {"type": "end"} when the interview is over. The server replies with
+    {"type": "turn", ...} as each question/answer turn is scored (including the running score),
+    then {"type": "final", "technical_score", "feedback", "turns"} once the score has been saved.
+    Nothing is saved if the client disconnects before sending "end".
+    """
+    if not (ObjectId.is_valid(job_id) and ObjectId.is_valid(user_id)):
+        await websocket.close(code=1008)
+        return
+    job_user_filter = {"job_id": ObjectId(job_id), "user_id": ObjectId(user_id)}
+    if not await job_user_collection.find_one(job_user_filter, {"_id": 1}):
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+
+    async def report_turn(result: Dict[str, Any]) -> None:
+        await websocket.send_json({"type": "turn", **result})
+
+    session = InterviewSession(on_turn_scored=report_turn)
+    try:
+        while True:
+            message = await websocket.receive_json()
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects"})
+            elif message.get("type") == "end":
+                break
+            elif isinstance(message.get("role"), str) and isinstance(message.get("content"), str):
+                session.add_message(message["role"], message["content"])
+            else:
+                await websocket.send_json({"type": "error", "detail": "Each message must have 'role' and 'content' keys"})
+
+        result = await session.finish()
+        technical_score = result["score"]
+        await job_user_collection.update_one(
+            job_user_filter,
+            {"$set": {"technical_score": technical_score, "updated_at": datetime.utcnow()}}
+        )
+        await websocket.send_json({
+            "type": "final",
+            "technical_score": technical_score,
+            "feedback": result["feedback"],
+            "turns": result["turns"]
+        })
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info(f"Interview stream for job {job_id}, user {user_id} disconnected before the end")
+        session.cancel()
+    except Exception as e:
+        logger.error(f"Error scoring interview stream for job {job_id}, user {user_id}: {e}")
+        session.cancel()
+        await websocket.close(code=1011)
+
 # ------------------ User Routes ------------------
 
 @app.post("/user/signup")
@@ -346,14 +574,14 @@ async def create_user(user: UserModel):
         raise HTTPException(status_code=500, detail="Failed to create user")
 
 @app.get("/user/")
-async def get_all_users() -> List[Dict[str, Any]]:
+async def get_all_users(page: PageParams = Depends(page_params)) -> List[Dict[str, Any]]:
     try:
-        cursor = user_collection.find({})
-        data = []
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            data.append(doc)
-        return data
+        return await paginated_response(
+            user_collection, {}, page, serialize_id,
+            sortable=USER_SORTABLE, hidden=("user_pass",)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching users: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch users")
@@ -387,7 +615,7 @@ async def get_user_by_credentials(
 
 # ------------------ Job-User Routes ------------------
 
-@app.post("/job-user/")
+@app.post("/job-user/", status_code=202)
 async def create_job_user(
         job_id: str = Form(...),
         user_id: str = Form(...),
@@ -403,58 +631,61 @@ async def create_job_user(
         if not file_bytes:
             raise HTTPException(status_code=400, detail="Empty file")
 
+        # Only the page count here; text extraction stays in the ingest workers
         try:
-            with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-                resume_content = "\n".join(page.extract_text() or "" for page in pdf.pages)
-            if not resume_content:
-                raise HTTPException(status_code=400, detail="Could not extract text from resume")
-        except Exception as e:
-            logger.error(f"PDF parsing error: {e}")
-            raise HTTPException(status_code=400, detail="Failed to parse PDF")
-
-        job_doc = await job_collection.find_one({"_id": ObjectId(job_id)})
+            if not await count_pdf_pages_async(file_bytes):
+                raise HTTPException(status_code=400, detail="The PDF has no pages")
+        except PdfParseError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid PDF: {e}")
+        except asyncio.TimeoutError:
+            logger.warning(f"Counting the pages of {resume.filename} timed out; leaving it to the ingest workers")
+
+        job_doc = await job_collection.find_one({"_id": ObjectId(job_id)}, {"job_des": 1, "job_status": 1})
         if not job_doc:
             raise HTTPException(status_code=404, detail="Job not found")
-
-        job_description = job_doc.get("job_des", "")
-        if not job_description:
+        if job_doc.get("job_status", OPEN) != OPEN:
+            raise HTTPException(status_code=409, detail="Job is not open for applications")
+        if not job_doc.get("job_des"):
             raise HTTPException(status_code=400, detail="No job description found for job")
-        requirements = [job_description]
 
-        try:
-            scoring_result = extract_and_score_resume(resume_content, requirements)
-            if isinstance(scoring_result, str):
-                scoring_result = json.loads(scoring_result)
-            resume_score = float(scoring_result.get("resumeMatch", 0))
-        except Exception as e:
-            logger.error(f"Scoring error: {e}")
-            resume_score = 0
-            scoring_result = {"error": "Failed to score resume", "details": str(e)}
+        already_applied = await job_user_collection.find_one(
+            {"job_id": ObjectId(job_id), "user_id": ObjectId(user_id)}, {"_id": 1}
+        )
+        if already_applied:
+            raise HTTPException(status_code=409, detail="You have already applied for this job")
 
+        resume_ref = await store_resume(file_bytes, resume.filename, resume.content_type)
+
+        # Text extraction and scoring happen in the ingest workers
         doc = {
             "job_id": ObjectId(job_id),
             "user_id": ObjectId(user_id),
-            "resume_file": file_bytes,
+            **resume_ref,
             "resume_filename": resume.filename,
             "resume_content_type": resume.content_type,
-            "resume_content": resume_content,
+            "resume_content": None,
             "status": status,  # Default value is used if not provided
-            "resume_score": resume_score,
+            "resume_score": None,  # Set by the ingest workers once the resume is scored
             "technical_score": technical_score,  # New field
-            "resume_detail": scoring_result,
+            "resume_detail": {},
+            **queued_fields(),
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
 
-        result = await job_user_collection.insert_one(doc)
+        try:
+            result = await job_user_collection.insert_one(doc)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="You have already applied for this job")
+
+        notify_ingest_workers()
 
         return {
-            "message": "Application submitted successfully",
+            "message": "Application received and queued for scoring",
             "id": str(result.inserted_id),
             "status": status,  # Include status in the response
-            "resume_score": resume_score,
-            "technical_score": technical_score,
-            "resume_detail": scoring_result
+            "ingest_state": doc["ingest_state"],
+            "technical_score": technical_score
         }
 
     except HTTPException:
@@ -463,34 +694,104 @@ async def create_job_user(
         logger.error(f"Error creating job application: {e}")
         raise HTTPException(status_code=500, detail=f"Application submission failed: {str(e)}")
 
+@app.get("/job-user/ingest-status/{id}")
+async def get_job_user_ingest_status(id: str) -> Dict[str, Any]:
+    try:
+        doc = await job_user_collection.find_one(
+            {"_id": ObjectId(id)},
+            {"ingest_state": 1, "ingest_attempts": 1, "ingest_error": 1, "resume_score": 1, "resume_detail": 1}
+        )
+        if not doc:
+            raise HTTPException(status_code=404, detail="Application not found")
+
+        # Applications submitted before the queue existed were scored inline
+        state = doc.get("ingest_state", "done")
+        result = {
+            "id": id,
+            "ingest_state": state,
+            "attempts": doc.get("ingest_attempts", 0),
+            "error": doc.get("ingest_error"),
+        }
+        if state == "done":
+            result["resume_score"] = doc.get("resume_score")
+            result["resume_detail"] = doc.get("resume_detail")
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching ingest status: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch application status")
+
 @app.get("/job-user/")
-async def get_all_job_users() -> List[Dict[str, Any]]:
+async def get_all_job_users(page: PageParams = Depends(page_params)) -> List[Dict[str, Any]]:
     try:
-        cursor = job_user_collection.find({})
-        data = []
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            doc["job_id"] = str(doc["job_id"])
-            doc["user_id"] = str(doc["user_id"])
-            doc["resume_file"] = None
-            data.append(doc)
-        return data
+        return await paginated_response(
+            job_user_collection, {}, page, serialize_job_user,
+            sortable=JOB_USER_SORTABLE, hidden=JOB_USER_HIDDEN_FIELDS, default_exclude=JOB_USER_HEAVY_FIELDS
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching applications: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch applications")
 
 @app.get("/job-user/download/{id}")
-async def download_resume(id: str):
+async def download_resume(id: str, request: Request):
     try:
-        doc = await job_user_collection.find_one({"_id": ObjectId(id)})
-        if not doc or "resume_file" not in doc:
+        doc = await job_user_collection.find_one(
+            {"_id": ObjectId(id)},
+            {"resume_file_id": 1, "resume_sha256": 1, "resume_filename": 1, "resume_content_type": 1}
+        )
+        if not doc:
             raise HTTPException(status_code=404, detail="Resume not found")
 
+        if doc.get("resume_file_id"):
+            grid_out = await open_resume(doc["resume_file_id"])
+            size = grid_out.length
+            etag = f'"{doc.get("resume_sha256") or grid_out.metadata.get("sha256")}"'
+        else:
+            # Legacy application with the PDF embedded in the document
+            legacy = await job_user_collection.find_one({"_id": ObjectId(id)}, {"resume_file": 1})
+            if not legacy or not legacy.get("resume_file"):
+                raise HTTPException(status_code=404, detail="Resume not found")
+            grid_out = None
+            size = len(legacy["resume_file"])
+            etag = f'"{hashlib.sha256(legacy["resume_file"]).hexdigest()}"'
+
+        headers = {
+            "Content-Disposition": f"attachment; filename={doc['resume_filename']}",
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+        }
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+        try:
+            byte_range = parse_range_header(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+        status_code = 200
+        start, end = 0, size - 1
+        if byte_range:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+
+        if grid_out is not None:
+            body = iter_resume_chunks(grid_out, start, end)
+        else:
+            body = io.BytesIO(legacy["resume_file"][start:end + 1])
+
         return StreamingResponse(
-            io.BytesIO(doc["resume_file"]),
+            body,
+            status_code=status_code,
             media_type=doc["resume_content_type"],
-            headers={"Content-Disposition": f"attachment; filename={doc['resume_filename']}"}
+            headers=headers
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error downloading resume: {e}")
         raise HTTPException(status_code=500, detail="Failed to download resume")
@@ -498,46 +799,36 @@ async def download_resume(id: str):
 @app.get("/job-user/byId/{id}")
 async def get_job_user_by_id(id: str) -> dict:
     try:
-        doc = await job_user_collection.find_one({"_id": ObjectId(id)})
+        doc = await job_user_collection.find_one({"_id": ObjectId(id)}, JOB_USER_LIST_PROJECTION)
         if not doc:
             raise HTTPException(status_code=404, detail="Application not found")
-        doc["_id"] = str(doc["_id"])
-        doc["job_id"] = str(doc["job_id"])
-        doc["user_id"] = str(doc["user_id"])
-        doc["resume_file"] = None
-        return doc
+        return serialize_job_user(doc)
     except Exception as e:
         logger.error(f"Error fetching application: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch application")
 
 @app.get("/job-user/byJobId/{job_id}")
-async def get_job_users_by_job_id(job_id: str) -> List[dict]:
+async def get_job_users_by_job_id(job_id: str, page: PageParams = Depends(page_params)) -> List[dict]:
     try:
-        cursor = job_user_collection.find({"job_id": ObjectId(job_id)})
-        results = []
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            doc["job_id"] = str(doc["job_id"])
-            doc["user_id"] = str(doc["user_id"])
-            doc["resume_file"] = None
-            results.append(doc)
-        return results
+        return await paginated_response(
+            job_user_collection, {"job_id": ObjectId(job_id)}, page, serialize_job_user,
+            sortable=JOB_USER_SORTABLE, hidden=JOB_USER_HIDDEN_FIELDS, default_exclude=JOB_USER_HEAVY_FIELDS
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching applications by job ID: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch applications")
 
 @app.get("/job-user/byUserId/{user_id}")
-async def get_job_users_by_user_id(user_id: str) -> List[dict]:
+async def get_job_users_by_user_id(user_id: str, page: PageParams = Depends(page_params)) -> List[dict]:
     try:
-        cursor = job_user_collection.find({"user_id": ObjectId(user_id)})
-        results = []
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            doc["job_id"] = str(doc["job_id"])
-            doc["user_id"] = str(doc["user_id"])
-            doc["resume_file"] = None
-            results.append(doc)
-        return results
+        return await paginated_response(
+            job_user_collection, {"user_id": ObjectId(user_id)}, page, serialize_job_user,
+            sortable=JOB_USER_SORTABLE, hidden=JOB_USER_HIDDEN_FIELDS, default_exclude=JOB_USER_HEAVY_FIELDS
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching applications by user ID: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch applications")
@@ -555,4 +846,32 @@ async def update_job_user_status(id: str, status: int = Body(..., embed=True)):
         return {"message": "Status updated successfully", "id": id, "new_status": status}
     except Exception as e:
         logger.error(f"Error updating status: {e}")
-        raise HTTPException(status_code=500, detail="Failed to update status")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to update status")
+
+# ------------------ Cache Routes ------------------
+
+@app.get("/cache/stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    return {
+        "resume": resume_cache.stats(),
+        "transcript": transcript_cache.stats(),
+        "embedding": embedding_cache.stats(),
+        "candidate_index": candidate_index.stats(),
+        "question_bank": question_bank_stats(),
+    }
+
+# ------------------ Startup Routes ------------------
+
+@app.get("/startup/report")
+async def get_startup_report() -> Dict[str, Any]:
+    return startup_report()
+
+# ------------------ Outbox Routes ------------------
+
+@app.get("/outbox/stats")
+async def get_outbox_stats() -> Dict[str, Any]:
+    try:
+        return await outbox_stats()
+    except Exception as e:
+        logger.error(f"Error fetching outbox stats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch outbox stats")